@@ -0,0 +1,74 @@
+"""
+Streaming NDJSON export of every household's assignments for one date.
+
+Households are read through a server-side cursor in fixed-size chunks. Each
+chunk's stored assignments are loaded with one `$in` query, and missing
+days are generated the way the assignments endpoint does. Each chunk is
+yielded as NDJSON lines. The generator only advances when the response has
+sent the previous chunk, so memory stays at one chunk whether there are ten
+households or ten million.
+"""
+import json
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from pymongo.errors import PyMongoError
+
+from batch_assignments import chunked, stream_scopes
+from repository import fetch_many
+
+logger = logging.getLogger(__name__)
+
+NDJSON = "application/x-ndjson"
+
+
+def ndjson_line(record: Dict[str, Any]) -> bytes:
+    return json.dumps(record, default=str, separators=(",", ":")).encode() + b"\n"
+
+
+async def export_lines(db, date: str, compute: Callable[[str, str], Awaitable[dict]],
+                       scope_chunk: int = 500) -> AsyncIterator[bytes]:
+    """NDJSON bytes, one chunk of households at a time
+
+    `compute(scope_id, date)` produces (and stores) assignments for
+    households that have none yet. A household whose assignments cannot be
+    loaded or written out gets an "error" line, and the export continues.
+    If reading the households fails, the export ends with an error line
+    instead of stopping mid-stream.
+    """
+    try:
+        async for chunk in chunked(stream_scopes(db, batch_size=scope_chunk, use_case="household_export"),
+                                   scope_chunk):
+            scope_ids = [scope_id for scope_id, _ in chunk]
+            stored = {}
+            async for doc in fetch_many(db.daily_assignments, {"coupleId": {"$in": scope_ids}, "date": date},
+                                        "daily_assignments"):
+                stored[doc["coupleId"]] = doc
+            lines = []
+            for scope_id in scope_ids:
+                try:
+                    lines.append(await _household_line(scope_id, date, stored.get(scope_id), compute))
+                except Exception as e:
+                    if isinstance(e, PyMongoError):
+                        logger.warning(f"Assignment export failed for {scope_id}: {e}")
+                    else:
+                        logger.exception(f"Assignment export failed for {scope_id}")
+                    lines.append(ndjson_line({"householdId": scope_id, "date": date, "error": str(e)}))
+            yield b"".join(lines)
+    except Exception as e:
+        logger.exception(f"Assignment export for {date} stopped")
+        yield ndjson_line({"date": date, "error": str(e)})
+
+
+async def _household_line(scope_id: str, date: str, doc: Optional[dict],
+                          compute: Callable[[str, str], Awaitable[dict]]) -> bytes:
+    generated = doc is None
+    if generated:
+        doc = await compute(scope_id, date)
+    return ndjson_line({
+        "householdId": scope_id,
+        "date": date,
+        "assignments": doc["assignments"],
+        "createdAt": doc.get("created_at"),
+        "generated": generated,
+    })
@@ -0,0 +1,225 @@
+"""
+Nightly batch generation of daily odds and assignments.
+
+/couples/{id}/odds/{date} and /couples/{id}/assignments/{date} build their
+documents on first read, so the first player each morning waits for them.
+This job streams every active household (and legacy couple) from Mongo,
+computes the next N days on a ProcessPoolExecutor and stores the results
+with chunked, unordered bulk_writes. It uses the same engine, chore
+catalogs, talent builds and seeded streams as the endpoints, so the
+documents are identical to the ones the endpoints would build.
+
+Documents are written with $setOnInsert, so a day a player has already
+seen is never changed. The job can be rerun safely.
+
+    cd backend && python -m batch_assignments --days 3 --workers 8
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date as Date, datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+import odds_engine
+from repository import fetch_many
+from task_catalog import CatalogCache, catalog_version
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+# Compiled catalogs kept by each worker process across chunks
+_CATALOGS = CatalogCache()
+
+
+def upcoming_dates(start: Date, days: int) -> List[str]:
+    """`days` consecutive YYYY-MM-DD dates from `start`"""
+    return [(start + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(days)]
+
+
+def catalog_fields(tasks: List[dict]) -> List[dict]:
+    """The task fields the odds read, as plain values that pickle without server.py"""
+    return [
+        {
+            "taskId": task["taskId"],
+            "room": task["room"],
+            "title": task["title"],
+            "difficulty": getattr(task["difficulty"], "value", task["difficulty"]),
+        }
+        for task in tasks
+    ]
+
+
+def compute_scopes(scopes: List[Tuple[str, List[Dict], str]], catalogs: Dict[str, List[dict]],
+                   dates: List[str]) -> Tuple[List[dict], List[dict]]:
+    """(daily_odds docs, daily_assignments docs) for every (scope, date); runs in a worker process
+
+    `scopes` holds (scope id, talent builds, catalog version) and `catalogs`
+    maps each version used to its catalog_fields.
+    """
+    now = datetime.utcnow()
+    odds_docs, assignment_docs = [], []
+    for scope_id, builds, version in scopes:
+        _, arrays = _CATALOGS.compile(catalogs[version])
+        for date in dates:
+            odds = odds_engine.compute_daily_odds(arrays, scope_id, date, *builds)
+            odds_docs.append({"date": date, "coupleId": scope_id, "taskOdds": odds, "computed_at": now})
+            assignment_docs.append({
+                "coupleId": scope_id,
+                "date": date,
+                "assignments": odds_engine.pair_assignments(scope_id, date, odds),
+                "created_at": now
+            })
+    return odds_docs, assignment_docs
+
+
+def build_upserts(docs: List[dict]) -> List[UpdateOne]:
+    """Insert-only upserts keyed by (coupleId, date); existing days are left alone"""
+    return [
+        UpdateOne({"coupleId": doc["coupleId"], "date": doc["date"]}, {"$setOnInsert": doc}, upsert=True)
+        for doc in docs
+    ]
+
+
+async def write_chunked(collection, docs: List[dict], chunk_size: int) -> Dict[str, int]:
+    """Upsert docs in unordered bulk_writes of at most chunk_size operations"""
+    counts = {"inserted": 0, "existing": 0, "failed": 0}
+    for start in range(0, len(docs), chunk_size):
+        operations = build_upserts(docs[start:start + chunk_size])
+        try:
+            result = await collection.bulk_write(operations, ordered=False)
+            counts["inserted"] += result.upserted_count
+            counts["existing"] += result.matched_count
+        except BulkWriteError as e:
+            details = e.details
+            # A lazy request that inserted the same day first wins the race; that is not a failure
+            duplicates = sum(1 for error in details.get("writeErrors", []) if error.get("code") == DUPLICATE_KEY)
+            counts["inserted"] += details.get("nUpserted", 0)
+            counts["existing"] += details.get("nMatched", 0) + duplicates
+            counts["failed"] += len(details.get("writeErrors", [])) - duplicates
+    return counts
+
+
+async def stream_scopes(db, batch_size: int = 1000,
+                        use_case: str = "household_batch") -> AsyncIterator[Tuple[str, Optional[List[dict]]]]:
+    """(id, customized chores or None) of active households, then active legacy couples
+
+    Chores are only read if the household projection (`use_case`) includes them.
+    """
+    async for household in fetch_many(db.households, {"isActive": True}, use_case, batch_size=batch_size):
+        yield household["householdId"], household.get("customizedChores") or None
+    async for couple in fetch_many(db.couples, {"isActive": True}, "couple_batch", batch_size=batch_size):
+        yield couple["coupleId"], None
+
+
+async def chunked(scopes: AsyncIterator, size: int) -> AsyncIterator[list]:
+    chunk = []
+    async for scope in scopes:
+        chunk.append(scope)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def load_builds(db, scope_ids: List[str]) -> Dict[str, List[Dict]]:
+    """scope id -> [user1, user2] talent builds, read the way couple_talent_builds reads them"""
+    builds = {scope_id: [] for scope_id in scope_ids}
+    async for user in fetch_many(db.users, {"coupleId": {"$in": scope_ids}}, "user_talents"):
+        scope_builds = builds[user["coupleId"]]
+        if len(scope_builds) < 2:
+            scope_builds.append(user.get("talentBuild") or {})
+    return {scope_id: found + [{}] * (2 - len(found)) for scope_id, found in builds.items()}
+
+
+async def run_batch(db, tasks: List[dict], start: Date, days: int = 3, workers: Optional[int] = None,
+                    scope_chunk: int = 200, write_chunk: int = 1000) -> Dict[str, Any]:
+    """Precompute `days` days of odds and assignments for every active scope; returns a throughput report"""
+    dates = upcoming_dates(start, days)
+    default_fields = catalog_fields(tasks)
+    default_version = catalog_version(default_fields)
+    workers = workers or os.cpu_count() or 1
+    report = {"households": 0, "days": days, "oddsWritten": 0, "assignmentsWritten": 0,
+              "alreadyPresent": 0, "failed": 0}
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+
+    async def store(done):
+        for future in done:
+            odds_docs, assignment_docs = future.result()
+            odds_counts, assignment_counts = await asyncio.gather(
+                write_chunked(db.daily_odds, odds_docs, write_chunk),
+                write_chunked(db.daily_assignments, assignment_docs, write_chunk)
+            )
+            report["oddsWritten"] += odds_counts["inserted"]
+            report["assignmentsWritten"] += assignment_counts["inserted"]
+            report["alreadyPresent"] += odds_counts["existing"] + assignment_counts["existing"]
+            report["failed"] += odds_counts["failed"] + assignment_counts["failed"]
+
+    # Spawned, not forked: the parent runs Motor's threads, which must not be copied mid-operation
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = set()
+        async for chunk in chunked(stream_scopes(db), scope_chunk):
+            builds = await load_builds(db, [scope_id for scope_id, _ in chunk])
+            # Each distinct catalog is sent once per chunk; households with the default chores share one
+            catalogs = {default_version: default_fields}
+            scopes = []
+            for scope_id, chores in chunk:
+                version = default_version
+                if chores:
+                    fields = catalog_fields(chores)
+                    version = catalog_version(fields)
+                    catalogs[version] = fields
+                scopes.append((scope_id, builds[scope_id], version))
+            pending.add(loop.run_in_executor(pool, compute_scopes, scopes, catalogs, dates))
+            report["households"] += len(chunk)
+            # Keep every worker busy while results are written, without holding the whole run in memory
+            if len(pending) >= 2 * workers:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                await store(done)
+        if pending:
+            done, _ = await asyncio.wait(pending)
+            await store(done)
+
+    seconds = time.perf_counter() - started
+    report["seconds"] = round(seconds, 3)
+    report["householdsPerSecond"] = round(report["households"] / seconds, 1) if seconds else 0.0
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    from pathlib import Path
+
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Precompute daily odds and assignments for active households")
+    parser.add_argument("--days", type=int, default=3, help="number of days to generate, starting at --start")
+    parser.add_argument("--start", type=Date.fromisoformat, default=None, help="first date (default: today, UTC)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--scope-chunk", type=int, default=200, help="households per worker task")
+    parser.add_argument("--write-chunk", type=int, default=1000, help="operations per bulk_write")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        # server.py owns the task catalog and the configured database connection
+        import server
+        try:
+            report = await run_batch(server.db, server.DEFAULT_TASKS, args.start or datetime.utcnow().date(),
+                                     args.days, args.workers, args.scope_chunk, args.write_chunk)
+        finally:
+            server.mongo.close()
+        logger.info(f"Generated {report['days']} days for {report['households']} households in "
+                    f"{report['seconds']}s ({report['householdsPerSecond']} households/sec): {report}")
+
+    asyncio.run(main())
@@ -0,0 +1,305 @@
+"""
+Batch scoring and replay of task completions.
+
+When GAME_CONSTANTS or a talent node changes, historical completions have
+to be scored again. Calling calculate_enhanced_task_points for each one is
+too slow for that. score_batch scores a columnar CompletionBatch instead.
+Rows are grouped by (build, category, room, difficulty), each group's
+effects come from the build compiled by TalentScorer, and the bonuses,
+multipliers and early-bird points are applied as numpy operations across
+the group. The totals equal TalentScorer.score row for row.
+
+replay() streams a time range of task_completions in timestamp order and
+scores them in chunks. It writes `scoredPoints` and `scoringVersion` back
+with unordered bulk_writes, only to completions whose score changed. A
+completion's streak is the number of completions by the same player
+earlier that (UTC) day, and it is their first task when there are none.
+Completions are scored against the player's current talent build, since
+older builds are not stored. Completions whose difficulty is not in the
+points table are skipped and reported as unscorable.
+
+Each player's total is then corrected by the difference between the new
+scores and the `scoredPoints` an earlier replay wrote. The corrections go
+through points_ledger.award_many as "rescore" events, so the ledger and
+leaderboards follow. A completion's first replay only records its score
+as the baseline: live completions award the task's basePoints, not the
+scorer's total, so there is nothing earlier to correct against.
+
+    cd backend && python -m batch_scoring --month 2025-03 [--dry-run]
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from pymongo import UpdateOne
+
+import points_ledger
+from repository import fetch_many
+from talent_codec import build_node_ids
+from talent_effects import EARLY_BIRD_HOUR, TalentScorer
+
+logger = logging.getLogger(__name__)
+
+SCORING_FIELDS = ("difficulty", "category", "room")
+
+
+def scoring_version(nodes: Dict[str, Dict], points: Dict[str, int]) -> str:
+    """Digest of the talent nodes and point values that scores depend on"""
+    canonical = json.dumps([nodes, points], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+class CompletionBatch:
+    """Completions as columns: one array per scoring input
+
+    Difficulty, category and room hold codes into `values`, and `build`
+    holds codes into `builds` (each build's node ids, in order).
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        codes: Dict[Any, int] = {}
+        build_codes: Dict[Tuple[str, ...], int] = {}
+        self.values: List[Any] = []
+        self.builds: List[Tuple[str, ...]] = []
+        self.completion_ids: List[Optional[str]] = []
+        columns = {name: [] for name in ("difficulty", "category", "room", "hour", "streak", "first", "joint", "build")}
+
+        def code(value):
+            if value not in codes:
+                codes[value] = len(self.values)
+                self.values.append(value)
+            return codes[value]
+
+        for row in rows:
+            node_ids = tuple(row.get("nodeIds") or ())
+            if node_ids not in build_codes:
+                build_codes[node_ids] = len(self.builds)
+                self.builds.append(node_ids)
+            self.completion_ids.append(row.get("completionId"))
+            columns["difficulty"].append(code(row.get("difficulty", "EASY")))
+            columns["category"].append(code(row.get("category")))
+            columns["room"].append(code(row.get("room")))
+            columns["hour"].append(row["hour"])
+            columns["streak"].append(row.get("streak", 0))
+            columns["first"].append(row.get("first", False))
+            columns["joint"].append(row.get("joint", False))
+            columns["build"].append(build_codes[node_ids])
+
+        self.difficulty = np.array(columns["difficulty"], dtype=np.int32)
+        self.category = np.array(columns["category"], dtype=np.int32)
+        self.room = np.array(columns["room"], dtype=np.int32)
+        self.hour = np.array(columns["hour"], dtype=np.int8)
+        self.streak = np.array(columns["streak"], dtype=np.int32)
+        self.first = np.array(columns["first"], dtype=bool)
+        self.joint = np.array(columns["joint"], dtype=bool)
+        self.build = np.array(columns["build"], dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.build)
+
+
+def score_batch(batch: CompletionBatch, scorer: TalentScorer) -> np.ndarray:
+    """total_points for every completion in the batch, as TalentScorer.score computes them"""
+    if not len(batch):
+        return np.zeros(0, dtype=np.int64)
+    compiled = [scorer.compile({"nodeIds": list(node_ids)}) for node_ids in batch.builds]
+    points = np.array([scorer.points.get(value, 0) for value in batch.values], dtype=np.float64)
+    unknown = {batch.values[code] for code in np.unique(batch.difficulty) if batch.values[code] not in scorer.points}
+    if unknown:
+        raise KeyError(f"Unknown difficulties: {sorted(map(str, unknown))}")
+
+    base = points[batch.difficulty]
+    bonuses = np.zeros(len(batch), dtype=np.float64)
+    multipliers = np.ones(len(batch), dtype=np.float64)
+
+    keys = np.stack([batch.build, batch.category, batch.room, batch.difficulty], axis=1)
+    groups, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.searchsorted(inverse[order], np.arange(len(groups) + 1))
+    for group, (build, category, room, difficulty) in enumerate(groups):
+        group_bonuses, group_multipliers = compiled[build].effects_for(
+            (batch.values[category], batch.values[room], batch.values[difficulty]))
+        if not group_bonuses and not group_multipliers:
+            continue
+        rows = order[bounds[group]:bounds[group + 1]]
+        for effect in group_bonuses:
+            if effect.type == "first_task_bonus":
+                applies = batch.first[rows]
+            elif effect.type == "streak_bonus":
+                applies = batch.streak[rows] >= effect.streak_count
+            else:
+                applies = np.ones(len(rows), dtype=bool)
+            bonuses[rows] += np.where(applies, effect.amount, 0)
+        for effect in group_multipliers:
+            applies = batch.joint[rows] if effect.type == "joint_task_multiplier" else np.ones(len(rows), dtype=bool)
+            multipliers[rows] = np.where(applies, multipliers[rows] * effect.amount, multipliers[rows])
+
+    early_bird = np.array([build.early_bird for build in compiled], dtype=bool)[batch.build]
+    early_bird &= batch.hour < EARLY_BIRD_HOUR
+    early_bird_bonus = np.where(early_bird, np.trunc((base + bonuses) * 0.1), 0.0)
+    return np.trunc((base + bonuses) * multipliers + early_bird_bonus).astype(np.int64)
+
+
+async def _fill_task_fields(db, docs: List[dict], catalog: Dict[str, dict]) -> None:
+    """Copy difficulty, category and room from the task onto completions recorded without them"""
+    missing = [doc for doc in docs if "difficulty" not in doc]
+    if not missing:
+        return
+    tasks = {}
+    household_ids = list({doc.get("householdId") for doc in missing if doc.get("householdId")})
+    if household_ids:
+        query = {"householdId": {"$in": household_ids}, "taskId": {"$in": list({doc["taskId"] for doc in missing})}}
+        async for task in fetch_many(db.tasks, query, "task_scoring"):
+            tasks[(task["householdId"], task["taskId"])] = task
+    for doc in missing:
+        task = tasks.get((doc.get("householdId"), doc["taskId"])) or catalog.get(doc["taskId"])
+        if task:
+            for field in SCORING_FIELDS:
+                if field in task:
+                    doc[field] = getattr(task[field], "value", task[field])
+
+
+async def _score_chunk(db, docs: List[dict], scorer: TalentScorer, version: str, catalog: Dict[str, dict],
+                       builds: Dict[str, Tuple[str, ...]], streaks: Dict[str, Tuple[str, int]],
+                       write_chunk: int, dry_run: bool, report: Dict[str, Any]) -> None:
+    await _fill_task_fields(db, docs, catalog)
+    unknown_users = list({doc["userId"] for doc in docs} - builds.keys())
+    for user_id in unknown_users:
+        builds[user_id] = ()
+    if unknown_users:
+        async for user in fetch_many(db.users, {"userId": {"$in": unknown_users}}, "user_talents"):
+            builds[user["userId"]] = tuple(build_node_ids(user.get("talentBuild")))
+
+    rows = []
+    for doc in docs:
+        completed_at = datetime.fromisoformat(doc["timestamp"])
+        day = completed_at.date().isoformat()
+        last_day, count = streaks.get(doc["userId"], (None, 0))
+        streak = count if last_day == day else 0
+        streaks[doc["userId"]] = (day, streak + 1)
+        if "difficulty" not in doc:
+            report["unscorable"] += 1
+            continue
+        if doc["difficulty"] not in scorer.points:
+            report["unscorable"] += 1
+            if doc["difficulty"] not in report["unknownDifficulties"]:
+                report["unknownDifficulties"].append(doc["difficulty"])
+            continue
+        rows.append({
+            "completionId": doc["completionId"],
+            "userId": doc["userId"],
+            "difficulty": doc["difficulty"],
+            "category": doc.get("category"),
+            "room": doc.get("room"),
+            "hour": completed_at.hour,
+            "streak": streak,
+            "first": streak == 0,
+            "nodeIds": builds[doc["userId"]],
+            "previous": (doc.get("scoredPoints"), doc.get("scoringVersion")),
+        })
+    batch = CompletionBatch(rows)
+    totals = score_batch(batch, scorer)
+    report["scored"] += len(rows)
+
+    operations = []
+    corrections: Dict[str, int] = {}
+    for row, total in zip(rows, totals.tolist()):
+        previous_points, _ = row["previous"]
+        if previous_points is not None and total != previous_points:
+            report["pointsDelta"] += total - previous_points
+            corrections[row["userId"]] = corrections.get(row["userId"], 0) + total - previous_points
+        if row["previous"] != (total, version):
+            operations.append(UpdateOne({"completionId": row["completionId"]},
+                                        {"$set": {"scoredPoints": total, "scoringVersion": version}}))
+    report["changed"] += len(operations)
+    if dry_run:
+        return
+    for start in range(0, len(operations), write_chunk):
+        result = await db.task_completions.bulk_write(operations[start:start + write_chunk], ordered=False)
+        report["updated"] += result.modified_count
+    # After the completions: a failure in between loses this chunk's corrections, where the other order
+    # would apply them twice when the month is replayed again
+    corrected = await points_ledger.award_many(db, corrections, "rescore", version, concurrency=write_chunk)
+    report["usersCorrected"] += len(corrected)
+
+
+async def replay(db, scorer: TalentScorer, version: str, start: datetime, end: datetime,
+                 catalog: Optional[List[dict]] = None, chunk: int = 10_000, write_chunk: int = 1000,
+                 dry_run: bool = False) -> Dict[str, Any]:
+    """Rescore completions with start <= timestamp < end; returns a throughput report
+
+    `catalog` supplies difficulty, category and room for completions whose
+    task document is gone (e.g. couple quests from DEFAULT_TASKS).
+    """
+    catalog_by_id = {task["taskId"]: task for task in catalog or []}
+    report = {"completions": 0, "scored": 0, "unscorable": 0, "unknownDifficulties": [], "changed": 0,
+              "updated": 0, "pointsDelta": 0, "usersCorrected": 0, "scoringVersion": version, "dryRun": dry_run}
+    builds: Dict[str, Tuple[str, ...]] = {}
+    streaks: Dict[str, Tuple[str, int]] = {}
+    started = time.perf_counter()
+
+    query = {"timestamp": {"$gte": start.isoformat(), "$lt": end.isoformat()}}
+    docs = []
+    async for doc in fetch_many(db.task_completions, query, "completion_scoring",
+                                sort=[("timestamp", 1), ("completionId", 1)], batch_size=chunk):
+        docs.append(doc)
+        if len(docs) == chunk:
+            report["completions"] += len(docs)
+            await _score_chunk(db, docs, scorer, version, catalog_by_id, builds, streaks, write_chunk, dry_run, report)
+            docs = []
+    if docs:
+        report["completions"] += len(docs)
+        await _score_chunk(db, docs, scorer, version, catalog_by_id, builds, streaks, write_chunk, dry_run, report)
+
+    if report["unknownDifficulties"]:
+        logger.warning(f"Skipped completions with difficulties missing from the points table: "
+                       f"{report['unknownDifficulties']}")
+    seconds = time.perf_counter() - started
+    report["seconds"] = round(seconds, 3)
+    report["completionsPerSecond"] = round(report["completions"] / seconds, 1) if seconds else 0.0
+    return report
+
+
+def month_range(month: str) -> Tuple[datetime, datetime]:
+    """[first instant of YYYY-MM, first instant of the next month) in UTC"""
+    start = datetime.strptime(month, "%Y-%m").replace(tzinfo=timezone.utc)
+    end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start, end
+
+
+if __name__ == "__main__":
+    import argparse
+    from pathlib import Path
+
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Rescore task completions with the current points and talents")
+    parser.add_argument("--month", required=True, help="month to replay, as YYYY-MM (UTC)")
+    parser.add_argument("--chunk", type=int, default=10_000, help="completions scored per batch")
+    parser.add_argument("--write-chunk", type=int, default=1000, help="operations per bulk_write")
+    parser.add_argument("--dry-run", action="store_true", help="score and report without writing")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        # server.py owns the points table, talent tree and the configured database connection
+        import server
+        version = scoring_version(server.TALENT_TREE_NODES, server.GAME_CONSTANTS["POINTS"])
+        try:
+            report = await replay(server.db, server.talent_scorer, version, *month_range(args.month),
+                                  catalog=server.DEFAULT_TASKS, chunk=args.chunk, write_chunk=args.write_chunk,
+                                  dry_run=args.dry_run)
+        finally:
+            server.mongo.close()
+        logger.info(f"Replayed {report['completions']} completions for {args.month} in {report['seconds']}s "
+                    f"({report['completionsPerSecond']} completions/sec): {report}")
+
+    asyncio.run(main())
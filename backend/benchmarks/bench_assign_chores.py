@@ -0,0 +1,79 @@
+"""
+Benchmark: assign-chores write latency vs chore count.
+
+Compares the old one-update_one-per-chore loop with the single unordered
+bulk_write used by auto_assign_chores. Runs against MONGO_URL in a scratch
+database that is dropped afterwards.
+
+    cd backend && python -m benchmarks.bench_assign_chores
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from server import generate_household_chores
+from task_assignments import write_task_assignments
+
+BATHROOM_COUNTS = [1, 3, 6, 10, 20, 40]
+REPEATS = 5
+
+
+def make_task_docs(household_id: str, bathrooms: int) -> list:
+    """A generous profile (pets, yard, snow) scaled up by bathroom count"""
+    chores = generate_household_chores({
+        "householdType": "House",
+        "householdSize": 4,
+        "appliances": ["Washer", "Dryer", "Dishwasher"],
+        "hasPets": True,
+        "petTypes": ["Dogs", "Cats", "Other small pets"],
+        "bathrooms": bathrooms,
+        "hasYard": True,
+        "environmentalConditions": ["High dust", "Snowfall"],
+    })
+    today = datetime.utcnow().strftime('%Y-%m-%d')
+    return [
+        dict(chore, assignedTo=f"user_{i % 4}", date=today, householdId=household_id,
+             completed=False, verified=False)
+        for i, chore in enumerate(chores)
+    ]
+
+
+async def sequential_upserts(collection, household_id: str, task_docs: list):
+    for task in task_docs:
+        await collection.update_one(
+            {"taskId": task["taskId"], "householdId": household_id},
+            {"$set": task},
+            upsert=True
+        )
+
+
+async def timed(fn, *args) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def main():
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client["bench_assign_chores"]
+    try:
+        print(f"{'chores':>7} {'update_one (ms)':>16} {'bulk_write (ms)':>16} {'speedup':>8}")
+        for bathrooms in BATHROOM_COUNTS:
+            household_id = f"bench_{bathrooms}"
+            task_docs = make_task_docs(household_id, bathrooms)
+            loop_ms = await timed(sequential_upserts, db.tasks, household_id, task_docs)
+            bulk_ms = await timed(write_task_assignments, db.tasks, household_id, task_docs)
+            print(f"{len(task_docs):>7} {loop_ms:>16.1f} {bulk_ms:>16.1f} {loop_ms / bulk_ms:>7.1f}x")
+    finally:
+        await client.drop_database("bench_assign_chores")
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
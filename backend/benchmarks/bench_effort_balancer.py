@@ -0,0 +1,98 @@
+"""
+Benchmark: chore assignment strategies on dorm-sized catalogs.
+
+Compares the original fewest-tasks loop (`min(member_task_counts, ...)` per
+chore, reproduced as `legacy_count_balance`), the odds-matrix draw and the
+heap-based effort balancer. It reports time and how evenly effort
+(basePoints) is spread. Catalogs are synthetic Shared Housing / Dorm chores
+from generate_household_chores, repeated up to 10,000 chores, and are split
+across 200 members.
+
+    cd backend && python -m benchmarks.bench_effort_balancer
+"""
+import random
+import time
+
+import numpy as np
+
+import odds_engine
+from effort_balancer import balance_effort, task_effort
+from server import HouseholdType, generate_household_chores
+
+SIZES = [(500, 20), (2_000, 50), (10_000, 200)]
+REPEATS = 5
+
+
+def legacy_count_balance(tasks: list, member_ids: list) -> dict:
+    """auto_assign_chores before the odds engine: each chore to whoever has the fewest chores"""
+    assignments = {}
+    member_task_counts = {member_id: 0 for member_id in member_ids}
+    for task in tasks:
+        assigned_member = min(member_task_counts, key=member_task_counts.get)
+        member_task_counts[assigned_member] += 1
+        assignments[task["taskId"]] = assigned_member
+    return assignments
+
+
+def odds_draw(tasks: list, member_ids: list) -> dict:
+    return odds_engine.assign_members(odds_engine.TaskArrays(tasks), member_ids, [{}] * len(member_ids),
+                                      np.random.default_rng(1), np.random.default_rng(2))
+
+
+def effort_heap(tasks: list, member_ids: list) -> dict:
+    return balance_effort(tasks, member_ids, rng=np.random.default_rng(3))[0]
+
+
+def dorm_catalog(count: int) -> list:
+    """Dorm chores with shuffled difficulties, so effort varies from chore to chore"""
+    chores = generate_household_chores({
+        "householdType": HouseholdType.SHARED.value,
+        "householdSize": 8,
+        "appliances": ["Washer", "Dryer", "Dishwasher"],
+        "bathrooms": 4,
+        "hasPets": False,
+    })
+    shuffle = random.Random(7)
+    catalog = []
+    for i in range(count):
+        difficulty = shuffle.choice(["EASY", "MEDIUM", "HARD"])
+        chore = chores[i % len(chores)]
+        catalog.append(dict(chore, taskId=f"{chore['taskId']}_{i}", difficulty=difficulty,
+                            basePoints={"EASY": 5, "MEDIUM": 10, "HARD": 15}[difficulty]))
+    return catalog
+
+
+def spread(tasks: list, assignments: dict, member_ids: list) -> tuple:
+    """(max - min effort across members, most HARD chores any member got)"""
+    effort = {member_id: 0.0 for member_id in member_ids}
+    hard = {member_id: 0 for member_id in member_ids}
+    for task in tasks:
+        member_id = assignments[task["taskId"]]
+        effort[member_id] += task_effort(task)
+        hard[member_id] += task["difficulty"] == "HARD"
+    return max(effort.values()) - min(effort.values()), max(hard.values())
+
+
+def best_ms(fn, *args) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    print(f"{'chores':>7} {'members':>8} {'strategy':>15} {'time (ms)':>10} {'effort spread':>14} {'max HARD':>9}")
+    for count, members in SIZES:
+        tasks = dorm_catalog(count)
+        member_ids = [f"user_{i}" for i in range(members)]
+        for name, fn in [("fewest-tasks", legacy_count_balance), ("odds draw", odds_draw),
+                         ("effort heap", effort_heap)]:
+            ms = best_ms(fn, tasks, member_ids)
+            effort_gap, max_hard = spread(tasks, fn(tasks, member_ids), member_ids)
+            print(f"{count:>7} {members:>8} {name:>15} {ms:>10.2f} {effort_gap:>14.0f} {max_hard:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Standing benchmark: speed and fairness of the two-player odds pipeline.
+
+Simulates one million household-days per talent scenario on DEFAULT_TASKS
+with fairness_sim. It prints throughput, each player's load, room skew and
+talent advantage (the change in player 1's effort share against players
+without talents). Exits non-zero when a limit below is broken, so an odds
+change that is slower or less fair shows up here.
+
+    cd backend && python -m benchmarks.bench_fairness [--days 1000000]
+"""
+import argparse
+import sys
+
+from fairness_sim import talent_advantage
+from server import DEFAULT_TASKS
+
+SCENARIOS = {
+    "kitchen": ({"kitchen_specialist": True}, {}),
+    "easy avoider": ({"easy_task_avoider": True}, {}),
+    "trash+laundry": ({"trash_master": True, "laundry_hand": True}, {}),
+    "stacked": ({"kitchen_specialist": True, "hard_task_seeker": True, "laundry_hand": True},
+                {"easy_task_avoider": True}),
+}
+
+# Without talents the split must be even; with them, room caps must hold and no build may move more than this
+LIMITS = {
+    "baselineShareError": 0.005,
+    "maxRoomSkew": 0.22,
+    "maxTalentAdvantage": 0.15,
+    "minHouseholdDaysPerSecond": 200_000,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    results = talent_advantage(DEFAULT_TASKS, SCENARIOS, days=args.days)
+    print(f"{'scenario':>14} {'days/s':>10} {'user1 tasks':>12} {'user1 share':>12} "
+          f"{'p5-p95':>12} {'room skew':>10} {'over cap':>9} {'advantage':>10}")
+    for name, report in results.items():
+        share = report["user1EffortShare"]
+        print(f"{name:>14} {report['householdDaysPerSecond']:>10,.0f} {report['members']['user1']['meanTasks']:>12.2f} "
+              f"{share['mean']:>12.4f} {share['p5']:>5.3f}-{share['p95']:<6.3f} {report['maxRoomSkew']:>10.4f} "
+              f"{report['roomDaysOverCap']:>9.3f} {report['talentAdvantage']:>+10.4f}")
+
+    failures = []
+    baseline_error = abs(results["none"]["user1EffortShare"]["mean"] - 0.5)
+    if baseline_error > LIMITS["baselineShareError"]:
+        failures.append(f"no-talent split is off by {baseline_error:.4f}")
+    for name, report in results.items():
+        if report["maxRoomSkew"] > LIMITS["maxRoomSkew"]:
+            failures.append(f"{name}: room skew {report['maxRoomSkew']:.4f}")
+        if abs(report["talentAdvantage"]) > LIMITS["maxTalentAdvantage"]:
+            failures.append(f"{name}: talent advantage {report['talentAdvantage']:+.4f}")
+        if report["householdDaysPerSecond"] < LIMITS["minHouseholdDaysPerSecond"]:
+            failures.append(f"{name}: {report['householdDaysPerSecond']:,.0f} household-days/s")
+    for failure in failures:
+        print(f"LIMIT BROKEN: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: /households/{id}/stats, old per-member lookups vs one aggregation.
+
+Seeds a scratch database with households of 1, 4 and 12 members and 10, 100
+and 1000 tasks for today, then times the previous read path (household
+find_one, one users find_one per member, all of today's tasks into Python)
+against household_stats.fetch_household_stats.
+
+    cd backend && python -m benchmarks.bench_household_stats
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from db_indexes import ensure_indexes
+from household_stats import fetch_household_stats
+
+MEMBER_COUNTS = [1, 4, 12]
+TASK_COUNTS = [10, 100, 1000]
+REPEATS = 20
+
+
+async def seed(db, household_id: str, members: int, tasks: int, today: str):
+    member_ids = [f"{household_id}_user_{i}" for i in range(members)]
+    await db.households.insert_one({
+        "householdId": household_id,
+        "inviteCode": household_id.upper(),
+        "creatorName": "Bench",
+        "memberIds": member_ids,
+        "memberLimit": 12,
+        "customizedChores": [{"taskId": f"task_{i}", "title": "Chore"} for i in range(tasks)],
+    })
+    await db.users.insert_many([
+        {"userId": member_id, "displayName": f"Hero {i}", "householdId": household_id,
+         "role": "member", "level": 1, "points": i * 10}
+        for i, member_id in enumerate(member_ids)
+    ])
+    await db.tasks.insert_many([
+        {"taskId": f"task_{i}", "householdId": household_id, "date": today, "title": "Chore",
+         "assignedTo": member_ids[i % members], "completed": i % 3 == 0}
+        for i in range(tasks)
+    ])
+
+
+async def old_stats(db, household_id: str, today: str) -> dict:
+    """The read path get_household_stats used before the aggregation"""
+    household = await db.households.find_one({"householdId": household_id})
+    members = []
+    for member_id in household.get("memberIds", []):
+        user = await db.users.find_one({"userId": member_id})
+        if user:
+            members.append({"userId": user["userId"], "displayName": user["displayName"]})
+    tasks_today = await db.tasks.find({"householdId": household_id, "date": today}).to_list(1000)
+    completed = sum(1 for task in tasks_today if task.get("completed", False))
+    per_member = {}
+    for task in tasks_today:
+        if task.get("assignedTo"):
+            per_member[task["assignedTo"]] = per_member.get(task["assignedTo"], 0) + 1
+    return {"members": members, "total": len(tasks_today), "completed": completed, "perMember": per_member}
+
+
+async def timed(fn, *args) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def main():
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client["bench_household_stats"]
+    today = datetime.utcnow().strftime('%Y-%m-%d')
+    try:
+        await ensure_indexes(db)
+        print(f"{'members':>8} {'tasks':>6} {'old (ms)':>10} {'aggregation (ms)':>17} {'speedup':>8}")
+        for members in MEMBER_COUNTS:
+            for tasks in TASK_COUNTS:
+                household_id = f"bench_{members}_{tasks}"
+                await seed(db, household_id, members, tasks, today)
+                old_ms = await timed(old_stats, db, household_id, today)
+                new_ms = await timed(fetch_household_stats, db, household_id, today)
+                print(f"{members:>8} {tasks:>6} {old_ms:>10.2f} {new_ms:>17.2f} {old_ms / new_ms:>7.1f}x")
+    finally:
+        await client.drop_database("bench_household_stats")
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
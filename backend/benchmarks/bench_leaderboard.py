@@ -0,0 +1,100 @@
+"""
+Benchmark: the incremental global leaderboard with a million players.
+
+Builds a RankIndex from one million players whose points follow a
+long-tailed distribution. It then applies award-sized updates and a
+thousand absurdly large totals, looks up ranks and reads the top N.
+Before this, answering those meant sorting every player by points (top
+N) or counting every player with more points (a rank). That baseline is
+timed on a sample for comparison. Every 1000th rank and each top N is
+checked against the baseline.
+
+    cd backend && python -m benchmarks.bench_leaderboard [--users 1000000] [--ops 100000]
+"""
+import argparse
+import heapq
+import random
+import time
+
+from leaderboard import HouseholdBoard, RankIndex
+
+TOP_N = 10
+HOUSEHOLD_SIZE = 4
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def report(label: str, count: int, seconds: float):
+    print(f"{label:>28} {count:>10,} {seconds:>9.3f} {seconds / count * 1e6:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--ops", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(25)
+    user_ids = [f"user_{i:07d}" for i in range(args.users)]
+    points = {user_id: int(rng.lognormvariate(6, 1.2)) for user_id in user_ids}
+    print(f"{args.users:,} players, max points {max(points.values()):,}")
+    print(f"{'operation':>28} {'count':>10} {'total (s)':>9} {'per op (us)':>12}")
+
+    index, seconds = timed(lambda: RankIndex(points))
+    report("bulk load", args.users, seconds)
+
+    updates = [(rng.choice(user_ids), rng.choice((5, 10, 15, 20, 25))) for _ in range(args.ops)]
+
+    def apply_updates():
+        for user_id, delta in updates:
+            points[user_id] += delta
+            index.set(user_id, points[user_id])
+    _, seconds = timed(apply_updates)
+    report("award (move player)", args.ops, seconds)
+
+    outliers = [(rng.choice(user_ids), 10 ** rng.randrange(9, 19)) for _ in range(1000)]
+
+    def apply_outliers():
+        for user_id, total in outliers:
+            points[user_id] = total
+            index.set(user_id, total)
+    _, seconds = timed(apply_outliers)
+    report("award (10^9+ totals)", len(outliers), seconds)
+
+    lookups = [rng.choice(user_ids) for _ in range(args.ops)]
+    ranks, seconds = timed(lambda: [index.rank(user_id) for user_id in lookups])
+    report("rank lookup", args.ops, seconds)
+
+    top, seconds = timed(lambda: [index.top(TOP_N) for _ in range(args.ops // 10)])
+    report(f"top {TOP_N}", args.ops // 10, seconds)
+
+    boards = {}
+    for i, user_id in enumerate(user_ids[:args.ops]):
+        boards.setdefault(i // HOUSEHOLD_SIZE, []).append((user_id, points[user_id]))
+    _, seconds = timed(lambda: [HouseholdBoard(players).top(TOP_N) for players in boards.values()])
+    report(f"household board ({HOUSEHOLD_SIZE} players)", len(boards), seconds)
+
+    values = list(points.values())
+    sample = lookups[:100]
+    baseline_ranks, seconds = timed(lambda: [1 + sum(v > points[user_id] for v in values) for user_id in sample])
+    report("baseline rank (count all)", len(sample), seconds)
+    per_rank_baseline = seconds / len(sample)
+    baseline_top, seconds = timed(lambda: [sorted(points.items(), key=lambda item: (-item[1], item[0]))[:TOP_N]
+                                           for _ in range(3)])
+    report(f"baseline top {TOP_N} (sort all)", 3, seconds)
+
+    assert ranks[:100] == baseline_ranks
+    assert [(user_id, value) for user_id, value, _ in top[-1]] == baseline_top[-1]
+    for user_id in lookups[::1000]:
+        assert index.rank(user_id) == 1 + sum(v > points[user_id] for v in values)
+    assert heapq.nlargest(TOP_N, values) == [value for _, value, _ in top[-1]]
+    _, seconds = timed(lambda: [index.rank(user_id) for user_id in sample])
+    print(f"rank lookup is {per_rank_baseline / (seconds / len(sample)):,.0f}x faster than counting every player")
+
+
+if __name__ == "__main__":
+    main()
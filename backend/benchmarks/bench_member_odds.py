@@ -0,0 +1,53 @@
+"""
+Benchmark: N-member odds matrix and assignment draw per household.
+
+Times odds_engine.assign_members (compile the catalog, build the tasks x
+members odds matrix, draw every task) for 2-12 members on generated chore
+lists of a small and a very large household. This runs inline on every
+assign-chores call, so it should stay well under a millisecond.
+
+    cd backend && python -m benchmarks.bench_member_odds
+"""
+import time
+
+import odds_engine
+import rng
+from server import generate_household_chores
+
+MEMBER_COUNTS = [2, 4, 8, 12]
+REPEATS = 200
+TALENTS = [{"kitchen_specialist": True}, {"laundry_hand": True, "hard_task_seeker": True}, {"trash_master": True}]
+
+
+def chores(bathrooms: int) -> list:
+    return generate_household_chores({
+        "householdType": "House",
+        "appliances": ["Washer", "Dryer", "Dishwasher"],
+        "hasPets": True,
+        "petTypes": ["Dogs", "Cats"],
+        "bathrooms": bathrooms,
+        "hasYard": True,
+        "environmentalConditions": ["High dust", "Snowfall"],
+    })
+
+
+def main():
+    print(f"{'tasks':>6} {'members':>8} {'per household (ms)':>19}")
+    for tasks in (chores(1), chores(40)):
+        for members in MEMBER_COUNTS:
+            member_ids = [f"user_{i}" for i in range(members)]
+            talents = [TALENTS[i % len(TALENTS)] for i in range(members)]
+            best = float("inf")
+            for _ in range(REPEATS):
+                start = time.perf_counter()
+                odds_engine.assign_members(
+                    odds_engine.TaskArrays(tasks), member_ids, talents,
+                    rng.numpy_stream("household_1", "2025-01-01", rng.CHORE_BONUS),
+                    rng.numpy_stream("household_1", "2025-01-01", rng.CHORE_ASSIGNMENT)
+                )
+                best = min(best, time.perf_counter() - start)
+            print(f"{len(tasks):>6} {members:>8} {best * 1000:>19.3f}")
+
+
+if __name__ == "__main__":
+    main()
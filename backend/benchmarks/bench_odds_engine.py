@@ -0,0 +1,105 @@
+"""
+Benchmark: daily odds, dict-per-task implementation vs the NumPy engine.
+
+Times the previous compute_daily_odds pipeline (reproduced below as
+`legacy_odds`) against odds_engine at the 27 DEFAULT_TASKS and at 5,000
+synthetic tasks, and checks that both give identical odds.
+
+    cd backend && python -m benchmarks.bench_odds_engine
+"""
+import random
+import time
+
+import odds_engine
+from server import DEFAULT_TASKS
+
+TALENTS = ({"kitchen_specialist": True, "hard_task_seeker": True, "laundry_hand": True},
+           {"easy_task_avoider": True})
+REPEATS = 50
+
+
+def legacy_odds(tasks: list, date: str, user1_talents: dict, user2_talents: dict) -> dict:
+    """compute_daily_odds as it was before odds_engine (player 2's shift was never applied)"""
+    odds = {task["taskId"]: {"user1": 0.5, "user2": 0.5} for task in tasks}
+    if user1_talents or user2_talents:
+        for task in tasks:
+            title = task["title"].lower()
+            modifier = 0
+            if user1_talents.get("kitchen_specialist") and task["room"] == "Kitchen":
+                modifier += 0.15
+            if user1_talents.get("easy_task_avoider") and task["difficulty"] == "EASY":
+                modifier -= 0.10
+            elif user1_talents.get("hard_task_seeker") and task["difficulty"] == "HARD":
+                modifier += 0.10
+            if user1_talents.get("trash_master") and "trash" in title:
+                modifier -= 0.20
+            elif user1_talents.get("laundry_hand") and "laundry" in title:
+                modifier += 0.15
+            user1 = max(0.1, min(0.9, 0.5 + modifier))
+            odds[task["taskId"]] = {"user1": user1, "user2": 1.0 - user1}
+
+    rooms = {}
+    for task in tasks:
+        rooms.setdefault(task["room"], []).append(task["taskId"])
+    for task_ids in rooms.values():
+        if len(task_ids) < 2:
+            continue
+        user1_total = sum(odds[task_id]["user1"] for task_id in task_ids)
+        user2_total = sum(odds[task_id]["user2"] for task_id in task_ids)
+        max_allowed = len(task_ids) * 0.7
+        if user1_total > max_allowed:
+            reduction = (user1_total - max_allowed) / len(task_ids)
+            for task_id in task_ids:
+                odds[task_id]["user1"] = max(0.1, odds[task_id]["user1"] - reduction)
+                odds[task_id]["user2"] = 1.0 - odds[task_id]["user1"]
+        elif user2_total > max_allowed:
+            reduction = (user2_total - max_allowed) / len(task_ids)
+            for task_id in task_ids:
+                odds[task_id]["user2"] = max(0.1, odds[task_id]["user2"] - reduction)
+                odds[task_id]["user1"] = 1.0 - odds[task_id]["user2"]
+
+    rng = random.Random(date)
+    for task_odds in odds.values():
+        if rng.random() < 0.2:
+            bonus = rng.uniform(0.01, 0.03)
+            if rng.random() < 0.5:
+                task_odds["user1"] = min(0.9, task_odds["user1"] + bonus)
+                task_odds["user2"] = 1.0 - task_odds["user1"]
+            else:
+                task_odds["user2"] = min(0.9, task_odds["user2"] + bonus)
+                task_odds["user1"] = 1.0 - task_odds["user2"]
+    return odds
+
+
+def synthetic_tasks(count: int) -> list:
+    """DEFAULT_TASKS repeated across numbered rooms with unique task ids"""
+    return [
+        dict(task, taskId=f"{task['taskId']}_{i}", room=f"{task['room']} {i % 200}")
+        for i in range(count // len(DEFAULT_TASKS) + 1)
+        for task in DEFAULT_TASKS
+    ][:count]
+
+
+def best_ms(fn, *args) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    date = "2025-01-01"
+    print(f"{'tasks':>6} {'legacy (ms)':>12} {'engine (ms)':>12} {'engine, cached arrays (ms)':>27} {'speedup':>8}")
+    for tasks in (DEFAULT_TASKS, synthetic_tasks(5000)):
+        arrays = odds_engine.TaskArrays(tasks)
+        assert odds_engine.compute_daily_odds(arrays, "couple_1", date, *TALENTS) == legacy_odds(tasks, date, *TALENTS)
+        legacy_ms = best_ms(legacy_odds, tasks, date, *TALENTS)
+        cold_ms = best_ms(lambda: odds_engine.compute_daily_odds(odds_engine.TaskArrays(tasks), "couple_1", date, *TALENTS))
+        warm_ms = best_ms(odds_engine.compute_daily_odds, arrays, "couple_1", date, *TALENTS)
+        print(f"{len(tasks):>6} {legacy_ms:>12.3f} {cold_ms:>12.3f} {warm_ms:>27.3f} {legacy_ms / warm_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark: task scoring with compiled talent builds.
+
+Compares the original calculate_enhanced_task_points, reproduced below as
+`legacy_task_points`, with TalentScorer for builds of 1 to 30 nodes from
+TALENT_TREE_NODES. Each build scores DEFAULT_TASKS, tagged with the
+categories the talents target, at two times of day and with different
+first-task and streak flags. Results must match the legacy function
+exactly. The cold column includes compiling the build; warm reuses it.
+
+    cd backend && python -m benchmarks.bench_talent_effects
+"""
+import random
+import time
+from datetime import datetime
+
+from server import DEFAULT_TASKS, GAME_CONSTANTS, TALENT_TREE_NODES
+from talent_effects import TalentScorer
+
+BUILD_SIZES = [1, 5, 10, 20, 30]
+REPEATS = 5
+CATEGORIES = [None, "laundry", "dishwashing", "shared_activities", "positive_notes", "cleaning"]
+
+
+def applies_to_task(effect, task):
+    if effect.get("category") and task.get("category") != effect["category"]:
+        return False
+    if effect.get("room") and task.get("room") != effect["room"]:
+        return False
+    if effect.get("difficulty") and task.get("difficulty") != effect["difficulty"]:
+        return False
+    return True
+
+
+def legacy_task_points(task, user_talents, completion_time, is_first_task=False, consecutive_tasks=0):
+    """calculate_enhanced_task_points before compiled builds"""
+    result = {"base_points": 0, "talent_bonuses": 0, "talent_multipliers": 1.0, "early_bird_bonus": 0,
+              "housekeeper_edge": 0, "total_points": 0, "breakdown": []}
+    difficulty = task.get("difficulty", "EASY")
+    result["base_points"] = GAME_CONSTANTS["POINTS"][difficulty]
+    result["breakdown"].append(f"Base {difficulty}: {result['base_points']} pts")
+    if user_talents and user_talents.get("nodeIds"):
+        for node_id in user_talents["nodeIds"]:
+            if node_id not in TALENT_TREE_NODES:
+                continue
+            node = TALENT_TREE_NODES[node_id]
+            effect = node["effect"]
+            if applies_to_task(effect, task):
+                if effect["type"] == "category_bonus" and task.get("category") == effect.get("category"):
+                    bonus = effect.get("points", 0)
+                    result["talent_bonuses"] += bonus
+                    result["breakdown"].append(f"{node['name']}: +{bonus} pts")
+                elif effect["type"] == "first_task_bonus" and is_first_task:
+                    bonus = effect.get("value", 0)
+                    result["talent_bonuses"] += bonus
+                    result["breakdown"].append(f"{node['name']} (First Task): +{bonus} pts")
+                elif effect["type"] == "streak_bonus" and consecutive_tasks >= effect.get("streak_count", 0):
+                    bonus = effect.get("bonus", 0)
+                    result["talent_bonuses"] += bonus
+                    result["breakdown"].append(f"{node['name']} (Streak): +{bonus} pts")
+    if user_talents and user_talents.get("nodeIds"):
+        for node_id in user_talents["nodeIds"]:
+            if node_id not in TALENT_TREE_NODES:
+                continue
+            node = TALENT_TREE_NODES[node_id]
+            effect = node["effect"]
+            if applies_to_task(effect, task):
+                if effect["type"] == "category_multiplier" and task.get("category") == effect.get("category"):
+                    multiplier = effect.get("multiplier", 1.0)
+                    result["talent_multipliers"] *= multiplier
+                    result["breakdown"].append(f"{node['name']}: x{multiplier}")
+                elif effect["type"] == "joint_task_multiplier" and task.get("can_be_joint", False):
+                    multiplier = effect.get("multiplier", 1.0)
+                    result["talent_multipliers"] *= multiplier
+                    result["breakdown"].append(f"{node['name']} (Joint): x{multiplier}")
+    if completion_time.hour < 14:
+        early_bird_talents = [node_id for node_id in user_talents.get("nodeIds", [])
+                              if node_id in TALENT_TREE_NODES and
+                              TALENT_TREE_NODES[node_id]["effect"].get("type") == "time_bonus"]
+        if early_bird_talents:
+            result["early_bird_bonus"] = int((result["base_points"] + result["talent_bonuses"]) * 0.1)
+            result["breakdown"].append(f"Early Bird: +{result['early_bird_bonus']} pts")
+    cleaning_bonuses = [node_id for node_id in user_talents.get("nodeIds", [])
+                        if node_id in TALENT_TREE_NODES and
+                        task.get("category") == "cleaning" and
+                        "cleaning" in TALENT_TREE_NODES[node_id]["effect"].get("category", "")]
+    if cleaning_bonuses and task.get("category") == "household":
+        result["housekeeper_edge"] = 2
+        result["breakdown"].append(f"Housekeeper's Edge: +{result['housekeeper_edge']} pts")
+    base_with_bonuses = result["base_points"] + result["talent_bonuses"]
+    result["total_points"] = int(base_with_bonuses * result["talent_multipliers"]
+                                 + result["early_bird_bonus"] + result["housekeeper_edge"])
+    return result
+
+
+def scoring_calls() -> list:
+    """(task, completion time, is first task, consecutive tasks) for one player's day of completions"""
+    calls = []
+    for i, task in enumerate(DEFAULT_TASKS):
+        tagged = dict(task, difficulty=task["difficulty"].value, category=CATEGORIES[i % len(CATEGORIES)],
+                      can_be_joint=i % 3 == 0)
+        for hour in (9, 19):
+            calls.append((tagged, datetime(2025, 3, 1, hour), i == 0, i % 5))
+    return calls
+
+
+def best_ms(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    calls = scoring_calls()
+    node_ids = list(TALENT_TREE_NODES)
+    print(f"{'nodes':>6} {'calls':>6} {'legacy (ms)':>12} {'cold (ms)':>10} {'warm (ms)':>10} {'speedup':>8}")
+    for size in BUILD_SIZES:
+        build = {"nodeIds": random.Random(size).sample(node_ids, size)}
+        warm_scorer = TalentScorer(TALENT_TREE_NODES, GAME_CONSTANTS["POINTS"])
+        for task, at, first, streak in calls:
+            assert warm_scorer.score(task, build, at, first, streak) == legacy_task_points(task, build, at, first, streak)
+
+        def legacy():
+            for task, at, first, streak in calls:
+                legacy_task_points(task, build, at, first, streak)
+
+        def cold():
+            scorer = TalentScorer(TALENT_TREE_NODES, GAME_CONSTANTS["POINTS"])
+            for task, at, first, streak in calls:
+                scorer.score(task, build, at, first, streak)
+
+        def warm():
+            for task, at, first, streak in calls:
+                warm_scorer.score(task, build, at, first, streak)
+
+        legacy_ms, cold_ms, warm_ms = best_ms(legacy), best_ms(cold), best_ms(warm)
+        print(f"{size:>6} {len(calls):>6} {legacy_ms:>12.3f} {cold_ms:>10.3f} {warm_ms:>10.3f} "
+              f"{legacy_ms / warm_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+MongoDB client lifecycle for the API.
+
+`MongoSettings.from_env()` reads pool size, timeouts, wire compression and the
+read preference used for read-only endpoints. `DatabaseManager` owns the
+Motor client, hands out a primary database handle plus one routed to
+secondaries, tracks connection-pool usage through a pymongo pool listener,
+and answers health checks.
+
+Environment variables (all optional except MONGO_URL and DB_NAME):
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS,
+    MONGO_CONNECT_TIMEOUT_MS, MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS, MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_COMPRESSORS (comma separated, default "zstd,snappy,zlib"),
+    MONGO_SECONDARY_READ_PREFERENCE (default "secondaryPreferred"),
+    MONGO_MAX_STALENESS_SECONDS (default unset)
+"""
+import importlib.util
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.errors import PyMongoError
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+logger = logging.getLogger(__name__)
+
+# Compressor name -> module pymongo needs for it (zlib ships with Python)
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
+_READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def _int_env(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else None
+
+
+def available_compressors(requested: List[str]) -> List[str]:
+    """Requested compressors whose Python module is installed, in preference order"""
+    available = []
+    for name in requested:
+        if name not in _COMPRESSOR_MODULES:
+            logger.warning(f"Unknown MongoDB compressor '{name}' ignored")
+            continue
+        module = _COMPRESSOR_MODULES[name]
+        if module and importlib.util.find_spec(module) is None:
+            logger.info(f"MongoDB compressor '{name}' skipped: the '{module}' package is not installed")
+            continue
+        available.append(name)
+    return available
+
+
+def build_read_preference(mode: str, max_staleness_seconds: Optional[int] = None):
+    """pymongo read preference from its mode name (ValueError for unknown modes)"""
+    if mode not in _READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference '{mode}'")
+    if mode == "primary":
+        return Primary()
+    return _READ_PREFERENCES[mode](max_staleness=max_staleness_seconds or -1)
+
+
+@dataclass
+class MongoSettings:
+    """Connection settings; None leaves the driver default in place"""
+    url: str
+    db_name: str
+    max_pool_size: Optional[int] = None
+    min_pool_size: Optional[int] = None
+    max_idle_time_ms: Optional[int] = None
+    connect_timeout_ms: Optional[int] = None
+    server_selection_timeout_ms: Optional[int] = None
+    socket_timeout_ms: Optional[int] = None
+    wait_queue_timeout_ms: Optional[int] = None
+    compressors: List[str] = field(default_factory=lambda: ["zstd", "snappy", "zlib"])
+    secondary_read_preference: str = "secondaryPreferred"
+    max_staleness_seconds: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "MongoSettings":
+        compressors = os.environ.get("MONGO_COMPRESSORS")
+        return cls(
+            url=os.environ["MONGO_URL"],
+            db_name=os.environ["DB_NAME"],
+            max_pool_size=_int_env("MONGO_MAX_POOL_SIZE"),
+            min_pool_size=_int_env("MONGO_MIN_POOL_SIZE"),
+            max_idle_time_ms=_int_env("MONGO_MAX_IDLE_TIME_MS"),
+            connect_timeout_ms=_int_env("MONGO_CONNECT_TIMEOUT_MS"),
+            server_selection_timeout_ms=_int_env("MONGO_SERVER_SELECTION_TIMEOUT_MS"),
+            socket_timeout_ms=_int_env("MONGO_SOCKET_TIMEOUT_MS"),
+            wait_queue_timeout_ms=_int_env("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+            compressors=(
+                [name.strip() for name in compressors.split(",") if name.strip()]
+                if compressors is not None else ["zstd", "snappy", "zlib"]
+            ),
+            secondary_read_preference=os.environ.get("MONGO_SECONDARY_READ_PREFERENCE", "secondaryPreferred"),
+            max_staleness_seconds=_int_env("MONGO_MAX_STALENESS_SECONDS"),
+        )
+
+    def client_options(self) -> Dict[str, Any]:
+        """Keyword arguments for the Motor client"""
+        options = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "socketTimeoutMS": self.socket_timeout_ms,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+        }
+        options = {name: value for name, value in options.items() if value is not None}
+        compressors = available_compressors(self.compressors)
+        if compressors:
+            options["compressors"] = ",".join(compressors)
+        return options
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection-pool counters per server address, fed by pymongo's CMAP events"""
+
+    def __init__(self):
+        self.pools: Dict[str, Dict[str, int]] = {}
+
+    def _pool(self, address) -> Dict[str, int]:
+        key = f"{address[0]}:{address[1]}"
+        return self.pools.setdefault(key, {
+            "open": 0, "checkedOut": 0, "peakCheckedOut": 0,
+            "created": 0, "closed": 0, "checkoutFailures": 0, "cleared": 0,
+        })
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {address: dict(counters) for address, counters in self.pools.items()}
+
+    def pool_created(self, event):
+        self._pool(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._pool(event.address)["cleared"] += 1
+
+    def pool_closed(self, event):
+        self.pools.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        pool = self._pool(event.address)
+        pool["created"] += 1
+        pool["open"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pool = self._pool(event.address)
+        pool["closed"] += 1
+        pool["open"] = max(0, pool["open"] - 1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._pool(event.address)["checkoutFailures"] += 1
+
+    def connection_checked_out(self, event):
+        pool = self._pool(event.address)
+        pool["checkedOut"] += 1
+        pool["peakCheckedOut"] = max(pool["peakCheckedOut"], pool["checkedOut"])
+
+    def connection_checked_in(self, event):
+        pool = self._pool(event.address)
+        pool["checkedOut"] = max(0, pool["checkedOut"] - 1)
+
+
+class DatabaseManager:
+    """Owns the Motor client and the database handles the endpoints use"""
+
+    def __init__(self, settings: MongoSettings):
+        self.settings = settings
+        self.metrics = PoolMetrics()
+        self.options = settings.client_options()
+        self.client = AsyncIOMotorClient(settings.url, event_listeners=[self.metrics], **self.options)
+        self.db = self.client[settings.db_name]
+        # Read-only endpoints that tolerate slightly stale data read through this handle
+        self.secondary_db = self.client.get_database(
+            settings.db_name,
+            read_preference=build_read_preference(
+                settings.secondary_read_preference, settings.max_staleness_seconds
+            )
+        )
+
+    async def health(self) -> Dict[str, Any]:
+        """Ping the deployment and report topology and pool usage"""
+        started = time.perf_counter()
+        try:
+            hello = await self.client.admin.command("hello")
+        except PyMongoError as e:
+            return {"status": "unavailable", "error": str(e), "pools": self.metrics.snapshot()}
+        return {
+            "status": "ok",
+            "latencyMs": round((time.perf_counter() - started) * 1000, 2),
+            "replicaSet": hello.get("setName"),
+            "primary": hello.get("primary"),
+            "hosts": hello.get("hosts", []),
+            "maxPoolSize": self.client.options.pool_options.max_pool_size,
+            "compressors": self.options.get("compressors", ""),
+            "secondaryReadPreference": self.secondary_db.read_preference.mongos_mode,
+            "pools": self.metrics.snapshot(),
+        }
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,243 @@
+"""
+MongoDB index bootstrapper for Domestic Dominion.
+
+Declares every index the API endpoints rely on and applies them idempotently
+on startup. `QUERY_SHAPES` mirrors the filters used by server.py so that
+`find_collscans` can explain() each one and report plans that fall back to a
+collection scan (enable with MONGO_INDEX_EXPLAIN=1 or `python db_indexes.py --explain`).
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# collection -> list of (keys, options)
+INDEX_SPECS: Dict[str, List[Tuple[List[Tuple[str, int]], Dict[str, Any]]]] = {
+    "users": [
+        ([("userId", ASCENDING)], {"unique": True}),
+        ([("householdId", ASCENDING), ("userId", ASCENDING)], {}),
+        ([("coupleId", ASCENDING)], {"sparse": True}),
+        # Household leaderboards, read highest points first
+        ([("householdId", ASCENDING), ("points", DESCENDING), ("userId", ASCENDING)], {}),
+    ],
+    "tasks": [
+        # taskIds like "task_1" repeat across households, so uniqueness is per household.
+        # Legacy couple tasks have no householdId and are left out of the constraint.
+        ([("householdId", ASCENDING), ("taskId", ASCENDING)],
+         {"unique": True, "partialFilterExpression": {"householdId": {"$type": "string"}}}),
+        # Also serves /tasks keyset pages, which are ordered by (date, taskId)
+        ([("householdId", ASCENDING), ("date", ASCENDING), ("taskId", ASCENDING)], {}),
+        ([("taskId", ASCENDING)], {}),
+    ],
+    "households": [
+        ([("householdId", ASCENDING)], {"unique": True}),
+        ([("inviteCode", ASCENDING)], {"unique": True}),
+        # Active households, streamed by the nightly batch_assignments job (covered)
+        ([("isActive", ASCENDING), ("householdId", ASCENDING)], {}),
+    ],
+    "couples": [
+        ([("isActive", ASCENDING), ("coupleId", ASCENDING)], {}),
+    ],
+    "chore_swaps": [
+        ([("swapId", ASCENDING)], {"unique": True}),
+        ([("householdId", ASCENDING), ("targetId", ASCENDING), ("status", ASCENDING),
+          ("created_at", ASCENDING), ("swapId", ASCENDING)], {}),
+    ],
+    "mini_game_challenges": [
+        ([("challengeId", ASCENDING)], {"unique": True}),
+        # One index per $or branch of the pending-challenges query
+        ([("householdId", ASCENDING), ("challengerId", ASCENDING), ("status", ASCENDING),
+          ("created_at", ASCENDING), ("challengeId", ASCENDING)], {}),
+        ([("householdId", ASCENDING), ("challengedId", ASCENDING), ("status", ASCENDING),
+          ("created_at", ASCENDING), ("challengeId", ASCENDING)], {}),
+    ],
+    "messages": [
+        ([("couple_id", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)], {}),
+        ([("couple_id", ASCENDING), ("sender_id", ASCENDING), ("timestamp", ASCENDING)], {}),
+    ],
+    "couple_questions": [
+        ([("questionId", ASCENDING)], {"unique": True}),
+        ([("coupleId", ASCENDING), ("date", ASCENDING)], {}),
+    ],
+    "daily_odds": [
+        ([("coupleId", ASCENDING), ("date", ASCENDING)], {"unique": True}),
+    ],
+    "daily_assignments": [
+        ([("coupleId", ASCENDING), ("date", ASCENDING)], {"unique": True}),
+    ],
+    "takeovers": [
+        ([("taskId", ASCENDING), ("coupleId", ASCENDING), ("completed", ASCENDING)], {}),
+    ],
+    "task_completions": [
+        ([("completionId", ASCENDING)], {"unique": True}),
+        ([("userId", ASCENDING), ("timestamp", DESCENDING)], {}),
+        ([("timestamp", ASCENDING), ("completionId", ASCENDING)], {}),
+    ],
+    # Points ledger: one event per award, numbered per player, and periodic balance snapshots
+    "points_ledger": [
+        ([("userId", ASCENDING), ("seq", ASCENDING)], {"unique": True}),
+    ],
+    "points_snapshots": [
+        ([("userId", ASCENDING), ("seq", ASCENDING)], {"unique": True}),
+        ([("userId", ASCENDING), ("at", ASCENDING)], {}),
+    ],
+    "verification_requests": [
+        ([("verificationId", ASCENDING)], {"unique": True}),
+    ],
+    # Shared odds cache (ODDS_CACHE_SHARED=1); entries expire after two days
+    "odds_cache": [
+        ([("key", ASCENDING)], {"unique": True}),
+        ([("created_at", ASCENDING)], {"expireAfterSeconds": 2 * 24 * 3600}),
+    ],
+}
+
+# Query shapes issued by the endpoints in server.py: (endpoint, collection, filter, sort)
+QUERY_SHAPES: List[Tuple[str, str, Dict[str, Any], List[Tuple[str, int]]]] = [
+    ("get_user", "users", {"userId": "u"}, []),
+    ("user_loader", "users", {"userId": {"$in": ["u1", "u2"]}}, []),
+    ("get_my_daily_tasks:users", "users", {"coupleId": "c"}, []),
+    ("complete_task", "tasks", {"taskId": "t", "assignedTo": "u", "completed": {"$ne": True}}, []),
+    ("auto_assign_chores:upsert", "tasks", {"taskId": "t", "householdId": "h"}, []),
+    ("get_household_tasks", "tasks", {"householdId": "h", "date": "2025-01-01"},
+     [("date", ASCENDING), ("taskId", ASCENDING)]),
+    ("get_tasks", "tasks", {"householdId": "h"}, []),
+    ("get_my_daily_tasks", "tasks", {"householdId": "h", "taskId": {"$in": ["t1", "t2"]}}, []),
+    ("get_household_stats:tasks", "tasks", {"householdId": "h", "date": "2025-01-01"}, []),
+    ("join_household_adventure", "households", {"inviteCode": "ABC123"}, []),
+    ("get_household_stats", "households", {"householdId": "h"}, []),
+    ("respond_to_chore_swap", "chore_swaps", {"swapId": "s"}, []),
+    ("get_pending_swaps", "chore_swaps", {"householdId": "h", "targetId": "u", "status": "pending"},
+     [("created_at", ASCENDING), ("swapId", ASCENDING)]),
+    ("complete_mini_game_challenge", "mini_game_challenges", {"challengeId": "c"}, []),
+    ("get_pending_challenges", "mini_game_challenges", {
+        "householdId": "h",
+        "$or": [{"challengerId": "u"}, {"challengedId": "u"}],
+        "status": "pending",
+    }, [("created_at", ASCENDING), ("challengeId", ASCENDING)]),
+    ("get_messages", "messages", {"couple_id": "c"}, [("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ("check_daily_message_status", "messages", {
+        "couple_id": "c", "sender_id": "u", "timestamp": {"$gte": 0, "$lte": 1},
+    }, []),
+    ("submit_couple_answer", "couple_questions", {"questionId": "q"}, []),
+    ("get_daily_couple_question", "couple_questions", {"coupleId": "c", "date": "2025-01-01"}, []),
+    ("get_daily_odds", "daily_odds", {"coupleId": "c", "date": "2025-01-01"}, []),
+    ("get_daily_assignments", "daily_assignments", {"coupleId": "c", "date": "2025-01-01"}, []),
+    ("takeover_task", "takeovers", {"taskId": "t", "coupleId": "c", "completed": False}, []),
+    ("respond_to_verification:completion", "task_completions", {"completionId": "c"}, []),
+    ("respond_to_verification", "verification_requests", {"verificationId": "v"}, []),
+    ("odds_cache", "odds_cache", {"key": "k"}, []),
+    ("batch_assignments:households", "households", {"isActive": True}, []),
+    ("batch_assignments:couples", "couples", {"isActive": True}, []),
+    ("batch_assignments:users", "users", {"coupleId": {"$in": ["c1", "c2"]}}, []),
+    ("batch_scoring", "task_completions", {"timestamp": {"$gte": "2025-03-01", "$lt": "2025-04-01"}},
+     [("timestamp", ASCENDING), ("completionId", ASCENDING)]),
+    ("batch_scoring:tasks", "tasks", {"householdId": {"$in": ["h1", "h2"]}, "taskId": {"$in": ["t1", "t2"]}}, []),
+    ("points_ledger:balance", "points_snapshots", {"userId": "u"}, [("seq", DESCENDING)]),
+    ("points_ledger:tail", "points_ledger", {"userId": "u", "seq": {"$gt": 100}}, []),
+    ("points_ledger:as_of", "points_snapshots", {"userId": "u", "at": {"$lte": 0}}, [("seq", DESCENDING)]),
+    ("points_ledger:as_of_tail", "points_ledger", {"userId": "u", "seq": {"$gt": 100, "$lt": 200}, "at": {"$lte": 0}},
+     []),
+    ("leaderboard:household", "users", {"householdId": "h"}, [("points", DESCENDING), ("userId", ASCENDING)]),
+    ("export_assignments", "daily_assignments", {"coupleId": {"$in": ["c1", "c2"]}, "date": "2025-01-01"}, []),
+]
+
+
+def index_models(collection: str) -> List[IndexModel]:
+    """Build pymongo IndexModels for a collection's declared indexes"""
+    return [IndexModel(keys, **options) for keys, options in INDEX_SPECS.get(collection, [])]
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Create all declared indexes; safe to call on every startup"""
+    created = {}
+    for collection in INDEX_SPECS:
+        try:
+            created[collection] = await db[collection].create_indexes(index_models(collection))
+        except OperationFailure as e:
+            # An index with the same keys but different options (or duplicate data
+            # blocking a unique build) must be fixed by hand; keep serving meanwhile.
+            logger.error(f"Index creation failed for {collection}: {e}")
+            created[collection] = []
+    return created
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    """Collect every 'stage' name from an explain() plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def find_collscans(db) -> List[str]:
+    """Explain every known query shape and return the endpoints that scan a whole collection"""
+    offenders = []
+    for endpoint, collection, query, sort in QUERY_SHAPES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+        winning_plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in _plan_stages(winning_plan):
+            offenders.append(f"{endpoint} ({collection}: {query})")
+    return offenders
+
+
+async def verify_query_plans(db):
+    """Raise if any endpoint query shape falls back to COLLSCAN"""
+    offenders = await find_collscans(db)
+    if offenders:
+        raise RuntimeError("Queries without a usable index: " + "; ".join(offenders))
+
+
+def uncovered_query_shapes() -> List[str]:
+    """Static check: query shapes (per $or branch) with no index whose leading keys they filter on"""
+    uncovered = []
+    for endpoint, collection, query, _sort in QUERY_SHAPES:
+        base = {k for k in query if k != "$or"}
+        for branch in query.get("$or") or [{}]:
+            fields = base | set(branch)
+            covered = any(
+                set(name for name, _ in keys[:min(len(keys), len(fields))]) <= fields
+                for keys, _ in INDEX_SPECS.get(collection, [])
+            )
+            if not covered:
+                uncovered.append(f"{endpoint} ({collection}: {sorted(fields)})")
+    return uncovered
+
+
+if __name__ == "__main__":
+    import argparse
+    from pathlib import Path
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Apply MongoDB indexes")
+    parser.add_argument("--explain", action="store_true", help="fail if any endpoint query does a COLLSCAN")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+
+    async def main():
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        db = client[os.environ['DB_NAME']]
+        for collection, names in (await ensure_indexes(db)).items():
+            print(f"{collection}: {', '.join(names) or 'no changes'}")
+        if args.explain:
+            await verify_query_plans(db)
+            print(f"All {len(QUERY_SHAPES)} query shapes use an index")
+        client.close()
+
+    asyncio.run(main())
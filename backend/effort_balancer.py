@@ -0,0 +1,61 @@
+"""
+Effort-balanced chore assignment.
+
+Each chore goes to the member with the least effort assigned so far, where
+effort is the chore's basePoints (or a weight for its difficulty). Chores
+are handed out biggest first, and a min-heap of member loads is used, so
+assignment costs O(n log n + n log m) for n chores and m members. Effort
+ends up nearly even even when every chore differs in size.
+
+Members may have a capacity, the most effort they can take. A chore no
+remaining member has room for is left unassigned.
+"""
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Effort for chores without basePoints, matching the points generate_household_chores gives
+DIFFICULTY_EFFORT = {"EASY": 5, "MEDIUM": 10, "HARD": 15}
+
+
+def task_effort(task: dict) -> float:
+    """A chore's effort: its basePoints, else its difficulty's weight"""
+    if task.get("basePoints") is not None:
+        return float(task["basePoints"])
+    difficulty = getattr(task.get("difficulty"), "value", task.get("difficulty"))
+    return float(DIFFICULTY_EFFORT.get(difficulty, DIFFICULTY_EFFORT["MEDIUM"]))
+
+
+def balance_effort(tasks: List[dict], member_ids: List[str], capacities: Optional[Dict[str, float]] = None,
+                   rng: Optional[np.random.Generator] = None) -> Tuple[Dict[str, str], Dict[str, float]]:
+    """(taskId -> memberId, memberId -> assigned effort); chores nobody has room for are left out
+
+    Ties between equally loaded members go to member order, or to a random
+    order drawn from `rng` so the same member is not always first.
+    """
+    capacities = capacities or {}
+    loads = {member_id: 0.0 for member_id in member_ids}
+    order = rng.permutation(len(member_ids)).tolist() if rng is not None else range(len(member_ids))
+    heap = [(0.0, rank, member_ids[index]) for rank, index in enumerate(order)
+            if capacities.get(member_ids[index], float("inf")) > 0]
+    heapq.heapify(heap)
+
+    efforts = [task_effort(task) for task in tasks]
+    assignments = {}
+    # Biggest chores first (stable, so equal chores keep catalog order)
+    for i in sorted(range(len(tasks)), key=efforts.__getitem__, reverse=True):
+        effort = efforts[i]
+        full = []
+        while heap:
+            load, rank, member_id = heapq.heappop(heap)
+            if load + effort <= capacities.get(member_id, float("inf")):
+                assignments[tasks[i]["taskId"]] = member_id
+                loads[member_id] = load + effort
+                heapq.heappush(heap, (load + effort, rank, member_id))
+                break
+            full.append((load, rank, member_id))
+        # Members too full for this chore may still fit a smaller one
+        for entry in full:
+            heapq.heappush(heap, entry)
+    return assignments, loads
@@ -0,0 +1,123 @@
+"""
+Monte Carlo fairness simulator for the two-player odds pipeline.
+
+Talent shifts and room caps do not depend on the date, so they are computed
+once per pair of builds. Only the daily bonuses and the assignment draws
+change from day to day. The simulator draws both for a whole block of
+household-days at once: one (days x tasks) array per draw, using the
+engine's apply_bonuses and the same `draw < user1 odds` rule as
+pair_assignments. Bonuses are drawn from NumPy rather than from each day's
+seeded stream, with the same distribution.
+
+Reports cover each player's load (tasks and effort per day), how far each
+room's split drifts from 50/50, and how much a talent build shifts a
+player's share of the effort.
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from effort_balancer import task_effort
+from odds_engine import BONUS_CHANCE, BONUS_RANGE, ROOM_CAP, TaskArrays, apply_bonuses, balance_rooms, talent_odds
+
+PLAYERS = ("user1", "user2")
+SHARE_BINS = 1000
+
+
+def base_odds(arrays: TaskArrays, user1_talents: Optional[Dict] = None,
+              user2_talents: Optional[Dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Both players' odds after talents and room caps, before the daily bonuses"""
+    return balance_rooms(arrays, *talent_odds(arrays, user1_talents or {}, user2_talents or {}))
+
+
+def draw_days(user1: np.ndarray, user2: np.ndarray, days: int, rng: np.random.Generator) -> np.ndarray:
+    """(days x tasks) bool array, True where player 1 draws the task"""
+    shape = (days, len(user1))
+    bonus = np.where(rng.random(shape) < BONUS_CHANCE, rng.uniform(*BONUS_RANGE, size=shape), 0.0)
+    to_user1 = rng.random(shape) < 0.5
+    day_user1, _ = apply_bonuses(user1, user2, bonus, to_user1)
+    return rng.random(shape) < day_user1
+
+
+def _percentile(histogram: np.ndarray, q: float) -> float:
+    cumulative = np.cumsum(histogram)
+    return float(np.searchsorted(cumulative, q * cumulative[-1]) / SHARE_BINS)
+
+
+def simulate_pair(arrays: TaskArrays, efforts: np.ndarray, user1_talents: Optional[Dict] = None,
+                  user2_talents: Optional[Dict] = None, days: int = 1_000_000,
+                  rng: Optional[np.random.Generator] = None, chunk: int = 50_000) -> Dict:
+    """Simulate `days` household-days for one pair of builds and summarize the splits"""
+    rng = rng if rng is not None else np.random.default_rng()
+    user1, user2 = base_odds(arrays, user1_talents, user2_talents)
+    rooms = np.zeros((len(arrays), len(arrays.rooms)))
+    rooms[np.arange(len(arrays)), arrays.room_index] = 1.0
+    capped_rooms = arrays.room_sizes >= 2
+    total_effort = efforts.sum()
+
+    tasks = np.zeros(2)
+    effort = np.zeros(2)
+    effort_sq = np.zeros(2)
+    share_histogram = np.zeros(SHARE_BINS + 1)
+    room_user1 = np.zeros(len(arrays.rooms))
+    room_days_over_cap = 0
+    started = time.perf_counter()
+    for start in range(0, days, chunk):
+        size = min(chunk, days - start)
+        drawn = draw_days(user1, user2, size, rng)
+        user1_tasks = drawn.sum(axis=1)
+        user1_effort = drawn @ efforts
+        for i, (member_tasks, member_effort) in enumerate([(user1_tasks, user1_effort),
+                                                            (len(arrays) - user1_tasks, total_effort - user1_effort)]):
+            tasks[i] += member_tasks.sum()
+            effort[i] += member_effort.sum()
+            effort_sq[i] += (member_effort ** 2).sum()
+        shares = user1_effort / total_effort if total_effort else np.full(size, 0.5)
+        share_histogram += np.bincount(np.rint(shares * SHARE_BINS).astype(np.intp), minlength=SHARE_BINS + 1)
+        room_counts = drawn @ rooms
+        room_user1 += room_counts.sum(axis=0)
+        room_shares = room_counts / np.maximum(arrays.room_sizes, 1)
+        over = (room_shares > ROOM_CAP) | (room_shares < 1.0 - ROOM_CAP)
+        room_days_over_cap += int(over[:, capped_rooms].sum())
+    seconds = time.perf_counter() - started
+
+    members = {}
+    for i, player in enumerate(PLAYERS):
+        mean_effort = effort[i] / days
+        members[player] = {
+            "meanTasks": tasks[i] / days,
+            "meanEffort": mean_effort,
+            "effortStd": float(np.sqrt(max(0.0, effort_sq[i] / days - mean_effort ** 2))),
+        }
+    room_shares = room_user1 / days / np.maximum(arrays.room_sizes, 1)
+    return {
+        "days": days,
+        "members": members,
+        "user1EffortShare": {
+            "mean": effort[0] / (days * total_effort) if total_effort else 0.5,
+            "p5": _percentile(share_histogram, 0.05),
+            "p50": _percentile(share_histogram, 0.50),
+            "p95": _percentile(share_histogram, 0.95),
+        },
+        "roomUser1Share": dict(zip(arrays.rooms, room_shares.tolist())),
+        "maxRoomSkew": float(np.abs(room_shares[capped_rooms] - 0.5).max()) if capped_rooms.any() else 0.0,
+        "roomDaysOverCap": room_days_over_cap / (days * max(int(capped_rooms.sum()), 1)),
+        "seconds": seconds,
+        "householdDaysPerSecond": days / seconds if seconds else 0.0,
+    }
+
+
+def talent_advantage(tasks: List[dict], scenarios: Dict[str, Tuple[Dict, Dict]], days: int = 1_000_000,
+                     seed: int = 0) -> Dict[str, Dict]:
+    """Simulate each (user1, user2) build scenario; `talentAdvantage` is the shift in player 1's effort share vs no talents"""
+    arrays = TaskArrays(tasks)
+    efforts = np.array([task_effort(task) for task in tasks])
+    baseline = simulate_pair(arrays, efforts, days=days, rng=np.random.default_rng(seed))
+    results = {}
+    for offset, (name, (user1_talents, user2_talents)) in enumerate(scenarios.items(), start=1):
+        report = simulate_pair(arrays, efforts, user1_talents, user2_talents, days, np.random.default_rng(seed + offset))
+        report["talentAdvantage"] = report["user1EffortShare"]["mean"] - baseline["user1EffortShare"]["mean"]
+        results[name] = report
+    baseline["talentAdvantage"] = 0.0
+    return {"none": baseline, **results}
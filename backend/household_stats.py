@@ -0,0 +1,101 @@
+"""
+Household stats served by a single aggregation.
+
+One pipeline on `households` pulls the member summaries ($lookup on users)
+and today's task tallies ($lookup on tasks + $facet) so the dashboard refresh
+is one round trip regardless of household size. Uses the concise
+localField/foreignField + pipeline form of $lookup (MongoDB 5.0+), which keeps
+both joins on the users.userId and tasks.(householdId, date) indexes.
+"""
+from typing import Any, Dict, List, Optional
+
+from repository import projection
+
+
+def build_stats_pipeline(household_id: str, date: str) -> List[Dict[str, Any]]:
+    """Aggregation returning the household, its members and today's task tallies"""
+    return [
+        {"$match": {"householdId": household_id}},
+        {"$project": projection("household_summary")},
+        {"$lookup": {
+            "from": "users",
+            "localField": "memberIds",
+            "foreignField": "userId",
+            "pipeline": [
+                {"$project": {"_id": 0, "userId": 1, "displayName": 1, "role": 1, "level": 1, "points": 1}},
+            ],
+            "as": "memberDocs",
+        }},
+        {"$lookup": {
+            "from": "tasks",
+            "localField": "householdId",
+            "foreignField": "householdId",
+            "pipeline": [
+                {"$match": {"date": date}},
+                {"$facet": {
+                    "totals": [
+                        {"$group": {
+                            "_id": None,
+                            "total": {"$sum": 1},
+                            "completed": {"$sum": {"$cond": [{"$eq": ["$completed", True]}, 1, 0]}},
+                        }},
+                    ],
+                    "perMember": [
+                        {"$match": {"assignedTo": {"$nin": [None, ""]}}},
+                        {"$group": {"_id": "$assignedTo", "count": {"$sum": 1}}},
+                    ],
+                }},
+            ],
+            "as": "todayTasks",
+        }},
+    ]
+
+
+def shape_household_stats(household_id: str, doc: dict) -> dict:
+    """Turn the aggregation result into the /households/{id}/stats response"""
+    # $lookup does not keep memberIds order; restore it so the member list is stable
+    members_by_id = {member["userId"]: member for member in doc.get("memberDocs", [])}
+    members = [
+        {
+            "userId": members_by_id[member_id]["userId"],
+            "displayName": members_by_id[member_id]["displayName"],
+            "role": members_by_id[member_id].get("role", "member"),
+            "level": members_by_id[member_id].get("level", 1),
+            "points": members_by_id[member_id].get("points", 0)
+        }
+        for member_id in doc.get("memberIds", [])
+        if member_id in members_by_id
+    ]
+
+    facets = (doc.get("todayTasks") or [{}])[0]
+    totals = (facets.get("totals") or [{}])[0]
+    total_tasks = totals.get("total", 0)
+    completed_tasks = totals.get("completed", 0)
+    member_task_counts = {entry["_id"]: entry["count"] for entry in facets.get("perMember", [])}
+
+    return {
+        "householdId": household_id,
+        "householdType": doc.get("householdType", "other"),
+        "creatorName": doc.get("creatorName"),
+        "adventureTheme": doc.get("adventureTheme"),
+        "isActive": doc.get("isActive", False),
+        "choresAssigned": doc.get("choresAssigned", False),
+        "lastAssignedDate": doc.get("lastAssignedDate"),
+        "members": members,
+        "memberCount": len(members),
+        "maxMembers": doc.get("memberLimit", 12),
+        "todayStats": {
+            "totalTasks": total_tasks,
+            "completedTasks": completed_tasks,
+            "completionRate": (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
+            "tasksPerMember": member_task_counts
+        }
+    }
+
+
+async def fetch_household_stats(db, household_id: str, date: str) -> Optional[dict]:
+    """Household stats in one round trip, or None if the household does not exist"""
+    docs = await db.households.aggregate(build_stats_pipeline(household_id, date)).to_list(length=1)
+    if not docs:
+        return None
+    return shape_household_stats(household_id, docs[0])
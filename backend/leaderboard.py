@@ -0,0 +1,255 @@
+"""
+Incremental global and household leaderboards.
+
+The global board is a RankIndex, a blocked sorted list of every player
+by points. Looking up a rank costs O(log n) in the number of players;
+moving a player costs one insort inside a block. It is built once from
+the users collection and then updated on every award, so nothing ever
+sorts all users by points.
+
+Household boards are small. Each is a sorted list read through the
+(householdId, points) index the first time it is asked for, then kept
+for a TTL and updated in place on awards.
+
+Ranks are competition ranks: a player's rank is one more than the number
+of players with strictly more points, so tied players share a rank.
+Awards made by other server processes reach this one when the household
+TTL expires and when the global board is reloaded (see
+LeaderboardService.refresh_seconds).
+"""
+import asyncio
+import logging
+import time
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cachetools import TTLCache
+
+from repository import fetch_many
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[str, int, int]
+
+
+class RankIndex:
+    """Players sorted by (-points, userId) in fixed-size blocks, with O(log n) rank lookups
+
+    Block sizes are kept in a Fenwick tree, so the number of players ahead
+    of a key is a bisect over the block maxima, a bisect inside one block
+    and a prefix sum. Moving a player is a delete and an insort inside one
+    block of at most 2 * LOAD entries. Memory depends only on the number of
+    players, never on how large their totals are.
+    """
+
+    LOAD = 1000
+
+    def __init__(self, points: Optional[Dict[str, int]] = None):
+        self.points: Dict[str, int] = {user_id: int(value) for user_id, value in (points or {}).items()}
+        entries = sorted((-value, user_id) for user_id, value in self.points.items())
+        self.blocks: List[List[Tuple[int, str]]] = [entries[i:i + self.LOAD]
+                                                     for i in range(0, len(entries), self.LOAD)]
+        self.maxes: List[Tuple[int, str]] = [block[-1] for block in self.blocks]
+        self._reindex()
+
+    def _reindex(self):
+        """Rebuild the Fenwick tree over block sizes, in linear time in the number of blocks"""
+        size = len(self.blocks)
+        tree = [0] * (size + 1)
+        for i, block in enumerate(self.blocks, 1):
+            tree[i] += len(block)
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self.tree = tree
+
+    def _add(self, block: int, amount: int):
+        i = block + 1
+        while i < len(self.tree):
+            self.tree[i] += amount
+            i += i & -i
+
+    def _before_block(self, block: int) -> int:
+        """Players in the blocks before this one"""
+        i, count = block, 0
+        while i > 0:
+            count += self.tree[i]
+            i -= i & -i
+        return count
+
+    def _ahead_of(self, key: Tuple[int, str]) -> int:
+        """Players whose entry sorts before key"""
+        block = bisect_left(self.maxes, key)
+        if block == len(self.blocks):
+            return len(self.points)
+        return self._before_block(block) + bisect_left(self.blocks[block], key)
+
+    def _insert(self, key: Tuple[int, str]):
+        if not self.blocks:
+            self.blocks, self.maxes = [[key]], [key]
+            self._reindex()
+            return
+        block = min(bisect_left(self.maxes, key), len(self.blocks) - 1)
+        entries = self.blocks[block]
+        insort(entries, key)
+        self.maxes[block] = entries[-1]
+        if len(entries) > 2 * self.LOAD:
+            self.blocks[block:block + 1] = [entries[:self.LOAD], entries[self.LOAD:]]
+            self.maxes[block:block + 1] = [entries[self.LOAD - 1], entries[-1]]
+            self._reindex()
+        else:
+            self._add(block, 1)
+
+    def _delete(self, key: Tuple[int, str]):
+        block = bisect_left(self.maxes, key)
+        entries = self.blocks[block]
+        del entries[bisect_left(entries, key)]
+        if entries:
+            self.maxes[block] = entries[-1]
+            self._add(block, -1)
+        else:
+            del self.blocks[block], self.maxes[block]
+            self._reindex()
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self.points
+
+    def set(self, user_id: str, value: int):
+        """Insert or move a player"""
+        value = int(value)
+        old = self.points.get(user_id)
+        if old == value:
+            return
+        if old is not None:
+            self._delete((-old, user_id))
+        self.points[user_id] = value
+        self._insert((-value, user_id))
+
+    def remove(self, user_id: str):
+        if user_id in self.points:
+            self._delete((-self.points.pop(user_id), user_id))
+
+    def rank_of_points(self, value: int) -> int:
+        """The rank a player with this many points has"""
+        return self._ahead_of((-int(value), "")) + 1
+
+    def rank(self, user_id: str) -> Optional[int]:
+        value = self.points.get(user_id)
+        return None if value is None else self.rank_of_points(value)
+
+    def top(self, n: int) -> List[Entry]:
+        """(userId, points, rank) of the n best players; ties ordered by userId"""
+        entries: List[Entry] = []
+        rank, previous = 0, None
+        for block in self.blocks:
+            for negative, user_id in block:
+                if len(entries) >= n:
+                    return entries
+                if negative != previous:
+                    rank, previous = len(entries) + 1, negative
+                entries.append((user_id, -negative, rank))
+        return entries
+
+
+class HouseholdBoard:
+    """One household's players sorted by points (highest first)"""
+
+    def __init__(self, players: Iterable[Tuple[str, int]] = ()):
+        self.points: Dict[str, int] = {}
+        self.entries: List[Tuple[int, str]] = []
+        for user_id, value in players:
+            self.set(user_id, value)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def set(self, user_id: str, value: int):
+        old = self.points.get(user_id)
+        if old is not None:
+            del self.entries[bisect_left(self.entries, (-old, user_id))]
+        self.points[user_id] = value
+        insort(self.entries, (-value, user_id))
+
+    def rank(self, user_id: str) -> Optional[int]:
+        value = self.points.get(user_id)
+        return None if value is None else bisect_left(self.entries, (-value, "")) + 1
+
+    def top(self, n: int) -> List[Entry]:
+        return [(user_id, -negative, bisect_left(self.entries, (negative, "")) + 1)
+                for negative, user_id in self.entries[:n]]
+
+
+class LeaderboardService:
+    """The global RankIndex plus TTL-cached household boards, kept current by record()"""
+
+    def __init__(self, db, household_ttl: float = 300, max_households: int = 10_000,
+                 refresh_seconds: float = 0, load_batch: int = 5000):
+        self.db = db
+        self.refresh_seconds = refresh_seconds
+        self.load_batch = load_batch
+        self.global_index = RankIndex()
+        self.households: TTLCache = TTLCache(maxsize=max_households, ttl=household_ttl)
+        self.loaded_at: Optional[float] = None
+        self._loading: Optional[asyncio.Task] = None
+        # Awards seen while a reload is reading users; replayed onto the new index
+        self._pending: Optional[Dict[str, int]] = None
+
+    async def _load(self):
+        started = time.perf_counter()
+        self._pending = {}
+        points = {}
+        try:
+            async for user in fetch_many(self.db.users, {}, "leaderboard_entry", batch_size=self.load_batch):
+                points[user["userId"]] = user.get("points", 0)
+            points.update(self._pending)
+        finally:
+            self._pending = None
+        self.global_index = RankIndex(points)
+        self.loaded_at = time.monotonic()
+        logger.info(f"Global leaderboard loaded: {len(points)} players in {time.perf_counter() - started:.2f}s")
+
+    async def ensure_loaded(self):
+        """Load the global board on first use, and again once it is older than refresh_seconds"""
+        stale = self.loaded_at is None or (
+            self.refresh_seconds and time.monotonic() - self.loaded_at > self.refresh_seconds)
+        if stale and (self._loading is None or self._loading.done()):
+            self._loading = asyncio.ensure_future(self._load())
+        if self.loaded_at is None:
+            await asyncio.shield(self._loading)
+
+    def record(self, user: Optional[dict]):
+        """Apply a player's new total (an award's returned user: userId, householdId, points)"""
+        if not user:
+            return
+        user_id, value = user["userId"], user.get("points", 0)
+        self.global_index.set(user_id, value)
+        if self._pending is not None:
+            self._pending[user_id] = value
+        board = self.households.get(user.get("householdId"))
+        if board is not None:
+            board.set(user_id, value)
+
+    async def household(self, household_id: str) -> HouseholdBoard:
+        board = self.households.get(household_id)
+        if board is None:
+            players = []
+            async for user in fetch_many(self.db.users, {"householdId": household_id}, "leaderboard_entry",
+                                         sort=[("points", -1), ("userId", 1)]):
+                players.append((user["userId"], user.get("points", 0)))
+            board = HouseholdBoard(players)
+            self.households[household_id] = board
+        return board
+
+    async def global_top(self, n: int) -> List[Entry]:
+        await self.ensure_loaded()
+        return self.global_index.top(n)
+
+    async def global_rank(self, user: dict) -> int:
+        """Rank of a player, adding them to the board if it has not seen them yet"""
+        await self.ensure_loaded()
+        if user["userId"] not in self.global_index:
+            self.global_index.set(user["userId"], user.get("points", 0))
+        return self.global_index.rank(user["userId"])
@@ -0,0 +1,134 @@
+"""
+Talent-aware cache for computed daily odds.
+
+Daily odds are a pure function of (couple or household, date, the members'
+talent builds, task catalog), so computed results are kept in an in-process
+LRU keyed by exactly that. Builds enter the key as a stable fingerprint.
+The fingerprint per scope is itself cached for a short TTL, which spares
+hits the user read. `invalidate(scope)` drops both when a member submits a
+new build. An optional shared store, such as `MongoOddsStore`, lets workers
+reuse each other's results. Counters from `metrics()` help size the cache.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from cachetools import LRUCache, TTLCache
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str, str]
+
+
+def build_fingerprint(builds: List[Optional[Dict]]) -> str:
+    """Stable digest of the members' talent builds, in member order"""
+    canonical = json.dumps([build or {} for build in builds], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+class _CountingLRU(LRUCache):
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self.evictions = 0
+
+    def popitem(self):
+        self.evictions += 1
+        return super().popitem()
+
+
+class MongoOddsStore:
+    """Shared odds store in a Mongo collection (TTL index on created_at, see db_indexes)"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def get(self, key: str) -> Optional[Any]:
+        doc = await self.collection.find_one({"key": key}, {"_id": 0, "value": 1})
+        return doc["value"] if doc else None
+
+    async def set(self, key: str, value: Any):
+        await self.collection.update_one(
+            {"key": key},
+            {"$setOnInsert": {"value": value, "created_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+
+class OddsCache:
+    """LRU of computed odds keyed by (scope, date, build fingerprint, catalog version)"""
+
+    def __init__(self, maxsize: int = 2048, fingerprint_ttl: float = 60.0, store=None):
+        self.entries = _CountingLRU(maxsize)
+        self.fingerprints = TTLCache(maxsize, fingerprint_ttl)
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(scope: str, date: str, fingerprint: str, catalog: str) -> CacheKey:
+        return (scope, date, fingerprint, catalog)
+
+    def fingerprint_for(self, scope: str) -> Optional[str]:
+        """Recently seen build fingerprint for a scope, if still fresh"""
+        return self.fingerprints.get(scope)
+
+    def remember_builds(self, scope: str, builds: List[Optional[Dict]]) -> str:
+        fingerprint = build_fingerprint(builds)
+        self.fingerprints[scope] = fingerprint
+        return fingerprint
+
+    async def get_or_compute(self, key: CacheKey, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for key; on a miss try the shared store, then compute and fill both"""
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+
+        store_key = "|".join(key)
+        if self.store is not None:
+            try:
+                value = await self.store.get(store_key)
+            except PyMongoError as e:
+                logger.warning(f"Shared odds store read failed: {e}")
+                value = None
+            if value is not None:
+                self.store_hits += 1
+                self.entries[key] = value
+                return value
+
+        value = await compute()
+        self.entries[key] = value
+        if self.store is not None:
+            try:
+                await self.store.set(store_key, value)
+            except PyMongoError as e:
+                logger.warning(f"Shared odds store write failed: {e}")
+        return value
+
+    def invalidate(self, scope: Optional[str]):
+        """Forget everything cached for a couple or household (e.g. after a talent build change)"""
+        if not scope:
+            return
+        self.invalidations += 1
+        self.fingerprints.pop(scope, None)
+        for key in [key for key in self.entries if key[0] == scope]:
+            del self.entries[key]
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxSize": self.entries.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "sharedStoreHits": self.store_hits,
+            "hitRate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.entries.evictions,
+            "invalidations": self.invalidations,
+            "trackedScopes": len(self.fingerprints),
+        }
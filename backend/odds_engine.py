@@ -0,0 +1,332 @@
+"""
+Vectorized daily odds engine.
+
+A task catalog is compiled once into NumPy arrays (room index, difficulty
+flags, title keyword masks). The daily odds for a pair of players are then
+a handful of array operations: talent shifts, the per-room 70% cap and the
+seeded 1-3% bonuses. The results match the task-by-task dict implementation
+this replaced, float for float.
+
+The bonus draws still come from the date-seeded stream one task at a time,
+because whether a task draws one number or three depends on its first draw.
+Only those draws are sequential. Applying the bonuses is vectorized.
+
+A build change does not need a full recompute: every talent flag touches
+a fixed set of tasks (TaskArrays.flag_tasks), so `update_pair_odds` redoes
+only those tasks and the rooms they sit in, bit-identically.
+
+Households with any number of members use the matrix functions at the end:
+odds are a tasks x members array, and assignments are drawn from it in one
+vectorized categorical draw.
+"""
+import random
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from rng import DAILY_ASSIGNMENT, DAILY_BONUS, python_stream
+
+ROOM_CAP = 0.7
+MIN_ODDS = 0.1
+MAX_ODDS = 0.9
+BONUS_CHANCE = 0.2
+BONUS_RANGE = (0.01, 0.03)
+
+DIFFICULTY_CODES = {"EASY": 0, "MEDIUM": 1, "HARD": 2}
+
+# (talent flag, task mask attribute, shift) in the order the shifts are summed
+TALENT_SHIFTS = [
+    ("kitchen_specialist", "is_kitchen", 0.15),
+    ("easy_task_avoider", "is_easy", -0.10),
+    ("hard_task_seeker", "is_hard", 0.10),
+    ("trash_master", "has_trash", -0.20),
+    ("laundry_hand", "has_laundry", 0.15),
+]
+
+
+class TaskArrays:
+    """A task catalog compiled to arrays, in catalog order"""
+
+    def __init__(self, tasks: List[dict]):
+        self.task_ids = [task["taskId"] for task in tasks]
+        rooms = {}
+        self.room_index = np.array([rooms.setdefault(task["room"], len(rooms)) for task in tasks], dtype=np.intp)
+        self.rooms = list(rooms)
+        self.room_sizes = np.bincount(self.room_index, minlength=len(rooms))
+        # Tasks sorted by room, and where each room's run starts, for per-room sums
+        self.room_order = np.argsort(self.room_index, kind="stable")
+        self.room_starts = np.concatenate([[0], np.cumsum(self.room_sizes)[:-1]]).astype(np.intp)
+        # -1 for difficulties outside DIFFICULTY_CODES
+        self.difficulty_code = np.array([DIFFICULTY_CODES.get(task["difficulty"], -1) for task in tasks], dtype=np.int8)
+        titles = [task["title"].lower() for task in tasks]
+        self.is_kitchen = np.array([task["room"] == "Kitchen" for task in tasks], dtype=bool)
+        self.is_easy = self.difficulty_code == DIFFICULTY_CODES["EASY"]
+        self.is_hard = self.difficulty_code == DIFFICULTY_CODES["HARD"]
+        self.has_trash = np.array(["trash" in title for title in titles], dtype=bool)
+        self.has_laundry = np.array(["laundry" in title for title in titles], dtype=bool)
+        # Reverse index: talent flag -> the tasks its shift can move
+        self.flag_tasks = {flag: np.flatnonzero(getattr(self, mask_name)) for flag, mask_name, _ in TALENT_SHIFTS}
+        self.nbytes = self._measure()
+
+    def __len__(self) -> int:
+        return len(self.task_ids)
+
+    def _measure(self) -> int:
+        """Approximate memory held: every array plus the id and room name lists"""
+        arrays = [value for value in vars(self).values() if isinstance(value, np.ndarray)]
+        arrays += list(self.flag_tasks.values())
+        names = self.task_ids + self.rooms
+        return (sum(array.nbytes for array in arrays) + sys.getsizeof(self.task_ids) + sys.getsizeof(self.rooms)
+                + sum(sys.getsizeof(name) for name in names))
+
+
+def talent_shift(arrays: TaskArrays, talents: Dict, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """Per-task shift of a player's odds from their talent flags (for `rows` only, if given)"""
+    def column(mask_name):
+        mask = getattr(arrays, mask_name)
+        return mask if rows is None else mask[rows]
+
+    shift = np.zeros(len(arrays) if rows is None else len(rows))
+    for flag, mask_name, amount in TALENT_SHIFTS:
+        if not talents.get(flag):
+            continue
+        mask = column(mask_name)
+        if flag == "laundry_hand" and talents.get("trash_master"):
+            # Trash and laundry preferences are either/or; trash wins on titles with both
+            mask = mask & ~column("has_trash")
+        shift[mask] += amount
+    return shift
+
+
+def talent_odds(arrays: TaskArrays, user1_talents: Dict, user2_talents: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """Player odds after talents (player 2 takes whatever player 1 does not)"""
+    if not (user1_talents or user2_talents):
+        return np.full(len(arrays), 0.5), np.full(len(arrays), 0.5)
+    # Only player 1's shift moves the split, exactly as the dict implementation did
+    user1 = np.clip(0.5 + talent_shift(arrays, user1_talents), MIN_ODDS, MAX_ODDS)
+    return user1, 1.0 - user1
+
+
+def balance_rooms(arrays: TaskArrays, user1: np.ndarray, user2: np.ndarray,
+                  room_index: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Cap either player at 70% of the expected tasks in every room with 2+ tasks
+
+    `room_index` defaults to the whole catalog. Pass the room indices of a
+    subset of tasks (every task of the rooms involved, in catalog order) to
+    balance just those rows.
+    """
+    if room_index is None:
+        room_index = arrays.room_index
+    sizes = arrays.room_sizes
+    max_allowed = sizes * ROOM_CAP
+    user1_total = np.bincount(room_index, weights=user1, minlength=len(sizes))
+    user2_total = np.bincount(room_index, weights=user2, minlength=len(sizes))
+    eligible = sizes >= 2
+    over1 = eligible & (user1_total > max_allowed)
+    over2 = eligible & ~over1 & (user2_total > max_allowed)
+
+    user1, user2 = user1.copy(), user2.copy()
+    safe_sizes = np.maximum(sizes, 1)
+    reduce1 = over1[room_index]
+    if reduce1.any():
+        reduction = ((user1_total - max_allowed) / safe_sizes)[room_index]
+        user1[reduce1] = np.maximum(MIN_ODDS, user1[reduce1] - reduction[reduce1])
+        user2[reduce1] = 1.0 - user1[reduce1]
+    reduce2 = over2[room_index]
+    if reduce2.any():
+        reduction = ((user2_total - max_allowed) / safe_sizes)[room_index]
+        user2[reduce2] = np.maximum(MIN_ODDS, user2[reduce2] - reduction[reduce2])
+        user1[reduce2] = 1.0 - user2[reduce2]
+    return user1, user2
+
+
+def draw_bonuses(rng: random.Random, count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(bonus per task, True where the bonus goes to player 1) drawn from `rng`"""
+    bonus = np.zeros(count)
+    to_user1 = np.zeros(count, dtype=bool)
+    for i in range(count):
+        if rng.random() < BONUS_CHANCE:
+            bonus[i] = rng.uniform(*BONUS_RANGE)
+            to_user1[i] = rng.random() < 0.5
+    return bonus, to_user1
+
+
+def apply_bonuses(user1: np.ndarray, user2: np.ndarray, bonus: np.ndarray,
+                  to_user1: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Add each drawn bonus to its player, capped at 90%"""
+    boost1 = (bonus > 0) & to_user1
+    boost2 = (bonus > 0) & ~to_user1
+    boosted1 = np.minimum(MAX_ODDS, user1 + bonus)
+    boosted2 = np.minimum(MAX_ODDS, user2 + bonus)
+    return (
+        np.where(boost1, boosted1, np.where(boost2, 1.0 - boosted2, user1)),
+        np.where(boost1, 1.0 - boosted1, np.where(boost2, boosted2, user2)),
+    )
+
+
+class PairOdds:
+    """One day's pair odds, with the intermediate arrays an incremental update starts from"""
+
+    def __init__(self, talent_user1: np.ndarray, bonus: np.ndarray, to_user1: np.ndarray,
+                 user1: np.ndarray, user2: np.ndarray):
+        self.talent_user1 = talent_user1  # player 1's odds after talents, before room caps and bonuses
+        self.bonus = bonus
+        self.to_user1 = to_user1
+        self.user1 = user1
+        self.user2 = user2
+
+
+def compute_pair_odds(arrays: TaskArrays, couple_id: str, date: str, user1_talents: Optional[Dict] = None,
+                      user2_talents: Optional[Dict] = None) -> PairOdds:
+    """Both players' odds for every task in the catalog on a given date"""
+    user1, user2 = talent_odds(arrays, user1_talents or {}, user2_talents or {})
+    talent_user1 = user1
+    user1, user2 = balance_rooms(arrays, user1, user2)
+    bonus, to_user1 = draw_bonuses(python_stream(couple_id, date, DAILY_BONUS), len(arrays))
+    return PairOdds(talent_user1, bonus, to_user1, *apply_bonuses(user1, user2, bonus, to_user1))
+
+
+def changed_flags(old_talents: Optional[Dict], new_talents: Optional[Dict]) -> List[str]:
+    """Talent flags that are on in one build and off in the other"""
+    old_talents, new_talents = old_talents or {}, new_talents or {}
+    return [flag for flag, _, _ in TALENT_SHIFTS if bool(old_talents.get(flag)) != bool(new_talents.get(flag))]
+
+
+def affected_rows(arrays: TaskArrays, flags: List[str]) -> np.ndarray:
+    """Every task in a room where one of the flags touches a task, grouped by room, catalog order within a room"""
+    touched = np.concatenate([arrays.flag_tasks[flag] for flag in flags] + [np.zeros(0, dtype=np.intp)])
+    rooms = np.unique(arrays.room_index[touched])
+    if len(rooms) == 0:
+        return touched
+    starts, sizes = arrays.room_starts[rooms], arrays.room_sizes[rooms]
+    return np.concatenate([arrays.room_order[start:start + size] for start, size in zip(starts, sizes)])
+
+
+def update_pair_odds(arrays: TaskArrays, state: PairOdds, old_user1_talents: Optional[Dict],
+                     new_user1_talents: Optional[Dict]) -> PairOdds:
+    """The odds after player 1's build changes, redoing only the rooms it can move
+
+    Player 2's build never moves the split (see talent_odds), so only player
+    1's old and new builds are needed. Equal to compute_pair_odds with the
+    new build, bit for bit.
+    """
+    rows = affected_rows(arrays, changed_flags(old_user1_talents, new_user1_talents))
+    if len(rows) == 0:
+        return state
+    talent_user1 = state.talent_user1.copy()
+    talent_user1[rows] = np.clip(0.5 + talent_shift(arrays, new_user1_talents or {}, rows), MIN_ODDS, MAX_ODDS)
+    user1, user2 = balance_rooms(arrays, talent_user1[rows], 1.0 - talent_user1[rows], arrays.room_index[rows])
+    user1, user2 = apply_bonuses(user1, user2, state.bonus[rows], state.to_user1[rows])
+    new_user1, new_user2 = state.user1.copy(), state.user2.copy()
+    new_user1[rows], new_user2[rows] = user1, user2
+    return PairOdds(talent_user1, state.bonus, state.to_user1, new_user1, new_user2)
+
+
+def compute_odds_arrays(arrays: TaskArrays, couple_id: str, date: str, user1_talents: Optional[Dict] = None,
+                        user2_talents: Optional[Dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Both players' odds for every task in the catalog on a given date"""
+    odds = compute_pair_odds(arrays, couple_id, date, user1_talents, user2_talents)
+    return odds.user1, odds.user2
+
+
+def odds_dict(arrays: TaskArrays, user1: np.ndarray, user2: np.ndarray) -> Dict[str, Dict[str, float]]:
+    """Odds arrays in the {taskId: {"user1": p, "user2": 1 - p}} shape the API stores"""
+    return {
+        task_id: {"user1": p1, "user2": p2}
+        for task_id, p1, p2 in zip(arrays.task_ids, user1.tolist(), user2.tolist())
+    }
+
+
+def compute_daily_odds(arrays: TaskArrays, couple_id: str, date: str, user1_talents: Optional[Dict] = None,
+                       user2_talents: Optional[Dict] = None) -> Dict[str, Dict[str, float]]:
+    """Daily odds in the {taskId: {"user1": p, "user2": 1 - p}} shape the API stores"""
+    return odds_dict(arrays, *compute_odds_arrays(arrays, couple_id, date, user1_talents, user2_talents))
+
+
+def pair_assignments(couple_id: str, date: str, odds: Dict[str, Dict[str, float]]) -> Dict[str, str]:
+    """taskId -> "user1"/"user2", one draw per task from the day's assignment stream"""
+    draw = python_stream(couple_id, date, DAILY_ASSIGNMENT)
+    return {task_id: "user1" if draw.random() < task_odds["user1"] else "user2" for task_id, task_odds in odds.items()}
+
+
+# ----- N-member households: tasks x members odds matrix -----
+
+def share_bounds(members: int) -> Tuple[float, float]:
+    """(floor, cap) on one member's chance at a task; (0.1, 0.9) for two members"""
+    floor = MIN_ODDS * 2 / members
+    return floor, 1.0 - floor * (members - 1)
+
+
+def _normalize_rows(odds: np.ndarray) -> np.ndarray:
+    return odds / odds.sum(axis=1, keepdims=True)
+
+
+def member_talent_odds(arrays: TaskArrays, member_talents: List[Dict]) -> np.ndarray:
+    """Equal shares shifted by each member's talents; whatever one member gains the others give up evenly"""
+    members = len(member_talents)
+    if members == 1:
+        return np.ones((len(arrays), 1))
+    shifts = np.column_stack([talent_shift(arrays, talents or {}) for talents in member_talents])
+    odds = 1.0 / members + shifts - shifts.mean(axis=1, keepdims=True)
+    floor, cap = share_bounds(members)
+    return _normalize_rows(np.clip(odds, floor, cap))
+
+
+def cap_member_rooms(arrays: TaskArrays, odds: np.ndarray) -> np.ndarray:
+    """Hold every member to at most 70% of the expected tasks in each room with 2+ tasks"""
+    members = odds.shape[1]
+    if members == 1 or len(arrays) == 0:
+        return odds
+    sizes = arrays.room_sizes[:, None]
+    totals = np.add.reduceat(odds[arrays.room_order], arrays.room_starts, axis=0)
+    excess = np.where(sizes >= 2, np.maximum(0.0, totals - sizes * ROOM_CAP), 0.0)
+    if not excess.any():
+        return odds
+
+    floor, _ = share_bounds(members)
+    reduction = (excess / sizes)[arrays.room_index]
+    capped = np.minimum(odds, np.maximum(floor, odds - reduction))
+    # Hand what the over-cap members gave up to the others, in proportion to their odds
+    freed = (odds - capped).sum(axis=1, keepdims=True)
+    receivers = np.where(reduction == 0, capped, 0.0)
+    receiver_total = receivers.sum(axis=1, keepdims=True)
+    share = np.divide(receivers, receiver_total, out=np.zeros_like(receivers), where=receiver_total > 0)
+    return capped + freed * share
+
+
+def add_member_bonuses(odds: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Give 20% of tasks a 1-3% bump toward one random member"""
+    tasks, members = odds.shape
+    hit = rng.random(tasks) < BONUS_CHANCE
+    amount = rng.uniform(*BONUS_RANGE, size=tasks)
+    lucky = rng.integers(0, members, size=tasks)
+    if members == 1 or not hit.any():
+        return odds
+    bumped = odds.copy()
+    rows = np.flatnonzero(hit)
+    bumped[rows, lucky[rows]] += amount[rows]
+    return _normalize_rows(bumped)
+
+
+def member_odds_matrix(arrays: TaskArrays, member_talents: List[Dict],
+                       rng: np.random.Generator) -> np.ndarray:
+    """tasks x members assignment probabilities (each row sums to 1)"""
+    odds = member_talent_odds(arrays, member_talents)
+    odds = cap_member_rooms(arrays, odds)
+    return add_member_bonuses(odds, rng)
+
+
+def sample_assignments(odds: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """One categorical draw per task row; returns the chosen member index for each task"""
+    cdf = np.cumsum(odds, axis=1)
+    draws = rng.random(odds.shape[0]) * cdf[:, -1]
+    return np.minimum((draws[:, None] >= cdf).sum(axis=1), odds.shape[1] - 1)
+
+
+def assign_members(arrays: TaskArrays, member_ids: List[str], member_talents: List[Dict],
+                   bonus_rng: np.random.Generator, draw_rng: np.random.Generator) -> Dict[str, str]:
+    """taskId -> memberId for every task in the catalog"""
+    odds = member_odds_matrix(arrays, member_talents, bonus_rng)
+    chosen = sample_assignments(odds, draw_rng)
+    return {task_id: member_ids[index] for task_id, index in zip(arrays.task_ids, chosen.tolist())}
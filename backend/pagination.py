@@ -0,0 +1,86 @@
+"""
+Keyset pagination for the list endpoints.
+
+Pages are ordered by a (sort field, id field) pair and the next page starts
+strictly after the last document returned, so fetching page N is a single
+index seek no matter how far back a client has scrolled. Clients only see an
+opaque, URL-safe cursor token; the sort value and id inside it are an
+implementation detail.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from repository import fetch_many
+
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(sort_field: str, sort_value: Any, doc_id: str) -> str:
+    """Opaque token for the position just after (sort_value, doc_id)"""
+    payload = {"f": sort_field, "i": doc_id}
+    if isinstance(sort_value, datetime):
+        payload["d"] = sort_value.isoformat()
+    else:
+        payload["v"] = sort_value
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort_field: str) -> Tuple[Any, str]:
+    """(sort_value, doc_id) from a token; ValueError if it is malformed or from another listing"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        if payload["f"] != sort_field:
+            raise ValueError("cursor belongs to a different listing")
+        sort_value = datetime.fromisoformat(payload["d"]) if "d" in payload else payload["v"]
+        return sort_value, payload["i"]
+    except (binascii.Error, UnicodeDecodeError, TypeError, KeyError, AttributeError, json.JSONDecodeError) as e:
+        raise ValueError(f"invalid cursor: {e}") from e
+
+
+def keyset_filter(sort_field: str, id_field: str, sort_value: Any, doc_id: str,
+                  descending: bool) -> Dict[str, Any]:
+    """Documents strictly after (sort_value, doc_id) in (sort_field, id_field) order
+
+    Null and missing sort values come first ascending and last descending. $gt/$lt only match values
+    of the same type, so those documents get their own branch.
+    """
+    op = "$lt" if descending else "$gt"
+    if sort_value is None:
+        branches = [{sort_field: None, id_field: {op: doc_id}}]
+        if not descending:
+            branches.append({sort_field: {"$ne": None}})
+        return {"$or": branches}
+    branches = [
+        {sort_field: {op: sort_value}},
+        {sort_field: sort_value, id_field: {op: doc_id}},
+    ]
+    if descending:
+        branches.append({sort_field: None})
+    return {"$or": branches}
+
+
+async def fetch_page(collection, query: Dict[str, Any], use_case: str, sort_field: str, id_field: str,
+                     limit: int, cursor: Optional[str] = None,
+                     descending: bool = False) -> Tuple[List[dict], Optional[str]]:
+    """One page of documents plus the cursor for the next page (None on the last page)"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        sort_value, doc_id = decode_cursor(cursor, sort_field)
+        # $and keeps any $or already in the endpoint's filter intact
+        query = {"$and": [query, keyset_filter(sort_field, id_field, sort_value, doc_id, descending)]}
+
+    direction = -1 if descending else 1
+    docs = await fetch_many(collection, query, use_case).sort(
+        [(sort_field, direction), (id_field, direction)]
+    ).limit(limit + 1).to_list(length=None)
+
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    last = docs[-1]
+    return docs, encode_cursor(sort_field, last.get(sort_field), last[id_field])
@@ -0,0 +1,227 @@
+"""
+Append-only points ledger with periodic balance snapshots.
+
+Every points award goes through `award` (or `award_many`, for batch jobs). It `$inc`s the player's `points`
+together with their `ledgerSeq` in one find_one_and_update and appends
+a `points_ledger` event {userId, seq, delta, reason, refId, at}. Because
+the two fields move together, the post-image's `points` is exactly the
+balance after event `seq`. Every SNAPSHOT_EVERY events that balance is
+also written to `points_snapshots`.
+
+`users.points` stays the hot-path balance. The ledger answers audits and
+history without scanning everything:
+
+* balance(): latest snapshot plus the events after it;
+* balance_as_of(): the last snapshot at or before the time plus the
+  events up to the next snapshot, so at most about SNAPSHOT_EVERY events;
+* replay(): every event in order with a running balance, reporting any
+  gap in the sequence.
+
+Players who earned points before the ledger existed get an opening
+snapshot at seq 0 with their balance from before their first event.
+Times before that opening have no ledger balance.
+
+Outside a transaction the event is inserted at the same time as the
+`$inc`, so an award costs one round trip. The seq is not known yet, so
+the event is written with a random negative placeholder seq, which every
+reader above ignores. It gets its real seq (and any snapshot) from a
+background write once the `$inc` returns. Until then it is missing from
+balance() and replay(); flush() waits for those writes.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import PyMongoError
+
+from repository import fetch_many, fetch_one
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_EVERY = 100
+
+
+# Background writes that give events their real seq; kept referenced until done
+_settling: Set[asyncio.Task] = set()
+
+
+async def _snapshot(db, user_id: str, seq: int, balance: int, at: datetime, session=None) -> None:
+    # An upsert, so a snapshot that already exists is a no-op rather than an error (which would abort a transaction)
+    await db.points_snapshots.update_one(
+        {"userId": user_id, "seq": seq}, {"$setOnInsert": {"balance": balance, "at": at}},
+        upsert=True, session=session)
+
+
+async def _snapshots(db, user_id: str, seq: int, balance: int, delta: int, at: datetime, session=None) -> None:
+    if seq == 1:
+        # Whatever the player had before their first event is the ledger's opening balance
+        await _snapshot(db, user_id, 0, balance - delta, at, session)
+    if seq % SNAPSHOT_EVERY == 0:
+        await _snapshot(db, user_id, seq, balance, at, session)
+
+
+def _placeholder_seq() -> int:
+    """A seq no reader selects (they all ask for seq > 0) and no other event has"""
+    return -(uuid.uuid4().int >> 66) - 1
+
+
+async def _settle(db, user_id: str, placeholder: int, user: dict, delta: int, at: datetime, reason: str) -> None:
+    seq, balance = user["ledgerSeq"], user.get("points", 0)
+    try:
+        await db.points_ledger.update_one({"userId": user_id, "seq": placeholder}, {"$set": {"seq": seq}})
+        await _snapshots(db, user_id, seq, balance, delta, at)
+    except PyMongoError as e:
+        # The points are awarded; replay() reports the missing seq, and the event keeps its placeholder
+        logger.error(f"Points ledger seq {seq} for {user_id} ({reason}) not assigned to event {placeholder}: {e}")
+
+
+async def flush() -> None:
+    """Wait until every event awarded so far has its real seq"""
+    while _settling:
+        await asyncio.gather(*list(_settling))
+
+
+async def award(db, user_id: str, delta: int, reason: str, ref_id: Optional[str] = None,
+                projection: Optional[Dict[str, Any]] = None, session=None) -> Optional[dict]:
+    """Add `delta` points and record the event; returns the updated user (None if there is no such user)
+
+    `projection` selects the user fields returned; points and ledgerSeq are always included.
+    """
+    fields = {**(projection or {"_id": 0, "userId": 1}), "points": 1, "ledgerSeq": 1}
+    update = db.users.find_one_and_update(
+        {"userId": user_id},
+        {"$inc": {"points": delta, "ledgerSeq": 1}},
+        projection=fields,
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
+    at = datetime.utcnow()
+    event = {"eventId": str(uuid.uuid4()), "userId": user_id, "delta": delta, "reason": reason, "refId": ref_id,
+             "at": at}
+
+    if session is not None:
+        # Operations in one transaction run one at a time, and any failure aborts it
+        user = await update
+        if not user:
+            return None
+        await db.points_ledger.insert_one({**event, "seq": user["ledgerSeq"]}, session=session)
+        await _snapshots(db, user_id, user["ledgerSeq"], user.get("points", 0), delta, at, session)
+        return user
+
+    placeholder = _placeholder_seq()
+    user, inserted = await asyncio.gather(update, db.points_ledger.insert_one({**event, "seq": placeholder}),
+                                          return_exceptions=True)
+    if isinstance(user, BaseException) or not user:
+        if not isinstance(inserted, BaseException):
+            await db.points_ledger.delete_one({"userId": user_id, "seq": placeholder})
+        if isinstance(user, BaseException):
+            raise user
+        return None
+    if isinstance(inserted, PyMongoError):
+        # The points are already awarded; replay() reports the missing seq
+        logger.error(f"Points ledger write failed for {user_id} seq {user['ledgerSeq']} ({reason} {ref_id}): "
+                     f"{inserted}")
+    elif isinstance(inserted, BaseException):
+        raise inserted
+    else:
+        task = asyncio.ensure_future(_settle(db, user_id, placeholder, user, delta, at, reason))
+        _settling.add(task)
+        task.add_done_callback(_settling.discard)
+    return user
+
+
+async def award_many(db, deltas: Dict[str, int], reason: str, ref_id: Optional[str] = None,
+                     concurrency: int = 100) -> Dict[str, dict]:
+    """award() for many players at once, for batch jobs; returns the updated users by userId
+
+    The `$inc`s go out `concurrency` at a time (each needs its post-image for the seq), then all the
+    events in one insert_many and any snapshots in one bulk_write. Players who no longer exist are skipped.
+    """
+    awards = [(user_id, delta) for user_id, delta in deltas.items() if delta]
+    users: Dict[str, dict] = {}
+    for start in range(0, len(awards), concurrency):
+        group = awards[start:start + concurrency]
+        updated = await asyncio.gather(*(db.users.find_one_and_update(
+            {"userId": user_id},
+            {"$inc": {"points": delta, "ledgerSeq": 1}},
+            projection={"_id": 0, "userId": 1, "points": 1, "ledgerSeq": 1},
+            return_document=ReturnDocument.AFTER
+        ) for user_id, delta in group))
+        users.update((user["userId"], user) for user in updated if user)
+    if not users:
+        return users
+
+    at = datetime.utcnow()
+    events, snapshots = [], []
+    for user_id, delta in awards:
+        user = users.get(user_id)
+        if not user:
+            continue
+        seq, balance = user["ledgerSeq"], user.get("points", 0)
+        events.append({"eventId": str(uuid.uuid4()), "userId": user_id, "seq": seq, "delta": delta,
+                       "reason": reason, "refId": ref_id, "at": at})
+        if seq == 1:
+            snapshots.append(UpdateOne({"userId": user_id, "seq": 0},
+                                       {"$setOnInsert": {"balance": balance - delta, "at": at}}, upsert=True))
+        if seq % SNAPSHOT_EVERY == 0:
+            snapshots.append(UpdateOne({"userId": user_id, "seq": seq},
+                                       {"$setOnInsert": {"balance": balance, "at": at}}, upsert=True))
+    try:
+        await db.points_ledger.insert_many(events, ordered=False)
+        if snapshots:
+            await db.points_snapshots.bulk_write(snapshots, ordered=False)
+    except PyMongoError as e:
+        # The points are already awarded; replay() reports the missing seqs
+        logger.error(f"Points ledger write failed for {len(events)} {reason} awards ({ref_id}): {e}")
+    return users
+
+
+async def _tail(db, query: Dict[str, Any]) -> tuple:
+    total = count = 0
+    async for event in fetch_many(db.points_ledger, query, "points_event"):
+        total += event["delta"]
+        count += 1
+    return total, count
+
+
+async def balance(db, user_id: str) -> Optional[Dict[str, Any]]:
+    """{balance, seq, tailEvents} from the latest snapshot and the events after it; None without a ledger"""
+    snapshot = await fetch_one(db.points_snapshots, {"userId": user_id}, "points_snapshot", sort=[("seq", -1)])
+    if not snapshot:
+        return None
+    delta, count = await _tail(db, {"userId": user_id, "seq": {"$gt": snapshot["seq"]}})
+    return {"balance": snapshot["balance"] + delta, "seq": snapshot["seq"] + count, "tailEvents": count}
+
+
+async def balance_as_of(db, user_id: str, at: datetime) -> Optional[Dict[str, Any]]:
+    """The balance after every event up to `at`; None if `at` is before the player's ledger opened"""
+    before = await fetch_one(db.points_snapshots, {"userId": user_id, "at": {"$lte": at}}, "points_snapshot",
+                             sort=[("seq", -1)])
+    if not before:
+        return None
+    after = await fetch_one(db.points_snapshots, {"userId": user_id, "at": {"$gt": at}}, "points_snapshot",
+                            sort=[("seq", 1)])
+    seq_range = {"$gt": before["seq"]}
+    if after:
+        seq_range["$lt"] = after["seq"]
+    delta, count = await _tail(db, {"userId": user_id, "seq": seq_range, "at": {"$lte": at}})
+    return {"balance": before["balance"] + delta, "snapshotSeq": before["seq"], "tailEvents": count}
+
+
+async def replay(db, user_id: str, until: Optional[datetime] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Every event in seq order with the running balance; missing sequence numbers are logged and skipped"""
+    opening = await fetch_one(db.points_snapshots, {"userId": user_id, "seq": 0}, "points_snapshot")
+    running = opening["balance"] if opening else 0
+    expected = 1
+    query = {"userId": user_id, "seq": {"$gt": 0}}
+    if until is not None:
+        query["at"] = {"$lte": until}
+    async for event in fetch_many(db.points_ledger, query, "points_event", sort=[("seq", 1)]):
+        if event["seq"] != expected and until is None:
+            logger.warning(f"Points ledger for {user_id} is missing seq {expected}..{event['seq'] - 1}")
+        expected = event["seq"] + 1
+        running += event["delta"]
+        yield {**event, "balance": running}
@@ -0,0 +1,93 @@
+"""
+Projection-aware reads for the hot collections.
+
+Each use case gets a named projection listing only the fields its endpoint
+reads, so large fields such as a household's `customizedChores` and
+`householdSetup` never cross the wire unless they are needed. All reads in
+server.py go through `fetch_one` / `fetch_many` with one of these names.
+"""
+from typing import Any, Dict, Optional
+
+_TASK_FIELDS = [
+    "taskId", "householdId", "room", "title", "basePoints", "difficulty", "category",
+    "quest_type", "linkGroupId", "recurrence", "assignedTo", "timerMinutes", "description",
+    "icon", "can_swap", "can_challenge", "requires_verification", "targetPlayer",
+    "swapRequests", "date", "status", "completed", "verified", "completedAt", "completedBy",
+]
+
+
+def _fields(*names: str) -> Dict[str, Any]:
+    """Inclusion projection for the given fields, without Mongo's _id"""
+    return {"_id": 0, **{name: 1 for name in names}}
+
+
+PROJECTIONS: Dict[str, Dict[str, Any]] = {
+    # households
+    "household_membership": _fields("householdId", "memberIds", "memberLimit", "creatorName", "adventureTheme"),
+    "household_preview": _fields("creatorName", "adventureTheme", "questPhrase", "householdType",
+                                 "memberIds", "memberLimit"),
+    "household_summary": _fields("householdId", "householdType", "creatorName", "adventureTheme", "isActive",
+                                 "choresAssigned", "lastAssignedDate", "memberIds", "memberLimit"),
+    "household_assignment": _fields("householdId", "householdType", "memberIds", "customizedChores",
+                                    "memberCapacity", "lastAssignedDate"),
+    "household_batch": _fields("householdId", "customizedChores"),
+    "household_catalog": _fields("householdId", "customizedChores"),
+    "household_export": _fields("householdId"),
+    # users
+    "user_summary": _fields("userId", "displayName", "householdId", "coupleId", "role", "level", "points"),
+    "user_identity": _fields("userId", "displayName", "householdId", "coupleId"),
+    "user_progress": _fields("userId", "displayName", "householdId", "coupleId", "points", "level", "talentBuild"),
+    "user_premium": _fields("userId", "premium_access"),
+    "user_build": _fields("userId", "householdId", "coupleId", "points", "talentBuild", "premium_access"),
+    "user_talents": _fields("userId", "coupleId", "talentBuild"),
+    "leaderboard_entry": _fields("userId", "householdId", "points"),
+    "user_profile": _fields("userId", "displayName", "householdId", "coupleId", "partnerId", "role", "points",
+                            "level", "talentPoints", "talentBuild", "dailyActions", "householdPoints",
+                            "premium_access", "created_at"),
+    # tasks
+    "task_card": _fields(*_TASK_FIELDS),
+    "task_assignment": _fields("taskId", "householdId", "title", "assignedTo", "can_swap", "can_challenge"),
+    "task_completion": _fields("taskId", "householdId", "title", "room", "category", "difficulty",
+                               "basePoints", "assignedTo", "completed"),
+    "task_scoring": _fields("taskId", "householdId", "difficulty", "category", "room"),
+    "task_takeover": _fields("taskId", "title", "difficulty", "basePoints", "can_takeover", "assignedOnlyTo"),
+    # swaps and challenges
+    "chore_swap": _fields("swapId", "householdId", "taskId", "requesterId", "requesterName",
+                          "targetId", "targetName", "status", "created_at"),
+    "mini_game_challenge": _fields("challengeId", "householdId", "taskId", "challengerId", "challengerName",
+                                   "challengedId", "challengedName", "gameType", "winnerId", "status",
+                                   "created_at"),
+    # couples (legacy) and couple features
+    "couple_membership": _fields("coupleId", "inviteCode", "creatorId", "partnerId"),
+    "couple_batch": _fields("coupleId"),
+    "couple_question": _fields("questionId", "coupleId", "question", "category", "date", "player1_answer",
+                               "player1_guess", "player2_answer", "player2_guess", "points_awarded",
+                               "completed", "created_at"),
+    "daily_odds": _fields("date", "coupleId", "taskOdds", "computed_at"),
+    "daily_assignments": _fields("coupleId", "date", "assignments", "created_at"),
+    "takeover_exists": {"_id": 1},
+    "message": _fields("id", "content", "original_content", "enhanced", "empathy_score", "sender_id",
+                       "couple_id", "timestamp", "read"),
+    "verification_request": _fields("verificationId", "completionId", "userId", "partnerId", "status",
+                                    "expires_at"),
+    "points_event": _fields("eventId", "userId", "seq", "delta", "reason", "refId", "at"),
+    "points_snapshot": _fields("userId", "seq", "balance", "at"),
+    "task_completion_record": _fields("completionId", "userId", "taskId", "coupleId", "householdId"),
+    "completion_scoring": _fields("completionId", "userId", "taskId", "householdId", "timestamp", "difficulty",
+                                  "category", "room", "scoredPoints", "scoringVersion"),
+}
+
+
+def projection(use_case: str) -> Dict[str, Any]:
+    """Named projection for a use case (KeyError for unknown names, on purpose)"""
+    return PROJECTIONS[use_case]
+
+
+async def fetch_one(collection, query: Dict[str, Any], use_case: str, **kwargs) -> Optional[dict]:
+    """find_one restricted to the fields the use case needs (kwargs such as session pass through)"""
+    return await collection.find_one(query, projection(use_case), **kwargs)
+
+
+def fetch_many(collection, query: Dict[str, Any], use_case: str, **kwargs):
+    """find cursor restricted to the fields the use case needs (kwargs such as session pass through)"""
+    return collection.find(query, projection(use_case), **kwargs)
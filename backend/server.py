@@ -1,8 +1,8 @@
-from fastapi import FastAPI, APIRouter, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, Header, HTTPException, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
 import os
 import logging
 from pathlib import Path
@@ -16,15 +16,41 @@ import asyncio
 import httpx
 import random
 import math
+import secrets
 from emergentintegrations.llm.chat import LlmChat, UserMessage
+from db_indexes import ensure_indexes, verify_query_plans
+from user_loader import UserLoader, current_user_loader
+from task_assignments import write_task_assignments
+from tenant_queries import TenantTaskQueries, group_by_room
+from repository import fetch_one, fetch_many, projection
+from household_stats import fetch_household_stats
+from pagination import fetch_page
+from db_client import DatabaseManager, MongoSettings
+from cachetools import LRUCache
+import odds_engine
+from effort_balancer import balance_effort
+from odds_cache import MongoOddsStore, OddsCache
+from task_catalog import CatalogCache
+from assignment_export import NDJSON, export_lines
+from talent_effects import TalentScorer
+from talent_tree import BuildRejected, TalentTree
+from talent_codec import build_node_ids, encode_build, has_node, public_build, unregistered
+import rng
+import points_ledger
+from leaderboard import LeaderboardService
+from task_completion import CompletionRejected, complete_task_atomically, transactions_supported
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection (pool, timeouts and compression come from MONGO_* env vars)
+mongo = DatabaseManager(MongoSettings.from_env())
+client = mongo.client
+db = mongo.db
+# Read-only endpoints that can serve slightly stale data read from secondaries
+secondary_db = mongo.secondary_db
+# Set on startup: run task completions in a transaction when MongoDB is a replica set
+transactions_enabled = False
 # ChatGPT API Configuration (using Emergent LLM key)
 CHATGPT_API_KEY = os.environ.get('PI_API_KEY', 'sk-emergent-281893dE8B579E7725')  # Reusing Emergent LLM key
 
@@ -95,6 +121,17 @@ async def enhance_message_with_chatgpt(message: str, message_type: str = "genera
 app = FastAPI(title="Domestic Dominion - Kingdom Management RPG", version="3.0.0")
 api_router = APIRouter(prefix="/api")
 
+def user_loader() -> UserLoader:
+    """Batching user loader for the current request (fresh one outside a request)"""
+    return current_user_loader.get() or UserLoader(db.users)
+
+async def page_or_400(page):
+    """Await a fetch_page call, turning a bad cursor token into a 400"""
+    try:
+        return await page
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # Enhanced Game Constants (New NES-themed specification)
 GAME_CONSTANTS = {
     "POINTS": {
@@ -210,6 +247,10 @@ class HouseholdType(str, Enum):
     COUPLE = "couple"
     OTHER = "other"
 
+class AssignmentStrategy(str, Enum):
+    ODDS = "odds"  # random draw from the talent-aware odds matrix
+    EFFORT = "effort"  # deterministic balancing of accumulated basePoints
+
 # Comprehensive 10-Tier Talent Tree System (Domestic Dominion)
 # Based on new world map specification with 3 kingdoms/branches
 NEW_TALENT_TREE_NODES = {
@@ -935,6 +976,7 @@ class Household(BaseModel):
     livesUpstairs: bool = False
     gamePreferences: Dict[str, Any] = Field(default_factory=dict)
     customizedChores: List[dict] = Field(default_factory=list)  # List of task dictionaries
+    memberCapacity: Dict[str, float] = Field(default_factory=dict)  # userId -> max effort (basePoints) per assignment
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
 class HouseholdInvitation(BaseModel):
@@ -997,6 +1039,10 @@ class EnhancedHouseholdRequest(BaseModel):  # Changed from EnhancedCoupleRequest
     livesUpstairs: bool = False
     preferences: Dict[str, Any] = Field(default_factory=dict)
 
+class MemberCapacityRequest(BaseModel):
+    adminUserId: str
+    capacities: Dict[str, float]  # userId -> max effort; omitted members are unlimited
+
 class JoinHouseholdRequest(BaseModel):  # Changed from JoinCoupleRequest
     memberName: str  # Changed from partnerName
     inviteCode: str
@@ -1303,6 +1349,11 @@ OLD_TALENT_TREE_NODES = {
 
 # Use the new 10-tier talent tree as the main one
 TALENT_TREE_NODES = NEW_TALENT_TREE_NODES
+# Prerequisite DAG with bitset builds (fails at import if the tree has a cycle or a dangling prerequisite)
+talent_tree = TalentTree(TALENT_TREE_NODES)
+# Stored builds are bitmasks over talent_codec.NODE_BITS; a node without a bit could not be saved
+if unregistered(TALENT_TREE_NODES):
+    raise RuntimeError(f"Talent nodes missing from talent_codec.NODE_BITS: {unregistered(TALENT_TREE_NODES)}")
 
 # Sample Task List (following specification)
 DEFAULT_TASKS = [
@@ -1348,6 +1399,38 @@ DEFAULT_TASKS = [
     {"taskId": "growth_exercise", "room": "Growth", "title": "30-minute exercise", "basePoints": 20, "difficulty": TaskDifficulty.HARD, "description": "Get your heart pumping"}
 ]
 
+# Task catalogs compiled for the odds engine, shared by every household with the same chores
+task_catalogs = CatalogCache(
+    max_bytes=int(os.environ.get('TASK_CATALOG_CACHE_BYTES', str(64 * 1024 * 1024))),
+    scope_ttl=float(os.environ.get('TASK_CATALOG_SCOPE_TTL', '60'))
+)
+DEFAULT_CATALOG_VERSION, DEFAULT_TASK_ARRAYS = task_catalogs.compile(DEFAULT_TASKS)
+
+# Computed daily odds, keyed by couple, date, talent build fingerprint and catalog version
+odds_cache = OddsCache(
+    maxsize=int(os.environ.get('ODDS_CACHE_SIZE', '2048')),
+    fingerprint_ttl=float(os.environ.get('ODDS_CACHE_FINGERPRINT_TTL', '60')),
+    store=MongoOddsStore(db.odds_cache) if os.environ.get('ODDS_CACHE_SHARED') == '1' else None
+)
+# (couple, date, catalog version) -> (talent builds, PairOdds) last computed, the starting point after a build change
+pair_odds_bases = LRUCache(maxsize=int(os.environ.get('ODDS_CACHE_SIZE', '2048')))
+
+# Talent builds compiled into effect tables for task scoring
+talent_scorer = TalentScorer(TALENT_TREE_NODES, GAME_CONSTANTS["POINTS"])
+
+# Global and household rankings, updated in process on every award
+leaderboards = LeaderboardService(
+    db,
+    household_ttl=float(os.environ.get('LEADERBOARD_HOUSEHOLD_TTL', '300')),
+    refresh_seconds=float(os.environ.get('LEADERBOARD_REFRESH_SECONDS', '0'))
+)
+
+async def award_points(user_id: str, delta: int, reason: str, ref_id: Optional[str] = None) -> Optional[dict]:
+    """points_ledger.award, then move the player on the leaderboards"""
+    user = await points_ledger.award(db, user_id, delta, reason, ref_id, projection=projection("leaderboard_entry"))
+    leaderboards.record(user)
+    return user
+
 # Helper Functions
 def calculate_level(points: int) -> tuple:
     """Calculate level and talent points from total points (Enhanced NES system)"""
@@ -1366,101 +1449,7 @@ def calculate_enhanced_task_points(task: Dict, user_talents: Dict, completion_ti
     5. Housekeeper's Edge (if applicable) 
     6. Chore shift calculations (assignment probability adjustments)
     """
-    result = {
-        "base_points": 0,
-        "talent_bonuses": 0,
-        "talent_multipliers": 1.0,
-        "early_bird_bonus": 0,
-        "housekeeper_edge": 0,
-        "total_points": 0,
-        "breakdown": []
-    }
-    
-    # Step 1: Base Points
-    difficulty = task.get("difficulty", "EASY")
-    result["base_points"] = GAME_CONSTANTS["POINTS"][difficulty]
-    result["breakdown"].append(f"Base {difficulty}: {result['base_points']} pts")
-    
-    # Step 2: Talent Bonuses (flat additions)
-    if user_talents and user_talents.get("nodeIds"):
-        for node_id in user_talents["nodeIds"]:
-            if node_id not in TALENT_TREE_NODES:
-                continue
-                
-            node = TALENT_TREE_NODES[node_id]
-            effect = node["effect"]
-            
-            # Check if talent applies to this task
-            if applies_to_task(effect, task):
-                if effect["type"] == "category_bonus" and task.get("category") == effect.get("category"):
-                    bonus = effect.get("points", 0)
-                    result["talent_bonuses"] += bonus
-                    result["breakdown"].append(f"{node['name']}: +{bonus} pts")
-                    
-                elif effect["type"] == "first_task_bonus" and is_first_task:
-                    bonus = effect.get("value", 0)
-                    result["talent_bonuses"] += bonus
-                    result["breakdown"].append(f"{node['name']} (First Task): +{bonus} pts")
-                    
-                elif effect["type"] == "streak_bonus" and consecutive_tasks >= effect.get("streak_count", 0):
-                    bonus = effect.get("bonus", 0)
-                    result["talent_bonuses"] += bonus
-                    result["breakdown"].append(f"{node['name']} (Streak): +{bonus} pts")
-    
-    # Step 3: Talent Multipliers  
-    if user_talents and user_talents.get("nodeIds"):
-        for node_id in user_talents["nodeIds"]:
-            if node_id not in TALENT_TREE_NODES:
-                continue
-                
-            node = TALENT_TREE_NODES[node_id]
-            effect = node["effect"]
-            
-            if applies_to_task(effect, task):
-                if effect["type"] == "category_multiplier" and task.get("category") == effect.get("category"):
-                    multiplier = effect.get("multiplier", 1.0)
-                    result["talent_multipliers"] *= multiplier
-                    result["breakdown"].append(f"{node['name']}: x{multiplier}")
-                    
-                elif effect["type"] == "joint_task_multiplier" and task.get("can_be_joint", False):
-                    multiplier = effect.get("multiplier", 1.0)
-                    result["talent_multipliers"] *= multiplier 
-                    result["breakdown"].append(f"{node['name']} (Joint): x{multiplier}")
-    
-    # Step 4: Early Bird Bonus (completed before 2 PM)
-    if completion_time.hour < 14:
-        early_bird_talents = [node_id for node_id in user_talents.get("nodeIds", []) 
-                             if node_id in TALENT_TREE_NODES and 
-                             TALENT_TREE_NODES[node_id]["effect"].get("type") == "time_bonus"]
-        if early_bird_talents:
-            result["early_bird_bonus"] = int((result["base_points"] + result["talent_bonuses"]) * 0.1)
-            result["breakdown"].append(f"Early Bird: +{result['early_bird_bonus']} pts")
-    
-    # Step 5: Housekeeper's Edge (if user has cleaning specialization)
-    cleaning_bonuses = [node_id for node_id in user_talents.get("nodeIds", []) 
-                       if node_id in TALENT_TREE_NODES and 
-                       task.get("category") == "cleaning" and
-                       "cleaning" in TALENT_TREE_NODES[node_id]["effect"].get("category", "")]
-    if cleaning_bonuses and task.get("category") == "household":
-        result["housekeeper_edge"] = 2
-        result["breakdown"].append(f"Housekeeper's Edge: +{result['housekeeper_edge']} pts")
-    
-    # Step 6: Calculate Final Total
-    base_with_bonuses = result["base_points"] + result["talent_bonuses"]
-    multiplied_total = base_with_bonuses * result["talent_multipliers"] 
-    result["total_points"] = int(multiplied_total + result["early_bird_bonus"] + result["housekeeper_edge"])
-    
-    return result
-
-def applies_to_task(effect: Dict, task: Dict) -> bool:
-    """Check if a talent effect applies to a specific task"""
-    if effect.get("category") and task.get("category") != effect["category"]:
-        return False
-    if effect.get("room") and task.get("room") != effect["room"]:
-        return False
-    if effect.get("difficulty") and task.get("difficulty") != effect["difficulty"]:
-        return False
-    return True
+    return talent_scorer.score(task, user_talents, completion_time, is_first_task, consecutive_tasks)
 
 def clamp(value: float, min_val: float, max_val: float) -> float:
     """Clamp value between min and max"""
@@ -1470,10 +1459,7 @@ def sum_talent_effects(talent_build: Dict, task: Dict, effect_type: str) -> floa
     """Sum all talent effects of a specific type for a task"""
     total = 0.0
     
-    if not talent_build.get("nodeIds"):
-        return total
-        
-    for node_id in talent_build["nodeIds"]:
+    for node_id in build_node_ids(talent_build):
         if node_id not in TALENT_TREE_NODES:
             continue
             
@@ -1504,176 +1490,54 @@ def sum_talent_effects(talent_build: Dict, task: Dict, effect_type: str) -> floa
     return total
 
 def compute_daily_odds(couple_id: str, date: str, user1_talents: Dict = None, user2_talents: Dict = None) -> Dict[str, Dict[str, float]]:
-    """Advanced 50/50 task assignment algorithm with talent tree modifications"""
-    tasks = DEFAULT_TASKS
-    task_odds = {}
-    
-    # Initialize base 50/50 odds
-    base_odds = {task["taskId"]: {"user1": 0.5, "user2": 0.5} for task in tasks}
-    
-    # Apply talent tree modifications
-    if user1_talents or user2_talents:
-        task_odds = apply_talent_modifications(base_odds, tasks, user1_talents or {}, user2_talents or {})
-    else:
-        task_odds = base_odds
-    
-    # Apply room balancing (ensure both partners get tasks from each room)
-    task_odds = apply_room_balancing(task_odds, tasks)
-    
-    # Apply random bonus chances (1-3% modifications)
-    task_odds = apply_random_bonuses(task_odds, date)
-    
-    return task_odds
-
-def apply_talent_modifications(odds: Dict, tasks: List, user1_talents: Dict, user2_talents: Dict) -> Dict:
-    """Apply talent tree effects to task assignment odds"""
-    modified_odds = odds.copy()
-    
-    for task in tasks:
-        task_id = task["taskId"]
-        room = task["room"]
-        difficulty = task["difficulty"]
-        title = task["title"].lower()
-        
-        # User 1 talent effects
-        user1_modifier = 0
-        
-        # Kitchen specialization - "Wet hands don't scare me"
-        if user1_talents.get("kitchen_specialist") and room == "Kitchen":
-            user1_modifier += 0.15  # 15% more likely to get kitchen tasks
-            
-        # Difficulty preferences
-        if user1_talents.get("easy_task_avoider") and difficulty == "EASY":
-            user1_modifier -= 0.10
-        elif user1_talents.get("hard_task_seeker") and difficulty == "HARD":
-            user1_modifier += 0.10
-            
-        # Specific task preferences
-        if user1_talents.get("trash_master") and "trash" in title:
-            user1_modifier -= 0.20  # Less likely to get trash tasks
-        elif user1_talents.get("laundry_hand") and "laundry" in title:
-            user1_modifier += 0.15
-            
-        # User 2 talent effects (mirror logic)
-        user2_modifier = 0
-        
-        if user2_talents.get("kitchen_specialist") and room == "Kitchen":
-            user2_modifier += 0.15
-            
-        if user2_talents.get("easy_task_avoider") and difficulty == "EASY":
-            user2_modifier -= 0.10
-        elif user2_talents.get("hard_task_seeker") and difficulty == "HARD":
-            user2_modifier += 0.10
-            
-        if user2_talents.get("trash_master") and "trash" in title:
-            user2_modifier -= 0.20
-        elif user2_talents.get("laundry_hand") and "laundry" in title:
-            user2_modifier += 0.15
-        
-        # Apply modifications while maintaining balance
-        user1_odds = max(0.1, min(0.9, 0.5 + user1_modifier))
-        user2_odds = 1.0 - user1_odds
-        
-        modified_odds[task_id] = {
-            "user1": user1_odds,
-            "user2": user2_odds
-        }
-    
-    return modified_odds
-
-def apply_room_balancing(odds: Dict, tasks: List) -> Dict:
-    """Ensure both partners get tasks from each room (room redistribution rule)"""
-    # Group tasks by room
-    rooms = {}
-    for task in tasks:
-        room = task["room"]
-        if room not in rooms:
-            rooms[room] = []
-        rooms[room].append(task["taskId"])
-    
-    # For each room, ensure neither partner gets more than 70% of tasks
-    balanced_odds = odds.copy()
-    
-    for room, task_ids in rooms.items():
-        if len(task_ids) < 2:  # Skip rooms with only 1 task
-            continue
-            
-        # Calculate current distribution
-        user1_total = sum(odds[task_id]["user1"] for task_id in task_ids)
-        user2_total = sum(odds[task_id]["user2"] for task_id in task_ids)
-        
-        # If distribution is too skewed, rebalance
-        max_allowed = len(task_ids) * 0.7
-        
-        if user1_total > max_allowed:
-            # Reduce user1's odds in this room
-            excess = user1_total - max_allowed
-            for task_id in task_ids:
-                reduction = (excess / len(task_ids))
-                balanced_odds[task_id]["user1"] = max(0.1, odds[task_id]["user1"] - reduction)
-                balanced_odds[task_id]["user2"] = 1.0 - balanced_odds[task_id]["user1"]
-                
-        elif user2_total > max_allowed:
-            # Reduce user2's odds in this room
-            excess = user2_total - max_allowed
-            for task_id in task_ids:
-                reduction = (excess / len(task_ids))
-                balanced_odds[task_id]["user2"] = max(0.1, odds[task_id]["user2"] - reduction)
-                balanced_odds[task_id]["user1"] = 1.0 - balanced_odds[task_id]["user2"]
-    
-    return balanced_odds
-
-def apply_random_bonuses(odds: Dict, date: str) -> Dict:
-    """Apply 1-3% random bonus chances based on date seed"""
-    # Use date as seed for consistent daily randomness
-    random.seed(date)
-    
-    modified_odds = odds.copy()
-    
-    for task_id in odds.keys():
-        # 20% chance of getting a random bonus
-        if random.random() < 0.2:
-            # Random bonus between 1-3%
-            bonus = random.uniform(0.01, 0.03)
-            
-            # Randomly apply to user1 or user2
-            if random.random() < 0.5:
-                # Boost user1
-                new_user1_odds = min(0.9, modified_odds[task_id]["user1"] + bonus)
-                modified_odds[task_id]["user1"] = new_user1_odds
-                modified_odds[task_id]["user2"] = 1.0 - new_user1_odds
-            else:
-                # Boost user2
-                new_user2_odds = min(0.9, modified_odds[task_id]["user2"] + bonus)
-                modified_odds[task_id]["user2"] = new_user2_odds
-                modified_odds[task_id]["user1"] = 1.0 - new_user2_odds
-    
-    return modified_odds
-
-def generate_daily_assignments(couple_id: str, date: str = None) -> Dict[str, str]:
-    """Generate actual task assignments for the day using computed odds"""
-    if not date:
-        date = datetime.utcnow().strftime('%Y-%m-%d')
-    
-    # Get couple users to fetch their talent builds
-    # For now, use empty talent builds - will be enhanced when talent system is complete
-    user1_talents = {}
-    user2_talents = {}
-    
-    # Compute odds
-    odds = compute_daily_odds(couple_id, date, user1_talents, user2_talents)
-    
-    # Generate assignments using weighted random selection
-    assignments = {}
-    random.seed(f"{couple_id}_{date}")  # Consistent seed for same day
-    
-    for task_id, task_odds in odds.items():
-        if random.random() < task_odds["user1"]:
-            assignments[task_id] = "user1"
+    """Advanced 50/50 task assignment algorithm with talent tree modifications (see odds_engine)"""
+    return odds_engine.compute_daily_odds(DEFAULT_TASK_ARRAYS, couple_id, date, user1_talents, user2_talents)
+
+async def couple_talent_builds(couple_id: str) -> List[Dict]:
+    """Talent builds of the couple's players, as [user1, user2]"""
+    users = await fetch_many(db.users, {"coupleId": couple_id}, "user_progress").to_list(2)
+    builds = [user.get("talentBuild") or {} for user in users]
+    return builds + [{}] * (2 - len(builds))
+
+async def scope_tasks(scope_id: str) -> List[dict]:
+    """The chores a couple/household's odds cover: a household's customized chores, else DEFAULT_TASKS"""
+    household = await fetch_one(db.households, {"householdId": scope_id}, "household_catalog")
+    return (household or {}).get("customizedChores") or DEFAULT_TASKS
+
+async def scope_catalog(scope_id: str) -> tuple:
+    """(catalog version, compiled TaskArrays) for a couple/household"""
+    compiled = task_catalogs.for_scope(scope_id)
+    if compiled is None:
+        compiled = task_catalogs.remember_scope(scope_id, await scope_tasks(scope_id))
+    return compiled
+
+async def cached_daily_odds(couple_id: str, date: str) -> Dict[str, Dict[str, float]]:
+    """Daily odds for the couple's chores and current talent builds, through the odds cache (read-only result)"""
+    version, arrays = await scope_catalog(couple_id)
+    builds = None
+    fingerprint = odds_cache.fingerprint_for(couple_id)
+    if fingerprint is None:
+        builds = await couple_talent_builds(couple_id)
+        fingerprint = odds_cache.remember_builds(couple_id, builds)
+    
+    async def compute():
+        talents = builds if builds is not None else await couple_talent_builds(couple_id)
+        base = pair_odds_bases.get((couple_id, date, version))
+        if base is None:
+            state = odds_engine.compute_pair_odds(arrays, couple_id, date, *talents)
         else:
-            assignments[task_id] = "user2"
+            # Only the rooms touched by player 1's changed talents move
+            base_talents, base_state = base
+            state = odds_engine.update_pair_odds(arrays, base_state, base_talents[0], talents[0])
+        pair_odds_bases[(couple_id, date, version)] = (talents, state)
+        return odds_engine.odds_dict(arrays, state.user1, state.user2)
     
-    return assignments
+    key = odds_cache.key(couple_id, date, fingerprint, version)
+    return await odds_cache.get_or_compute(key, compute)
+
+def generate_daily_assignments(couple_id: str, date: str, odds: Dict[str, Dict[str, float]]) -> Dict[str, str]:
+    """Generate actual task assignments for the day from its computed odds (same stream for the same day)"""
+    return odds_engine.pair_assignments(couple_id, date, odds)
 
 def generate_customized_chores(household_setup: Dict[str, Any]) -> List[str]:
     """Generate customized chore list based on household setup"""
@@ -1845,6 +1709,8 @@ async def create_enhanced_household(request: EnhancedHouseholdRequest):
     
     # Save to database
     await db.households.insert_one(household.model_dump())
+    # A lookup before the household existed would have remembered DEFAULT_TASKS for it
+    task_catalogs.invalidate(household.householdId)
     await db.users.insert_one(creator_user.model_dump())
     
     # Create enhanced invitation message
@@ -1931,7 +1797,7 @@ async def create_enhanced_couple_compat(request: EnhancedHouseholdRequest):
 async def join_household_adventure(request: JoinHouseholdRequest):
     """Join an existing household using invitation code"""
     # Find household by invite code
-    household = await db.households.find_one({"inviteCode": request.inviteCode})
+    household = await fetch_one(db.households, {"inviteCode": request.inviteCode}, "household_membership")
     if not household:
         raise HTTPException(status_code=404, detail="Invalid invitation code")
     
@@ -1969,7 +1835,7 @@ async def join_household_adventure(request: JoinHouseholdRequest):
 @api_router.get("/households/{invite_code}/preview")
 async def preview_household_invitation(invite_code: str):
     """Preview household invitation details"""
-    household = await db.households.find_one({"inviteCode": invite_code})
+    household = await fetch_one(db.households, {"inviteCode": invite_code}, "household_preview")
     if not household:
         raise HTTPException(status_code=404, detail="Invalid invitation code")
     
@@ -1985,16 +1851,16 @@ async def preview_household_invitation(invite_code: str):
         "isAvailable": current_members < household.get("memberLimit", 12)
     }
 
-# NEW: Auto Chore Assignment (Fair & Even Split)
+# NEW: Auto Chore Assignment (fair split drawn from per-member odds, or balanced by effort)
 @api_router.post("/households/{household_id}/assign-chores")
-async def auto_assign_chores(household_id: str, admin_user_id: str):
-    """Admin triggers automatic fair/even chore distribution among all members"""
+async def auto_assign_chores(household_id: str, admin_user_id: str, strategy: Optional[AssignmentStrategy] = None):
+    """Admin triggers automatic fair chore distribution among all members"""
     # Verify admin permissions
-    admin = await db.users.find_one({"userId": admin_user_id, "householdId": household_id})
-    if not admin or admin.get("role") != "admin":
+    admin = await user_loader().load(admin_user_id)
+    if not admin or admin.get("householdId") != household_id or admin.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Only household admin can assign chores")
     
-    household = await db.households.find_one({"householdId": household_id})
+    household = await fetch_one(db.households, {"householdId": household_id}, "household_assignment")
     if not household:
         raise HTTPException(status_code=404, detail="Household not found")
     
@@ -2020,33 +1886,58 @@ async def auto_assign_chores(household_id: str, admin_user_id: str):
     if len(tasks) == 0:
         raise HTTPException(status_code=400, detail="No tasks available to assign. Please recreate your household.")
     
-    # Shuffle member order for fair rotation (different each time)
-    shuffled_members = member_ids.copy()
-    random.shuffle(shuffled_members)
-    
-    # Distribute tasks EVENLY among members with rotation
-    assignments = {}
+    # Members' talents shape the tasks x members odds matrix
+    member_docs = await fetch_many(
+        db.users, {"userId": {"$in": member_ids}}, "user_progress"
+    ).to_list(len(member_ids))
+    members_by_id = {member["userId"]: member for member in member_docs}
+    member_talents = [members_by_id.get(member_id, {}).get("talentBuild") or {} for member_id in member_ids]
+    
+    # Shared housing / dorms balance effort by default; everyone else gets the talent-aware draw
+    if strategy is None:
+        shared = household.get("householdType") == HouseholdType.SHARED
+        strategy = AssignmentStrategy.EFFORT if shared else AssignmentStrategy.ODDS
+    
+    if strategy == AssignmentStrategy.EFFORT:
+        # Biggest chores first to whoever has the least effort so far, within member capacities
+        assignments, _ = balance_effort(
+            tasks, member_ids, household.get("memberCapacity"),
+            rng.numpy_stream(household_id, today, rng.CHORE_ASSIGNMENT)
+        )
+    else:
+        # Draw every task's member from the odds matrix (talent shifts, 70% room caps, daily bonuses)
+        _, arrays = task_catalogs.compile(tasks)
+        assignments = odds_engine.assign_members(
+            arrays, member_ids, member_talents,
+            rng.numpy_stream(household_id, today, rng.CHORE_BONUS),
+            rng.numpy_stream(household_id, today, rng.CHORE_ASSIGNMENT)
+        )
     member_task_counts = {member_id: 0 for member_id in member_ids}
+    task_docs = []
+    unassigned_docs = []
+    unassigned_tasks = []
     
-    for i, task in enumerate(tasks):
-        # Assign to member with fewest tasks (ensures even distribution)
-        assigned_member = min(member_task_counts, key=member_task_counts.get)
-        member_task_counts[assigned_member] += 1
-        
+    for task in tasks:
         task_copy = task.copy()
-        task_copy["assignedTo"] = assigned_member
         task_copy["date"] = today
         task_copy["householdId"] = household_id
         task_copy["completed"] = False
         task_copy["verified"] = False
-        assignments[task["taskId"]] = assigned_member
         
-        # Save task assignment with ALL task fields
-        await db.tasks.update_one(
-            {"taskId": task["taskId"], "householdId": household_id},
-            {"$set": task_copy},
-            upsert=True
-        )
+        assigned_member = assignments.get(task["taskId"])
+        if assigned_member is None:
+            # Over every member's capacity; saved without an assignee so yesterday's does not linger
+            unassigned_tasks.append({"taskId": task["taskId"], "title": task.get("title")})
+            unassigned_docs.append(task_copy)
+            continue
+        member_task_counts[assigned_member] += 1
+        task_copy["assignedTo"] = assigned_member
+        task_docs.append(task_copy)
+    
+    # Save every task assignment (with ALL task fields) in one round trip
+    write_result = await write_task_assignments(db.tasks, household_id, task_docs, unassigned_docs)
+    if task_docs and not write_result["written"]:
+        raise HTTPException(status_code=500, detail="Failed to save chore assignments")
     
     # Mark chores as assigned and record metrics
     await db.households.update_one(
@@ -2061,8 +1952,7 @@ async def auto_assign_chores(household_id: str, admin_user_id: str):
     # Calculate fair distribution stats
     distribution_stats = {}
     for member_id in member_ids:
-        member = await db.users.find_one({"userId": member_id})
-        member_name = member.get("displayName", "Unknown") if member else "Unknown"
+        member_name = members_by_id.get(member_id, {}).get("displayName", "Unknown")
         task_count = member_task_counts[member_id]
         distribution_stats[member_name] = task_count
     
@@ -2073,65 +1963,39 @@ async def auto_assign_chores(household_id: str, admin_user_id: str):
         "date": today,
         "totalMembers": len(member_ids),
         "totalTasks": len(tasks),
+        "failedTasks": write_result["failed"],
+        "unassignedTasks": unassigned_tasks,
+        "strategy": strategy.value,
         "isReset": is_reset
     }
 
+@api_router.post("/households/{household_id}/member-capacity")
+async def set_member_capacity(household_id: str, request: MemberCapacityRequest):
+    """Admin caps how much effort (basePoints) effort-balanced assignment gives each member"""
+    admin = await user_loader().load(request.adminUserId)
+    if not admin or admin.get("householdId") != household_id or admin.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Only household admin can set member capacity")
+    if any(capacity < 0 for capacity in request.capacities.values()):
+        raise HTTPException(status_code=400, detail="Capacity cannot be negative")
+    
+    result = await db.households.update_one(
+        {"householdId": household_id},
+        {"$set": {"memberCapacity": request.capacities}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Household not found")
+    
+    return {"householdId": household_id, "memberCapacity": request.capacities}
+
 @api_router.get("/households/{household_id}/stats")
 async def get_household_stats(household_id: str):
     """Get household statistics including member list, assignment status, and daily progress"""
-    household = await db.households.find_one({"householdId": household_id})
-    if not household:
-        raise HTTPException(status_code=404, detail="Household not found")
-    
-    # Get all members
-    members = []
-    for member_id in household.get("memberIds", []):
-        user = await db.users.find_one({"userId": member_id})
-        if user:
-            members.append({
-                "userId": user["userId"],
-                "displayName": user["displayName"],
-                "role": user.get("role", "member"),
-                "level": user.get("level", 1),
-                "points": user.get("points", 0)
-            })
-    
-    # Get today's task assignments
     today = datetime.utcnow().strftime('%Y-%m-%d')
-    tasks_today = await db.tasks.find({
-        "householdId": household_id,
-        "date": today
-    }).to_list(1000)
-    
-    # Calculate completion stats
-    total_tasks = len(tasks_today)
-    completed_tasks = sum(1 for task in tasks_today if task.get("completed", False))
-    
-    # Per-member task counts
-    member_task_counts = {}
-    for task in tasks_today:
-        assigned_to = task.get("assignedTo")
-        if assigned_to:
-            member_task_counts[assigned_to] = member_task_counts.get(assigned_to, 0) + 1
+    stats = await fetch_household_stats(secondary_db, household_id, today)
+    if not stats:
+        raise HTTPException(status_code=404, detail="Household not found")
     
-    return {
-        "householdId": household_id,
-        "householdType": household.get("householdType", "other"),
-        "creatorName": household.get("creatorName"),
-        "adventureTheme": household.get("adventureTheme"),
-        "isActive": household.get("isActive", False),
-        "choresAssigned": household.get("choresAssigned", False),
-        "lastAssignedDate": household.get("lastAssignedDate"),
-        "members": members,
-        "memberCount": len(members),
-        "maxMembers": household.get("memberLimit", 12),
-        "todayStats": {
-            "totalTasks": total_tasks,
-            "completedTasks": completed_tasks,
-            "completionRate": (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
-            "tasksPerMember": member_task_counts
-        }
-    }
+    return stats
 
 
 # NEW: Chore Swap Endpoints
@@ -2139,8 +2003,7 @@ async def get_household_stats(household_id: str):
 async def request_chore_swap(request: RequestChoreSwapRequest):
     """Request to swap a chore with another household member"""
     # Verify both users exist and are in same household
-    requester = await db.users.find_one({"userId": request.requesterId})
-    target = await db.users.find_one({"userId": request.targetId})
+    requester, target = await user_loader().load_many([request.requesterId, request.targetId])
     
     if not requester or not target:
         raise HTTPException(status_code=404, detail="User not found")
@@ -2149,7 +2012,7 @@ async def request_chore_swap(request: RequestChoreSwapRequest):
         raise HTTPException(status_code=400, detail="Users must be in same household")
     
     # Verify task exists and is assigned to requester
-    task = await db.tasks.find_one({"taskId": request.taskId})
+    task = await fetch_one(db.tasks, {"taskId": request.taskId}, "task_assignment")
     if not task or task.get("assignedTo") != request.requesterId:
         raise HTTPException(status_code=400, detail="Task not assigned to requester")
     
@@ -2175,20 +2038,23 @@ async def request_chore_swap(request: RequestChoreSwapRequest):
     }
 
 @api_router.get("/tasks")
-async def get_household_tasks(householdId: str, date: str = None):
-    """Get all tasks for a household, optionally filtered by date"""
+async def get_household_tasks(response: Response, householdId: str, date: str = None,
+                              limit: int = 1000, cursor: Optional[str] = None):
+    """Get a page of tasks for a household, optionally filtered by date (next page cursor in X-Next-Cursor)"""
     try:
         query = {"householdId": householdId}
         if date:
             query["date"] = date
         
-        tasks = await db.tasks.find(query).to_list(1000)
-        
-        # Remove MongoDB _id field
-        for task in tasks:
-            task.pop('_id', None)
+        tasks, next_cursor = await page_or_400(fetch_page(
+            db.tasks, query, "task_card", "date", "taskId", limit, cursor
+        ))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
         return tasks
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching tasks: {e}")
         return []
@@ -2197,32 +2063,28 @@ async def get_household_tasks(householdId: str, date: str = None):
 async def complete_task(task_id: str, request: CompleteTaskRequest):
     """Complete a task and award XP with progression tracking"""
     try:
-        # Find the user
-        user = await db.users.find_one({"userId": request.userId}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Find the task
-        task = await db.tasks.find_one({"taskId": task_id}, {"_id": 0})
-        if not task:
-            raise HTTPException(status_code=404, detail="Task not found")
-        
-        # Verify the user is assigned to this task
-        if task.get("assignedTo") != request.userId:
-            raise HTTPException(status_code=403, detail="You can only complete tasks assigned to you")
-        
-        # Check if already completed
-        if task.get("completed"):
-            raise HTTPException(status_code=400, detail="Task already completed")
+        # Claim the task and award XP atomically (a concurrent tap cannot double-award)
+        try:
+            completion = await complete_task_atomically(
+                db, task_id, request.userId,
+                level_for=lambda points: calculate_level(points)[0],
+                bonus_points=request.bonusPoints or 0,
+                notes=request.notes,
+                photo=request.photo,
+                client=client if transactions_enabled else None
+            )
+        except CompletionRejected as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        leaderboards.record(completion["user"])
         
-        # Calculate XP earned
-        base_points = task.get("basePoints", 10)
-        bonus_points = request.bonusPoints or 0
-        total_xp_earned = base_points + bonus_points
+        task = completion["task"]
+        base_points = completion["basePoints"]
+        bonus_points = completion["bonusPoints"]
+        total_xp_earned = completion["xpEarned"]
         
         # Calculate old and new progression
-        old_points = user.get("points", 0)
-        new_points = old_points + total_xp_earned
+        old_points = completion["oldPoints"]
+        new_points = completion["newPoints"]
         
         old_level, old_talent_points = calculate_level(old_points)
         new_level, new_talent_points = calculate_level(new_points)
@@ -2237,39 +2099,6 @@ async def complete_task(task_id: str, request: CompleteTaskRequest):
         leveled_up = new_level > old_level
         talent_points_gained = new_talent_points - old_talent_points
         
-        # Update user in database
-        await db.users.update_one(
-            {"userId": request.userId},
-            {"$set": {
-                "points": new_points,
-                "level": new_level
-            }}
-        )
-        
-        # Mark task as complete
-        await db.tasks.update_one(
-            {"taskId": task_id},
-            {"$set": {
-                "completed": True,
-                "completedAt": datetime.now(timezone.utc).isoformat(),
-                "completedBy": request.userId
-            }}
-        )
-        
-        # Record completion in history
-        completion_record = {
-            "completionId": str(uuid.uuid4()),
-            "userId": request.userId,
-            "taskId": task_id,
-            "householdId": user.get("householdId"),
-            "pointsEarned": base_points,
-            "bonusPoints": bonus_points,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "notes": request.notes,
-            "photo": request.photo
-        }
-        await db.task_completions.insert_one(completion_record)
-        
         # Build response
         response = {
             "success": True,
@@ -2306,13 +2135,13 @@ async def complete_task(task_id: str, request: CompleteTaskRequest):
 
 async def respond_to_chore_swap(request: RespondChoreSwapRequest):
     """Accept or decline a chore swap request"""
-    swap = await db.chore_swaps.find_one({"swapId": request.swapId})
+    swap = await fetch_one(db.chore_swaps, {"swapId": request.swapId}, "chore_swap")
     if not swap:
         raise HTTPException(status_code=404, detail="Swap request not found")
     
     if request.response == "accept":
         # Swap the task assignments
-        task = await db.tasks.find_one({"taskId": swap["taskId"]})
+        task = await fetch_one(db.tasks, {"taskId": swap["taskId"]}, "task_assignment")
         
         await db.tasks.update_one(
             {"taskId": swap["taskId"]},
@@ -2342,26 +2171,22 @@ async def respond_to_chore_swap(request: RespondChoreSwapRequest):
         }
 
 @api_router.get("/chore-swaps/{household_id}/pending")
-async def get_pending_swaps(household_id: str, user_id: str):
-    """Get all pending swap requests for a user"""
-    swaps = await db.chore_swaps.find({
+async def get_pending_swaps(household_id: str, user_id: str, limit: int = 100, cursor: Optional[str] = None):
+    """Get a page of pending swap requests for a user, oldest first"""
+    swaps, next_cursor = await page_or_400(fetch_page(db.chore_swaps, {
         "householdId": household_id,
         "targetId": user_id,
         "status": "pending"
-    }).to_list(100)
-    
-    for swap in swaps:
-        swap.pop('_id', None)
+    }, "chore_swap", "created_at", "swapId", limit, cursor))
     
-    return {"swaps": swaps}
+    return {"swaps": swaps, "nextCursor": next_cursor}
 
 # NEW: Mini-Game Challenge Endpoints
 @api_router.post("/mini-game-challenges/create")
 async def create_mini_game_challenge(request: CreateMiniGameChallengeRequest):
     """Challenge another household member to a mini-game for a task"""
     # Verify both users exist
-    challenger = await db.users.find_one({"userId": request.challengerId})
-    challenged = await db.users.find_one({"userId": request.challengedId})
+    challenger, challenged = await user_loader().load_many([request.challengerId, request.challengedId])
     
     if not challenger or not challenged:
         raise HTTPException(status_code=404, detail="User not found")
@@ -2370,7 +2195,7 @@ async def create_mini_game_challenge(request: CreateMiniGameChallengeRequest):
         raise HTTPException(status_code=400, detail="Users must be in same household")
     
     # Verify task
-    task = await db.tasks.find_one({"taskId": request.taskId})
+    task = await fetch_one(db.tasks, {"taskId": request.taskId}, "task_assignment")
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
@@ -2399,7 +2224,7 @@ async def create_mini_game_challenge(request: CreateMiniGameChallengeRequest):
 @api_router.post("/mini-game-challenges/complete")
 async def complete_mini_game_challenge(request: CompleteMiniGameRequest):
     """Record the winner of a mini-game challenge"""
-    challenge = await db.mini_game_challenges.find_one({"challengeId": request.challengeId})
+    challenge = await fetch_one(db.mini_game_challenges, {"challengeId": request.challengeId}, "mini_game_challenge")
     if not challenge:
         raise HTTPException(status_code=404, detail="Challenge not found")
     
@@ -2421,9 +2246,8 @@ async def complete_mini_game_challenge(request: CompleteMiniGameRequest):
         {"$set": {"assignedTo": loser_id}}
     )
     
-    winner = await db.users.find_one({"userId": request.winnerId})
-    loser = await db.users.find_one({"userId": loser_id})
-    task = await db.tasks.find_one({"taskId": challenge["taskId"]})
+    winner, loser = await user_loader().load_many([request.winnerId, loser_id])
+    task = await fetch_one(db.tasks, {"taskId": challenge["taskId"]}, "task_assignment")
     
     return {
         "message": f"🏆 {winner['displayName']} wins! {loser['displayName']} gets the task: {task['title']}",
@@ -2432,18 +2256,15 @@ async def complete_mini_game_challenge(request: CompleteMiniGameRequest):
     }
 
 @api_router.get("/mini-game-challenges/{household_id}/pending")
-async def get_pending_challenges(household_id: str, user_id: str):
-    """Get all pending challenges for a user"""
-    challenges = await db.mini_game_challenges.find({
+async def get_pending_challenges(household_id: str, user_id: str, limit: int = 100, cursor: Optional[str] = None):
+    """Get a page of pending challenges for a user, oldest first"""
+    challenges, next_cursor = await page_or_400(fetch_page(db.mini_game_challenges, {
         "householdId": household_id,
         "$or": [{"challengerId": user_id}, {"challengedId": user_id}],
         "status": "pending"
-    }).to_list(100)
+    }, "mini_game_challenge", "created_at", "challengeId", limit, cursor))
     
-    for challenge in challenges:
-        challenge.pop('_id', None)
-    
-    return {"challenges": challenges}
+    return {"challenges": challenges, "nextCursor": next_cursor}
 
 
 @api_router.post("/users", response_model=User)
@@ -2451,12 +2272,12 @@ async def create_user(request: CreateUserRequest):
     """Create a new user and link to couple"""
     if request.householdCode:
         # Find couple by invite code
-        couple = await db.couples.find_one({"inviteCode": request.householdCode})
+        couple = await fetch_one(db.couples, {"inviteCode": request.householdCode}, "couple_membership")
         if not couple:
             raise HTTPException(status_code=404, detail="Invalid invitation code")
         
         # Check if there's already a user for this couple (creator)
-        existing_user = await db.users.find_one({"coupleId": couple["coupleId"]})
+        existing_user = await fetch_one(db.users, {"coupleId": couple["coupleId"]}, "user_identity")
         
         if not existing_user:
             # This is the creator joining their own couple
@@ -2515,75 +2336,121 @@ async def create_user(request: CreateUserRequest):
 @api_router.get("/users/{user_id}")
 async def get_user(user_id: str):
     """Get user with calculated level and talent points"""
-    user = await db.users.find_one({"userId": user_id})
+    user = await fetch_one(db.users, {"userId": user_id}, "user_profile")
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    user.pop('_id', None)
-    
     # Calculate current level and available talent points
     level, talent_points_earned = calculate_level(user.get("points", 0))
-    talent_points_used = len(user.get("talentBuild", {}).get("nodeIds", []))
+    talent_points_used = len(build_node_ids(user.get("talentBuild")))
     available_talent_points = talent_points_earned - talent_points_used
     
+    user["talentBuild"] = public_build(user.get("talentBuild"))
     user["level"] = level
     user["talentPoints"] = available_talent_points
     user["talentPointsTotal"] = talent_points_earned
     
     return user
 
+@api_router.get("/users/{user_id}/points-ledger")
+async def get_points_ledger_balance(user_id: str, asOf: Optional[datetime] = None):
+    """Ledger balance now (latest snapshot + tail) or as of a point in time"""
+    if asOf is not None:
+        # Ledger times are naive UTC
+        if asOf.tzinfo is not None:
+            asOf = asOf.astimezone(timezone.utc).replace(tzinfo=None)
+        result = await points_ledger.balance_as_of(db, user_id, asOf)
+    else:
+        # From the primary: a secondary may not have the player's latest award yet
+        result = await points_ledger.balance(db, user_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No points ledger for this user at that time")
+    return {"userId": user_id, "asOf": asOf, **result}
+
+async def leaderboard_rows(entries) -> List[Dict[str, Any]]:
+    """(userId, points, rank) entries with each player's displayName"""
+    users = await user_loader().load_many([user_id for user_id, _, _ in entries])
+    return [{"rank": rank, "userId": user_id, "displayName": (user or {}).get("displayName"), "points": points}
+            for (user_id, points, rank), user in zip(entries, users)]
+
+@api_router.get("/leaderboard")
+async def get_global_leaderboard(limit: int = 10):
+    """Top players across every household"""
+    entries = await leaderboards.global_top(max(1, min(limit, 100)))
+    return {"players": len(leaderboards.global_index), "leaders": await leaderboard_rows(entries)}
+
+@api_router.get("/households/{household_id}/leaderboard")
+async def get_household_leaderboard(household_id: str, limit: int = 10):
+    """Top players in one household"""
+    board = await leaderboards.household(household_id)
+    if not len(board):
+        raise HTTPException(status_code=404, detail="Household not found")
+    entries = board.top(max(1, min(limit, 100)))
+    return {"householdId": household_id, "players": len(board), "leaders": await leaderboard_rows(entries)}
+
+@api_router.get("/leaderboard/users/{user_id}")
+async def get_leaderboard_rank(user_id: str):
+    """A player's global and household rank"""
+    user = await user_loader().load(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    household_rank = None
+    if user.get("householdId"):
+        board = await leaderboards.household(user["householdId"])
+        household_rank = board.rank(user_id)
+    return {
+        "userId": user_id,
+        "points": user.get("points", 0),
+        "globalRank": await leaderboards.global_rank(user),
+        "householdRank": household_rank,
+    }
+
 @api_router.get("/couples/{couple_id}/tasks")
 async def get_tasks(couple_id: str):
     """Get all tasks for a couple, organized by room"""
-    tasks_cursor = db.tasks.find({})
-    tasks = []
-    async for task in tasks_cursor:
-        task.pop('_id', None)
-        tasks.append(task)
-    
-    # Organize by room
-    organized_tasks = {}
-    for task in tasks:
-        room = task["room"]
-        if room not in organized_tasks:
-            organized_tasks[room] = []
-        organized_tasks[room].append(task)
+    organized_tasks = await TenantTaskQueries(db, couple_id).grouped_by_room()
+    if not organized_tasks:
+        # Legacy couples have no per-household task documents; they share the default catalog
+        organized_tasks = group_by_room(DEFAULT_TASKS)
     
     return organized_tasks
 
 @api_router.get("/couples/{couple_id}/odds/{date}")
 async def get_daily_odds(couple_id: str, date: str):
     """Get or compute daily task assignment odds"""
-    odds = await db.daily_odds.find_one({"coupleId": couple_id, "date": date})
+    odds = await fetch_one(db.daily_odds, {"coupleId": couple_id, "date": date}, "daily_odds")
     if not odds:
-        # Compute new odds
-        task_odds = compute_daily_odds(couple_id, date)
+        # Compute new odds (or reuse them if this couple's odds were computed recently)
+        task_odds = await cached_daily_odds(couple_id, date)
         new_odds = DailyOdds(
             date=date,
             coupleId=couple_id,
             taskOdds=task_odds
         )
-        await db.daily_odds.insert_one(new_odds.dict())
+        try:
+            await db.daily_odds.insert_one(new_odds.dict())
+        except DuplicateKeyError:
+            # A concurrent request stored today's odds first
+            odds = await fetch_one(db.daily_odds, {"coupleId": couple_id, "date": date}, "daily_odds")
+            return odds
         return new_odds.dict()
     
-    odds.pop('_id', None)
     return odds
 
 @api_router.get("/couples/{couple_id}/assignments/{date}")
 async def get_daily_assignments(couple_id: str, date: str):
     """Get daily task assignments for a couple"""
     # Check if assignments already exist for this date
-    existing = await db.daily_assignments.find_one({
+    existing = await fetch_one(db.daily_assignments, {
         "coupleId": couple_id,
         "date": date
-    })
+    }, "daily_assignments")
     
     if existing:
-        existing.pop('_id', None)
         return existing
     
     # Generate new assignments
-    assignments = generate_daily_assignments(couple_id, date)
+    assignments = generate_daily_assignments(couple_id, date, await cached_daily_odds(couple_id, date))
     
     # Store in database
     assignment_doc = {
@@ -2593,10 +2460,37 @@ async def get_daily_assignments(couple_id: str, date: str):
         "created_at": datetime.utcnow()
     }
     
-    await db.daily_assignments.insert_one(assignment_doc)
+    try:
+        await db.daily_assignments.insert_one(assignment_doc)
+    except DuplicateKeyError:
+        # A concurrent request stored today's assignments first
+        return await fetch_one(db.daily_assignments, {"coupleId": couple_id, "date": date}, "daily_assignments")
     
+    assignment_doc.pop('_id', None)
     return assignment_doc
 
+def require_admin_token(token: Optional[str]):
+    """Ops endpoints need the ADMIN_API_TOKEN header; they are disabled while it is unset"""
+    expected = os.environ.get('ADMIN_API_TOKEN')
+    if not expected or not token or not secrets.compare_digest(token, expected):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@api_router.get("/admin/assignments/{date}/export")
+async def export_daily_assignments(date: str, x_admin_token: Optional[str] = Header(None)):
+    """Every active household's assignments for a date as NDJSON (generated where missing)"""
+    require_admin_token(x_admin_token)
+    try:
+        datetime.strptime(date, '%Y-%m-%d')
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Date must be YYYY-MM-DD")
+    
+    return StreamingResponse(
+        export_lines(db, date, get_daily_assignments),
+        media_type=NDJSON,
+        # Keep proxies from buffering the whole export
+        headers={"X-Accel-Buffering": "no", "Cache-Control": "no-store"}
+    )
+
 @api_router.get("/couples/{couple_id}/my-tasks/{user_id}")
 async def get_my_daily_tasks(couple_id: str, user_id: str, date: str = None):
     """Get only the tasks assigned to a specific user for today"""
@@ -2607,21 +2501,21 @@ async def get_my_daily_tasks(couple_id: str, user_id: str, date: str = None):
     assignments = await get_daily_assignments(couple_id, date)
     user_assignments = assignments.get("assignments", {})
     
-    # Get all tasks
-    tasks = await db.tasks.find().to_list(1000)
-    # Remove ObjectId fields for JSON serialization
-    for task in tasks:
-        task.pop('_id', None)
-    tasks_by_id = {task["taskId"]: task for task in tasks}
-    
     # Get couple users to determine which user is "user1" or "user2"
-    users = await db.users.find({"coupleId": couple_id}).to_list(2)
-    user_key = "user1" if users[0]["userId"] == user_id else "user2"
+    users = await fetch_many(db.users, {"coupleId": couple_id}, "user_identity").to_list(2)
+    user_key = "user1" if users and users[0]["userId"] == user_id else "user2"
+    
+    # Fetch only this user's assigned tasks; ids missing from the household fall back to its chore catalog
+    my_task_ids = [task_id for task_id, assigned_to in user_assignments.items() if assigned_to == user_key]
+    tasks_by_id = await TenantTaskQueries(db, couple_id).by_ids(my_task_ids)
+    missing = set(my_task_ids) - set(tasks_by_id)
+    if missing:
+        tasks_by_id.update({task["taskId"]: task for task in await scope_tasks(couple_id) if task["taskId"] in missing})
     
-    # Filter tasks assigned to this user
+    # Group this user's tasks by room
     my_tasks = {}
-    for task_id, assigned_to in user_assignments.items():
-        if assigned_to == user_key and task_id in tasks_by_id:
+    for task_id in my_task_ids:
+        if task_id in tasks_by_id:
             task = tasks_by_id[task_id]
             room = task["room"]
             if room not in my_tasks:
@@ -2633,29 +2527,28 @@ async def get_my_daily_tasks(couple_id: str, user_id: str, date: str = None):
 @api_router.post("/builds/submit")
 async def submit_talent_build(request: SubmitTalentBuildRequest):
     """Submit talent tree build for a user"""
-    user = await db.users.find_one({"userId": request.userId})
+    user = await fetch_one(db.users, {"userId": request.userId}, "user_build")
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Validate talent points available
+    # Validate prerequisites, premium tiers and talent points available
     _, talent_points_earned = calculate_level(user["points"])
-    talent_points_used = len(request.talentBuild.get("nodeIds", []))
-    
-    # Calculate total cost
-    total_cost = 0
-    for node_id in request.talentBuild.get("nodeIds", []):
-        if node_id in TALENT_TREE_NODES:
-            total_cost += TALENT_TREE_NODES[node_id]["costTalentPoints"]
-    
-    if total_cost > talent_points_earned:
-        raise HTTPException(status_code=400, detail="Not enough talent points")
+    try:
+        talent_tree.validate(request.talentBuild.get("nodeIds", []), talent_points_earned,
+                             user.get("premium_access", False))
+    except BuildRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Update user's talent build
     await db.users.update_one(
         {"userId": request.userId},
-        {"$set": {"talentBuild": request.talentBuild}}
+        {"$set": {"talentBuild": encode_build(request.talentBuild)}}
     )
     
+    # Odds cached for this player's couple/household were computed from the old build
+    odds_cache.invalidate(user.get("coupleId"))
+    odds_cache.invalidate(user.get("householdId"))
+    
     return {"message": "Talent build submitted successfully"}
 
 @api_router.get("/talent-nodes")
@@ -2678,16 +2571,28 @@ async def get_talent_nodes():
 
 # Get talent tree nodes (updated for 10-tier system)
 @api_router.get("/talent-tree")
-async def get_talent_tree():
-    """Get all talent tree nodes for the new 10-tier system"""
-    return {"nodes": NEW_TALENT_TREE_NODES}
+async def get_talent_tree(userId: Optional[str] = None):
+    """Get all talent tree nodes for the new 10-tier system, plus a player's unlock frontier if userId is given"""
+    response = {"nodes": NEW_TALENT_TREE_NODES, "order": talent_tree.order}
+    if userId:
+        # From the primary, so a build saved or a level reached a moment ago shows up
+        user = await fetch_one(db.users, {"userId": userId}, "user_build")
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        # Builds saved before validation may repeat or name removed nodes; those are skipped
+        node_ids = [node_id for node_id in dict.fromkeys(build_node_ids(user.get("talentBuild")))
+                    if node_id in talent_tree.bit]
+        _, talent_points_earned = calculate_level(user.get("points", 0))
+        response.update(talent_tree.summary(talent_tree.mask(node_ids), user.get("premium_access", False),
+                                            talent_points_earned))
+    return response
 
 # Check if user can unlock premium tiers
 @api_router.get("/talent-tree/premium-status/{user_id}")
 async def get_premium_status(user_id: str):
     """Check if user has premium access for tiers 6-10"""
     try:
-        user = await db.users.find_one({"userId": user_id})
+        user = await fetch_one(secondary_db.users, {"userId": user_id}, "user_premium")
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -2879,23 +2784,27 @@ async def send_message(request: SendMessageRequest):
 
 # Get messages for a couple
 @api_router.get("/messages/{couple_id}")
-async def get_messages(couple_id: str, limit: int = 50):
+async def get_messages(response: Response, couple_id: str, limit: int = 50, cursor: Optional[str] = None):
     """
-    Get recent messages for a couple
+    Get a page of messages for a couple, newest first.
+    Pass the X-Next-Cursor response header back as `cursor` to scroll further back.
     """
     try:
-        messages = await db.messages.find(
-            {"couple_id": couple_id}
-        ).sort("timestamp", -1).limit(limit).to_list(length=None)
-        
-        # Convert ObjectId and datetime for JSON serialization
+        messages, next_cursor = await page_or_400(fetch_page(
+            secondary_db.messages, {"couple_id": couple_id}, "message", "timestamp", "id",
+            limit, cursor, descending=True
+        ))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        
+        # Convert datetime for JSON serialization
         for message in messages:
-            if "_id" in message:
-                del message["_id"]
             message["timestamp"] = message["timestamp"].isoformat()
         
         return messages
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get messages: {str(e)}")
 
@@ -2927,6 +2836,32 @@ async def check_daily_message_status(couple_id: str, date: str, user_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to check daily message status: {str(e)}")
 
+@api_router.get("/health")
+async def health_check():
+    """Database reachability only; the details are at /metrics/db"""
+    health = await mongo.health()
+    if health["status"] != "ok":
+        return JSONResponse(status_code=503, content={"status": health["status"]})
+    return {"status": "ok"}
+
+@api_router.get("/metrics/db")
+async def get_db_metrics(x_admin_token: Optional[str] = Header(None)):
+    """Database latency, replica set topology and connection-pool usage"""
+    require_admin_token(x_admin_token)
+    return await mongo.health()
+
+@api_router.get("/metrics/odds-cache")
+async def get_odds_cache_metrics(x_admin_token: Optional[str] = Header(None)):
+    """Odds cache size, hit/miss counts and evictions (for sizing ODDS_CACHE_SIZE)"""
+    require_admin_token(x_admin_token)
+    return odds_cache.metrics()
+
+@api_router.get("/metrics/task-catalogs")
+async def get_task_catalog_metrics(x_admin_token: Optional[str] = Header(None)):
+    """Compiled catalog cache memory use and hit rate (for sizing TASK_CATALOG_CACHE_BYTES)"""
+    require_admin_token(x_admin_token)
+    return task_catalogs.metrics()
+
 @api_router.get("/game-constants")
 async def get_game_constants():
     """Get game constants for frontend"""
@@ -2943,12 +2878,12 @@ async def get_quest_templates():
 async def takeover_task(task_id: str, request: TakeoverTaskRequest):
     """Allow one partner to take over another's task for 3x points"""
     # Find the task
-    task = await db.tasks.find_one({"taskId": task_id})
+    task = await fetch_one(db.tasks, {"taskId": task_id}, "task_takeover")
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
     # Find user and verify they're in a couple
-    user = await db.users.find_one({"userId": request.userId})
+    user = await fetch_one(db.users, {"userId": request.userId}, "user_identity")
     if not user or not user.get("coupleId"):
         raise HTTPException(status_code=404, detail="User not found or not in couple")
     
@@ -2957,11 +2892,11 @@ async def takeover_task(task_id: str, request: TakeoverTaskRequest):
         raise HTTPException(status_code=400, detail="This task cannot be taken over")
     
     # Check for existing takeover
-    existing_takeover = await db.takeovers.find_one({
+    existing_takeover = await fetch_one(db.takeovers, {
         "taskId": task_id, 
         "coupleId": user["coupleId"],
         "completed": False
-    })
+    }, "takeover_exists")
     if existing_takeover:
         raise HTTPException(status_code=400, detail="Task already taken over")
     
@@ -3000,13 +2935,12 @@ async def get_daily_couple_question(couple_id: str):
     today = datetime.utcnow().strftime("%Y-%m-%d")
     
     # Check if couple already has a question for today
-    existing_question = await db.couple_questions.find_one({
+    existing_question = await fetch_one(db.couple_questions, {
         "coupleId": couple_id,
         "date": today
-    })
+    }, "couple_question")
     
     if existing_question:
-        existing_question.pop('_id', None)
         return existing_question
     
     # Create new daily question
@@ -3026,16 +2960,16 @@ async def get_daily_couple_question(couple_id: str):
 @api_router.post("/couple-questions/{question_id}/answer")
 async def submit_couple_answer(question_id: str, request: SubmitCoupleAnswerRequest):
     """Submit answer and guess for couple question"""
-    question = await db.couple_questions.find_one({"questionId": question_id})
+    question = await fetch_one(db.couple_questions, {"questionId": question_id}, "couple_question")
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
-    user = await db.users.find_one({"userId": request.userId})
+    user = await user_loader().load(request.userId)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Determine if this is player 1 or 2 based on couple setup
-    couple = await db.couples.find_one({"coupleId": user["coupleId"]})
+    couple = await fetch_one(db.couples, {"coupleId": user["coupleId"]}, "couple_membership")
     is_player1 = user["userId"] == couple["creatorId"]
     
     # Update the question with user's answer and guess
@@ -3053,7 +2987,7 @@ async def submit_couple_answer(question_id: str, request: SubmitCoupleAnswerRequ
     )
     
     # Check if both partners have answered
-    updated_question = await db.couple_questions.find_one({"questionId": question_id})
+    updated_question = await fetch_one(db.couple_questions, {"questionId": question_id}, "couple_question")
     if (updated_question.get("player1_answer") and updated_question.get("player2_answer") and 
         updated_question.get("player1_guess") and updated_question.get("player2_guess")):
         
@@ -3070,16 +3004,10 @@ async def submit_couple_answer(question_id: str, request: SubmitCoupleAnswerRequ
             points_awarded += GAME_CONSTANTS["COUPLE_QUESTIONS"]["MATCH_BONUS"]
         
         # Award points to both users
-        await db.users.update_one(
-            {"userId": couple["creatorId"]}, 
-            {"$inc": {"points": points_awarded // 2}}
-        )
+        await award_points(couple["creatorId"], points_awarded // 2, "couple_question", question_id)
         
         if couple.get("partnerId"):
-            await db.users.update_one(
-                {"userId": couple["partnerId"]}, 
-                {"$inc": {"points": points_awarded // 2}}
-            )
+            await award_points(couple["partnerId"], points_awarded // 2, "couple_question", question_id)
         
         # Mark question as completed
         await db.couple_questions.update_one(
@@ -3099,7 +3027,7 @@ async def submit_couple_answer(question_id: str, request: SubmitCoupleAnswerRequ
 @api_router.post("/daily-logs")
 async def submit_daily_log(request: SubmitDailyLogRequest):
     """Submit daily observation/message about partner"""
-    user = await db.users.find_one({"userId": request.userId})
+    user = await fetch_one(db.users, {"userId": request.userId}, "user_progress")
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -3118,12 +3046,9 @@ async def submit_daily_log(request: SubmitDailyLogRequest):
     await db.daily_logs.insert_one(log.dict())
     
     # Award points for reflective mind talent if user has it
-    if user.get("talentBuild", {}).get("nodeIds") and "pg_reflective_mind" in user["talentBuild"]["nodeIds"]:
+    if has_node(user.get("talentBuild"), "pg_reflective_mind"):
         bonus_points = 5
-        await db.users.update_one(
-            {"userId": request.userId},
-            {"$inc": {"points": bonus_points}}
-        )
+        await award_points(request.userId, bonus_points, "reflective_mind", log.logId)
         
         # Notify user
         await manager.send_to_couple(user["coupleId"], {
@@ -3137,7 +3062,7 @@ async def submit_daily_log(request: SubmitDailyLogRequest):
 @api_router.post("/verification/{completion_id}/respond")  
 async def respond_to_verification(completion_id: str, request: RespondVerificationRequest):
     """Respond to a verification request (verify, decline, request_proof)"""
-    verification = await db.verification_requests.find_one({"verificationId": request.verificationId})
+    verification = await fetch_one(db.verification_requests, {"verificationId": request.verificationId}, "verification_request")
     if not verification:
         raise HTTPException(status_code=404, detail="Verification request not found")
     
@@ -3145,7 +3070,7 @@ async def respond_to_verification(completion_id: str, request: RespondVerificati
     if datetime.utcnow() > verification["expires_at"]:
         raise HTTPException(status_code=400, detail="Verification request has expired")
     
-    completion = await db.task_completions.find_one({"completionId": completion_id})
+    completion = await fetch_one(db.task_completions, {"completionId": completion_id}, "task_completion_record")
     if not completion:
         raise HTTPException(status_code=404, detail="Task completion not found")
     
@@ -3158,10 +3083,7 @@ async def respond_to_verification(completion_id: str, request: RespondVerificati
     if request.response == "verify":
         # Award verification bonus points
         bonus = GAME_CONSTANTS["VERIFICATION"]["PARTNER_VERIFIES_BONUS"]
-        await db.users.update_one(
-            {"userId": completion["userId"]},
-            {"$inc": {"points": bonus}}
-        )
+        await award_points(completion["userId"], bonus, "verification", completion_id)
         
         # Mark completion as verified
         await db.task_completions.update_one(
@@ -3185,7 +3107,7 @@ async def get_enhanced_tasks_for_couple(couple_id: str, date: Optional[str] = No
         date = datetime.utcnow().strftime("%Y-%m-%d")
     
     # Get couple's preferences and talent builds
-    couple = await db.couples.find_one({"coupleId": couple_id})
+    couple = await fetch_one(db.couples, {"coupleId": couple_id}, "couple_membership")
     if not couple:
         raise HTTPException(status_code=404, detail="Couple not found")
     
@@ -3262,17 +3184,51 @@ async def websocket_endpoint(websocket: WebSocket, couple_id: str):
 # Include router and middleware
 app.include_router(api_router)
 
+@app.middleware("http")
+async def request_scoped_user_loader(request, call_next):
+    """Give each request its own user loader so lookups batch and cache per request"""
+    token = current_user_loader.set(UserLoader(db.users))
+    try:
+        return await call_next(request)
+    finally:
+        current_user_loader.reset(token)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
+@app.on_event("startup")
+async def detect_transaction_support():
+    global transactions_enabled
+    transactions_enabled = await transactions_supported(client)
+
+@app.on_event("startup")
+async def ensure_db_indexes():
+    await ensure_indexes(db)
+    # Test mode: refuse to start if any endpoint query would scan a whole collection
+    if os.environ.get('MONGO_INDEX_EXPLAIN') == '1':
+        await verify_query_plans(db)
+
+@app.on_event("startup")
+async def load_leaderboards():
+    # In the background: the first leaderboard request waits for it, nothing else does
+    async def load():
+        try:
+            await leaderboards.ensure_loaded()
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Global leaderboard load failed: {e}")
+    asyncio.ensure_future(load())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    # Ledger events awarded just before shutdown still need their seq
+    await points_ledger.flush()
+    mongo.close()
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+Compact, versioned storage for talent builds.
+
+User documents used to store a build's nodes as `talentBuild.nodeIds`, a
+list of node id strings. Endpoints scanned that list for membership and
+shipped all of it on every user read. A build is now stored as
+`{"v": 1, "nodeBits": ...}`, where bit i is set when the build has
+NODE_BITS[1][i]. Masks that fit in a signed int64 are stored as Mongo
+integers and larger ones as little-endian bytes. Other keys in the build
+(the odds engine's talent flags) are kept as they are.
+
+Bit positions are permanent. New nodes are appended to the table and a
+removed node keeps its slot. A table is only replaced, under a new
+version, if positions have to change, and old versions stay decodable.
+Builds still in the `nodeIds` form decode as before until the migration
+below has converted them:
+
+    cd backend && python -m talent_codec --batch-size 1000
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+import bson
+from pymongo import UpdateOne
+
+from repository import fetch_many
+
+logger = logging.getLogger(__name__)
+
+BUILD_VERSION = 1
+
+NODE_BITS: Dict[int, Tuple[str, ...]] = {
+    1: (
+        "hh_dish_duty", "hh_laundry_legends", "hh_pet_patrol", "hh_vehicle_vanguard", "hh_tag_team_clean",
+        "hh_efficiency_expert", "hh_sanctuary_sensei", "hh_green_guardian", "hh_homebound_hero",
+        "hh_keeper_of_keep",
+        "cq_quality_quest", "cq_compliment_chain", "cq_shared_goal_setter", "cq_verification_bonus",
+        "cq_take_one_for_love", "cq_bond_builder", "cq_empathy_echo", "cq_harmony_halo", "cq_unity_upgrade",
+        "cq_soul_sync",
+        "pg_routine_rookie", "pg_reflective_learner", "pg_zen_mode", "pg_mindful_mirror", "pg_mood_manager",
+        "pg_self_soother", "pg_balance_buff", "pg_growth_guardian", "pg_altruist_aura", "pg_enlightened_partner",
+    ),
+}
+_POSITIONS: Dict[int, Dict[str, int]] = {
+    version: {node_id: position for position, node_id in enumerate(table)} for version, table in NODE_BITS.items()
+}
+INT64_LIMIT = 1 << 63
+
+NodeBits = Union[int, bytes]
+
+
+def unregistered(node_ids: Iterable[str]) -> List[str]:
+    """Node ids without a bit in the current table (append them to NODE_BITS[BUILD_VERSION])"""
+    return [node_id for node_id in node_ids if node_id not in _POSITIONS[BUILD_VERSION]]
+
+
+def encode_nodes(node_ids: Iterable[str], version: int = BUILD_VERSION) -> NodeBits:
+    """Node ids as a mask: an int when it fits in a signed int64, little-endian bytes otherwise"""
+    positions = _POSITIONS[version]
+    mask = 0
+    for node_id in node_ids:
+        if node_id not in positions:
+            raise ValueError(f"Talent node {node_id} has no bit in build version {version}")
+        mask |= 1 << positions[node_id]
+    if mask < INT64_LIMIT:
+        return mask
+    return mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+
+
+def _mask(bits: NodeBits) -> int:
+    return int.from_bytes(bits, "little") if isinstance(bits, (bytes, bytearray)) else int(bits)
+
+
+def decode_nodes(bits: NodeBits, version: int = BUILD_VERSION) -> List[str]:
+    """Node ids in a mask, in bit order"""
+    if version not in NODE_BITS:
+        raise ValueError(f"Unknown talent build version {version}")
+    table = NODE_BITS[version]
+    mask = _mask(bits)
+    node_ids = []
+    while mask:
+        low = mask & -mask
+        node_ids.append(table[low.bit_length() - 1])
+        mask ^= low
+    return node_ids
+
+
+def is_encoded(build: Optional[Dict]) -> bool:
+    return bool(build) and "nodeBits" in build
+
+
+def encode_build(build: Optional[Dict]) -> Dict:
+    """The storage form of a build; builds already encoded are returned unchanged"""
+    build = build or {}
+    if is_encoded(build):
+        return build
+    encoded = {key: value for key, value in build.items() if key != "nodeIds"}
+    encoded["v"] = BUILD_VERSION
+    encoded["nodeBits"] = encode_nodes(dict.fromkeys(build.get("nodeIds") or []))
+    return encoded
+
+
+def build_node_ids(build: Optional[Dict]) -> List[str]:
+    """A build's node ids, whichever form it is stored in"""
+    if not build:
+        return []
+    if is_encoded(build):
+        return decode_nodes(build["nodeBits"], build.get("v", BUILD_VERSION))
+    return list(build.get("nodeIds") or [])
+
+
+def has_node(build: Optional[Dict], node_id: str) -> bool:
+    """Membership test: one bit check for encoded builds"""
+    if is_encoded(build):
+        position = _POSITIONS.get(build.get("v", BUILD_VERSION), {}).get(node_id)
+        return position is not None and bool(_mask(build["nodeBits"]) >> position & 1)
+    return node_id in ((build or {}).get("nodeIds") or [])
+
+
+def build_key(build: Optional[Dict]) -> Hashable:
+    """Hashable identity of a build's nodes, without decoding encoded builds"""
+    if is_encoded(build):
+        bits = build["nodeBits"]
+        return build.get("v", BUILD_VERSION), bytes(bits) if isinstance(bits, (bytes, bytearray)) else int(bits)
+    return tuple((build or {}).get("nodeIds") or ())
+
+
+def public_build(build: Optional[Dict]) -> Dict:
+    """The `{"nodeIds": [...], ...}` shape API clients have always received"""
+    if not is_encoded(build):
+        return build or {}
+    public = {key: value for key, value in build.items() if key not in ("v", "nodeBits")}
+    public["nodeIds"] = build_node_ids(build)
+    return public
+
+
+async def migrate_builds(db, batch_size: int = 1000) -> Dict[str, Any]:
+    """Convert every user's `nodeIds` build to the bitmask form, in unordered bulk_writes of batch_size
+
+    Each update only matches while the stored build is still the one that
+    was read, so a build submitted meanwhile is never overwritten. Node ids
+    without a bit are dropped and counted. Safe to rerun.
+    """
+    report = {"scanned": 0, "converted": 0, "changedMeanwhile": 0, "droppedNodes": 0, "bytesSaved": 0}
+    started = time.perf_counter()
+    operations = []
+
+    async def flush():
+        result = await db.users.bulk_write(operations, ordered=False)
+        report["converted"] += result.modified_count
+        report["changedMeanwhile"] += len(operations) - result.matched_count
+        operations.clear()
+
+    query = {"talentBuild.nodeIds": {"$exists": True}}
+    async for user in fetch_many(db.users, query, "user_talents", batch_size=batch_size):
+        report["scanned"] += 1
+        build = user["talentBuild"]
+        node_ids = list(dict.fromkeys(build.get("nodeIds") or []))
+        dropped = unregistered(node_ids)
+        report["droppedNodes"] += len(dropped)
+        encoded = encode_build({**build, "nodeIds": [node_id for node_id in node_ids if node_id not in dropped]})
+        report["bytesSaved"] += len(bson.encode({"talentBuild": build})) - len(bson.encode({"talentBuild": encoded}))
+        operations.append(UpdateOne({"userId": user["userId"], "talentBuild": build},
+                                    {"$set": {"talentBuild": encoded}}))
+        if len(operations) == batch_size:
+            await flush()
+    if operations:
+        await flush()
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    from pathlib import Path
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Convert stored talent builds to the bitmask encoding")
+    parser.add_argument("--batch-size", type=int, default=1000, help="updates per bulk_write")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        try:
+            report = await migrate_builds(client[os.environ['DB_NAME']], args.batch_size)
+        finally:
+            client.close()
+        logger.info(f"Converted {report['converted']} of {report['scanned']} talent builds: {report}")
+
+    asyncio.run(main())
@@ -0,0 +1,163 @@
+"""
+Talent builds compiled into effect tables for task scoring.
+
+calculate_enhanced_task_points used to walk a player's nodeIds four times
+per task, looking up each node and checking its category, room and
+difficulty filters. A build is now compiled once, in node order, into
+bonus and multiplier entries plus an early-bird flag. The entries that
+apply to a (category, room, difficulty) are selected the first time that
+combination is scored and kept in a table. After that, scoring a task is
+one table lookup plus the entries that apply, which for most tasks is
+none.
+
+Compiled builds are cached by their node ids (in order, since the
+breakdown lists effects in node order), or by their bitmask for builds
+stored in talent_codec's encoding. The results, including the
+breakdown strings, match the original calculation exactly.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+from talent_codec import build_key, build_node_ids
+
+BONUS_TYPES = ("category_bonus", "first_task_bonus", "streak_bonus")
+MULTIPLIER_TYPES = ("category_multiplier", "joint_task_multiplier")
+# These only apply when the task's category equals the effect's, even if the effect has none
+EXACT_CATEGORY_TYPES = ("category_bonus", "category_multiplier")
+EARLY_BIRD_HOUR = 14
+
+TaskKey = Tuple[Any, Any, Any]
+
+
+class Effect:
+    """One bonus or multiplier from a node, with its filters and breakdown line"""
+
+    __slots__ = ("type", "amount", "label", "streak_count", "category", "room", "difficulty")
+
+    def __init__(self, node: Dict, effect: Dict):
+        self.type = effect["type"]
+        self.category = effect.get("category")
+        self.room = effect.get("room")
+        self.difficulty = effect.get("difficulty")
+        self.streak_count = effect.get("streak_count", 0)
+        name = node["name"]
+        if self.type == "category_bonus":
+            self.amount = effect.get("points", 0)
+            self.label = f"{name}: +{self.amount} pts"
+        elif self.type == "first_task_bonus":
+            self.amount = effect.get("value", 0)
+            self.label = f"{name} (First Task): +{self.amount} pts"
+        elif self.type == "streak_bonus":
+            self.amount = effect.get("bonus", 0)
+            self.label = f"{name} (Streak): +{self.amount} pts"
+        else:
+            self.amount = effect.get("multiplier", 1.0)
+            joint = " (Joint)" if self.type == "joint_task_multiplier" else ""
+            self.label = f"{name}{joint}: x{self.amount}"
+
+    def matches(self, key: TaskKey) -> bool:
+        """The parts of the effect's conditions that depend only on the task's category, room and difficulty"""
+        category, room, difficulty = key
+        if self.category and category != self.category:
+            return False
+        if self.room and room != self.room:
+            return False
+        if self.difficulty and difficulty != self.difficulty:
+            return False
+        return self.type not in EXACT_CATEGORY_TYPES or category == self.category
+
+
+class CompiledBuild:
+    """A talent build's effects, with per-(category, room, difficulty) tables filled on first use"""
+
+    __slots__ = ("bonuses", "multipliers", "early_bird", "tables")
+
+    def __init__(self, node_ids: List[str], nodes: Dict[str, Dict]):
+        self.bonuses: List[Effect] = []
+        self.multipliers: List[Effect] = []
+        self.early_bird = False
+        self.tables: Dict[TaskKey, Tuple[Tuple[Effect, ...], Tuple[Effect, ...]]] = {}
+        for node_id in node_ids:
+            node = nodes.get(node_id)
+            if node is None:
+                continue
+            effect = node["effect"]
+            effect_type = effect.get("type")
+            if effect_type in BONUS_TYPES:
+                self.bonuses.append(Effect(node, effect))
+            elif effect_type in MULTIPLIER_TYPES:
+                self.multipliers.append(Effect(node, effect))
+            elif effect_type == "time_bonus":
+                self.early_bird = True
+
+    def effects_for(self, key: TaskKey) -> Tuple[Tuple[Effect, ...], Tuple[Effect, ...]]:
+        """(bonuses, multipliers) that can apply to tasks with this (category, room, difficulty)"""
+        table = self.tables.get(key)
+        if table is None:
+            table = (tuple(effect for effect in self.bonuses if effect.matches(key)),
+                     tuple(effect for effect in self.multipliers if effect.matches(key)))
+            self.tables[key] = table
+        return table
+
+
+class TalentScorer:
+    """Scores tasks against compiled talent builds, caching each build once compiled"""
+
+    def __init__(self, nodes: Dict[str, Dict], points: Dict[str, int], maxsize: int = 4096):
+        self.nodes = nodes
+        self.points = points
+        self.builds: LRUCache = LRUCache(maxsize=maxsize)
+
+    def compile(self, user_talents: Optional[Dict]) -> CompiledBuild:
+        key = build_key(user_talents)
+        compiled = self.builds.get(key)
+        if compiled is None:
+            compiled = CompiledBuild(build_node_ids(user_talents), self.nodes)
+            self.builds[key] = compiled
+        return compiled
+
+    def score(self, task: Dict, user_talents: Optional[Dict], completion_time: datetime,
+              is_first_task: bool = False, consecutive_tasks: int = 0) -> Dict:
+        """The calculate_enhanced_task_points result for this task"""
+        compiled = self.compile(user_talents)
+        difficulty = task.get("difficulty", "EASY")
+        base = self.points[difficulty]
+        breakdown = [f"Base {difficulty}: {base} pts"]
+        bonuses, multipliers = compiled.effects_for((task.get("category"), task.get("room"), task.get("difficulty")))
+
+        talent_bonuses = 0
+        for effect in bonuses:
+            if effect.type == "first_task_bonus" and not is_first_task:
+                continue
+            if effect.type == "streak_bonus" and consecutive_tasks < effect.streak_count:
+                continue
+            talent_bonuses += effect.amount
+            breakdown.append(effect.label)
+
+        talent_multipliers = 1.0
+        if multipliers:
+            can_be_joint = task.get("can_be_joint", False)
+            for effect in multipliers:
+                if effect.type == "joint_task_multiplier" and not can_be_joint:
+                    continue
+                talent_multipliers *= effect.amount
+                breakdown.append(effect.label)
+
+        early_bird_bonus = 0
+        if compiled.early_bird and completion_time.hour < EARLY_BIRD_HOUR:
+            early_bird_bonus = int((base + talent_bonuses) * 0.1)
+            breakdown.append(f"Early Bird: +{early_bird_bonus} pts")
+
+        # Housekeeper's Edge asked for a "cleaning" task that is also a "household" task, so it never
+        # applied; it stays at 0 so totals do not change
+        return {
+            "base_points": base,
+            "talent_bonuses": talent_bonuses,
+            "talent_multipliers": talent_multipliers,
+            "early_bird_bonus": early_bird_bonus,
+            "housekeeper_edge": 0,
+            "total_points": int((base + talent_bonuses) * talent_multipliers + early_bird_bonus),
+            "breakdown": breakdown,
+        }
@@ -0,0 +1,153 @@
+"""
+The talent tree compiled into a prerequisite DAG with bitset builds.
+
+Nodes are put in topological order (prerequisites first, then by tier and
+declaration order), and each node gets the bit at its position. Every node
+keeps the mask of its direct prerequisites and of all its ancestors, and
+the tree keeps a mask of its premium nodes. A build becomes one integer.
+Checking prerequisites, premium gating and cost, or finding which nodes a
+build can unlock next, is then a few integer operations instead of a walk
+over the tree.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+
+class TalentTreeError(ValueError):
+    """The node definitions do not form a DAG (unknown prerequisite or cycle)"""
+
+
+class BuildRejected(ValueError):
+    """A talent build breaks the tree's rules; the message says which"""
+
+
+def iter_bits(mask: int) -> Iterable[int]:
+    """Positions of the set bits, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class TalentTree:
+    """Topologically ordered talent nodes with per-node prerequisite and ancestor masks"""
+
+    def __init__(self, nodes: Dict[str, Dict], frontier_cache_size: int = 4096):
+        declared = {node_id: index for index, node_id in enumerate(nodes)}
+        for node_id, node in nodes.items():
+            unknown = [parent for parent in node.get("prerequisites", []) if parent not in nodes]
+            if unknown:
+                raise TalentTreeError(f"{node_id} requires unknown nodes: {', '.join(unknown)}")
+
+        # Kahn's algorithm, always taking the lowest (tier, declaration) among the ready nodes
+        waiting = {node_id: len(set(node.get("prerequisites", []))) for node_id, node in nodes.items()}
+        children: Dict[str, List[str]] = {node_id: [] for node_id in nodes}
+        for node_id, node in nodes.items():
+            for parent in set(node.get("prerequisites", [])):
+                children[parent].append(node_id)
+
+        def rank(node_id):
+            return nodes[node_id].get("tier", 0), declared[node_id]
+
+        ready = sorted((node_id for node_id, count in waiting.items() if count == 0), key=rank)
+        self.order: List[str] = []
+        while ready:
+            node_id = ready.pop(0)
+            self.order.append(node_id)
+            for child in children[node_id]:
+                waiting[child] -= 1
+                if waiting[child] == 0:
+                    ready.append(child)
+            ready.sort(key=rank)
+        if len(self.order) != len(nodes):
+            cyclic = sorted(node_id for node_id, count in waiting.items() if count)
+            raise TalentTreeError(f"Prerequisite cycle among: {', '.join(cyclic)}")
+
+        self.bit: Dict[str, int] = {node_id: position for position, node_id in enumerate(self.order)}
+        self.costs: List[float] = [nodes[node_id].get("cost", nodes[node_id].get("costTalentPoints", 0))
+                                   for node_id in self.order]
+        self.parents: List[int] = []
+        self.ancestors: List[int] = []
+        self.premium_mask = 0
+        for position, node_id in enumerate(self.order):
+            parents = ancestors = 0
+            for parent in nodes[node_id].get("prerequisites", []):
+                parents |= 1 << self.bit[parent]
+                ancestors |= (1 << self.bit[parent]) | self.ancestors[self.bit[parent]]
+            self.parents.append(parents)
+            self.ancestors.append(ancestors)
+            if nodes[node_id].get("premium"):
+                self.premium_mask |= 1 << position
+        self.all_mask = (1 << len(self.order)) - 1
+        self._frontiers: LRUCache = LRUCache(maxsize=frontier_cache_size)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def mask(self, node_ids: Iterable[str]) -> int:
+        """The build as a bitmask; raises BuildRejected for unknown or repeated nodes"""
+        mask = 0
+        unknown, repeated = [], []
+        for node_id in node_ids:
+            position = self.bit.get(node_id)
+            if position is None:
+                unknown.append(node_id)
+            elif mask >> position & 1:
+                repeated.append(node_id)
+            else:
+                mask |= 1 << position
+        if unknown:
+            raise BuildRejected(f"Unknown talent nodes: {', '.join(unknown)}")
+        if repeated:
+            raise BuildRejected(f"Talent nodes chosen more than once: {', '.join(repeated)}")
+        return mask
+
+    def node_ids(self, mask: int) -> List[str]:
+        """The nodes in a mask, in topological order"""
+        return [self.order[position] for position in iter_bits(mask)]
+
+    def cost(self, mask: int) -> float:
+        return sum(self.costs[position] for position in iter_bits(mask))
+
+    def missing_prerequisites(self, mask: int) -> int:
+        """Ancestors of the build's nodes that the build does not include"""
+        required = 0
+        for position in iter_bits(mask):
+            required |= self.ancestors[position]
+        return required & ~mask
+
+    def validate(self, node_ids: Iterable[str], talent_points: float, has_premium: bool) -> int:
+        """The build's mask if it is allowed; raises BuildRejected otherwise"""
+        mask = self.mask(node_ids)
+        missing = self.missing_prerequisites(mask)
+        if missing:
+            raise BuildRejected(f"Missing prerequisites: {', '.join(self.node_ids(missing))}")
+        if not has_premium and mask & self.premium_mask:
+            raise BuildRejected(f"Premium talents need premium access: {', '.join(self.node_ids(mask & self.premium_mask))}")
+        if self.cost(mask) > talent_points:
+            raise BuildRejected("Not enough talent points")
+        return mask
+
+    def frontier(self, mask: int, has_premium: bool) -> Tuple[str, ...]:
+        """Nodes outside the build whose prerequisites it already has, in topological order"""
+        key = (mask, has_premium)
+        frontier = self._frontiers.get(key)
+        if frontier is None:
+            blocked = mask if has_premium else mask | self.premium_mask
+            frontier = tuple(
+                self.order[position] for position in iter_bits(self.all_mask & ~blocked)
+                if self.parents[position] & ~mask == 0
+            )
+            self._frontiers[key] = frontier
+        return frontier
+
+    def summary(self, mask: int, has_premium: bool, talent_points: Optional[float] = None) -> Dict:
+        """What /talent-tree reports about one build"""
+        spent = self.cost(mask)
+        return {
+            "unlocked": self.node_ids(mask),
+            "frontier": list(self.frontier(mask, has_premium)),
+            "pointsSpent": spent,
+            "pointsAvailable": None if talent_points is None else talent_points - spent,
+        }
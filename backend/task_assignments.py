@@ -0,0 +1,64 @@
+"""
+Chore assignment persistence.
+
+Builds every task upsert for an assign-chores run in memory and sends them as
+one unordered bulk_write, reporting which tasks (if any) failed to save.
+Tasks no member had capacity for are written in the same bulk_write with
+their assignee removed, so they do not keep showing the previous one.
+"""
+from typing import Any, Dict, List, Sequence
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+ASSIGNED = "assigned"
+UNASSIGNED = "unassigned"
+
+
+def build_task_upserts(household_id: str, task_docs: List[dict],
+                       unassigned_docs: Sequence[dict] = ()) -> List[UpdateOne]:
+    """One upsert per task, keyed by (taskId, householdId); unassigned tasks lose their assignedTo"""
+    operations = [
+        UpdateOne(
+            {"taskId": task["taskId"], "householdId": household_id},
+            {"$set": {**task, "status": ASSIGNED}},
+            upsert=True
+        )
+        for task in task_docs
+    ]
+    operations += [
+        UpdateOne(
+            {"taskId": task["taskId"], "householdId": household_id},
+            {"$set": {**{k: v for k, v in task.items() if k != "assignedTo"}, "status": UNASSIGNED},
+             "$unset": {"assignedTo": ""}},
+            upsert=True
+        )
+        for task in unassigned_docs
+    ]
+    return operations
+
+
+async def write_task_assignments(collection, household_id: str, task_docs: List[dict],
+                                 unassigned_docs: Sequence[dict] = ()) -> Dict[str, Any]:
+    """Save all assigned (and unassigned) tasks in a single unordered bulk_write"""
+    if not task_docs and not unassigned_docs:
+        return {"written": 0, "failed": []}
+
+    operations = build_task_upserts(household_id, task_docs, unassigned_docs)
+    task_docs = [*task_docs, *unassigned_docs]
+    try:
+        result = await collection.bulk_write(operations, ordered=False)
+        return {"written": result.upserted_count + result.matched_count, "failed": []}
+    except BulkWriteError as e:
+        # Unordered writes keep going past errors; map each one back to its task
+        details = e.details
+        failed = [
+            {
+                "taskId": task_docs[error["index"]]["taskId"],
+                "title": task_docs[error["index"]].get("title"),
+                "error": error.get("errmsg", "write failed")
+            }
+            for error in details.get("writeErrors", [])
+        ]
+        written = details.get("nUpserted", 0) + details.get("nMatched", 0)
+        return {"written": written, "failed": failed}
@@ -0,0 +1,102 @@
+"""
+Compiled task catalogs, cached by content hash.
+
+Odds, room balancing and chore assignment all work on a catalog compiled
+into odds_engine.TaskArrays: room grouping and sizes, difficulty codes and
+title keyword masks. Households with the same chores share one compiled
+copy, keyed by `catalog_version`. The cache is bounded by the memory the
+arrays hold, not by entry count, so a few huge dorm catalogs cannot crowd
+out the small ones.
+
+Each couple or household remembers which catalog it uses for a short TTL,
+so the household document is not read on every request.
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from cachetools import LRUCache, TTLCache
+
+from odds_engine import TaskArrays
+
+CompiledCatalog = Tuple[str, TaskArrays]
+
+
+def catalog_version(tasks: List[dict]) -> str:
+    """Digest of the task fields the odds depend on"""
+    fields = [
+        (task["taskId"], task["room"], task["title"], str(getattr(task["difficulty"], "value", task["difficulty"])))
+        for task in tasks
+    ]
+    return hashlib.sha256(json.dumps(fields).encode()).hexdigest()[:16]
+
+
+class _SizedLRU(LRUCache):
+    def __init__(self, max_bytes: int):
+        super().__init__(max_bytes, getsizeof=lambda arrays: arrays.nbytes)
+        self.evictions = 0
+
+    def popitem(self):
+        self.evictions += 1
+        return super().popitem()
+
+
+class CatalogCache:
+    """catalog version -> TaskArrays, capped at max_bytes of compiled arrays"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, scope_ttl: float = 60.0, max_scopes: int = 10_000):
+        self.catalogs = _SizedLRU(max_bytes)
+        self.scopes = TTLCache(max_scopes, scope_ttl)
+        self.hits = 0
+        self.misses = 0
+        self.oversized = 0
+
+    def compile(self, tasks: List[dict]) -> CompiledCatalog:
+        """(version, arrays) for a catalog, compiling it only if no identical catalog is cached"""
+        version = catalog_version(tasks)
+        arrays = self.catalogs.get(version)
+        if arrays is not None:
+            self.hits += 1
+            return version, arrays
+        self.misses += 1
+        arrays = TaskArrays(tasks)
+        try:
+            self.catalogs[version] = arrays
+        except ValueError:
+            # Bigger than the whole cache: use it for this call only
+            self.oversized += 1
+        return version, arrays
+
+    def for_scope(self, scope: str) -> Optional[CompiledCatalog]:
+        """The catalog a couple/household was last seen using, if still fresh and cached"""
+        version = self.scopes.get(scope)
+        arrays = self.catalogs.get(version) if version else None
+        if arrays is None:
+            return None
+        self.hits += 1
+        return version, arrays
+
+    def remember_scope(self, scope: str, tasks: List[dict]) -> CompiledCatalog:
+        compiled = self.compile(tasks)
+        self.scopes[scope] = compiled[0]
+        return compiled
+
+    def invalidate(self, scope: Optional[str]):
+        """Forget which catalog a scope uses (e.g. after its chores change)"""
+        if scope:
+            self.scopes.pop(scope, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "catalogs": len(self.catalogs),
+            "bytes": self.catalogs.currsize,
+            "maxBytes": self.catalogs.maxsize,
+            "tasks": sum(len(arrays) for arrays in self.catalogs.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.catalogs.evictions,
+            "oversized": self.oversized,
+            "trackedScopes": len(self.scopes),
+        }
@@ -0,0 +1,144 @@
+"""
+Task completion engine.
+
+A task is claimed with one conditional find_one_and_update (it only matches
+while the task is assigned to the user and not yet completed), so concurrent
+taps can never both award XP. The XP `$inc` on the user and the completion
+history insert then go out together, which makes a completion two round
+trips. The award also appends the completion to the points ledger. When
+the deployment is a replica set, the whole sequence runs in a transaction
+instead.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+import points_ledger
+from repository import fetch_one, projection
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_ATTEMPTS = 3
+
+
+class CompletionRejected(Exception):
+    """The task cannot be completed by this user; carries the HTTP status to answer with"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+async def transactions_supported(client) -> bool:
+    """True when the server is a replica set member or mongos, which multi-document transactions need"""
+    try:
+        hello = await client.admin.command("hello")
+    except PyMongoError as e:
+        logger.warning(f"Could not detect MongoDB topology, completing tasks without transactions: {e}")
+        return False
+    return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+
+async def _rejection(db, task_id: str, user_id: str, session) -> CompletionRejected:
+    """Explain why the conditional claim matched nothing (only runs on the failure path)"""
+    task = await fetch_one(db.tasks, {"taskId": task_id}, "task_completion", session=session)
+    if not task:
+        return CompletionRejected(404, "Task not found")
+    if task.get("assignedTo") != user_id:
+        return CompletionRejected(403, "You can only complete tasks assigned to you")
+    return CompletionRejected(400, "Task already completed")
+
+
+async def _complete(db, task_id: str, user_id: str, bonus_points: int, notes: Optional[str],
+                    photo: Optional[str], level_for: Callable[[int], int], session) -> dict:
+    completed_at = datetime.now(timezone.utc).isoformat()
+    task = await db.tasks.find_one_and_update(
+        {"taskId": task_id, "assignedTo": user_id, "completed": {"$ne": True}},
+        {"$set": {"completed": True, "completedAt": completed_at, "completedBy": user_id}},
+        projection=projection("task_completion"),
+        return_document=ReturnDocument.BEFORE,
+        session=session
+    )
+    if not task:
+        raise await _rejection(db, task_id, user_id, session)
+
+    base_points = task.get("basePoints", 10)
+    xp_earned = base_points + bonus_points
+    completion_record = {
+        "completionId": str(uuid.uuid4()),
+        "userId": user_id,
+        "taskId": task_id,
+        "householdId": task.get("householdId"),
+        # Scoring inputs, so batch_scoring can replay the completion without the task document
+        "difficulty": task.get("difficulty"),
+        "category": task.get("category"),
+        "room": task.get("room"),
+        "pointsEarned": base_points,
+        "bonusPoints": bonus_points,
+        "timestamp": completed_at,
+        "notes": notes,
+        "photo": photo
+    }
+
+    award = points_ledger.award(db, user_id, xp_earned, "task_completion", completion_record["completionId"],
+                                projection=projection("user_progress"), session=session)
+    record = db.task_completions.insert_one(completion_record, session=session)
+    if session is None:
+        user, _ = await asyncio.gather(award, record)
+    else:
+        # Operations in one transaction must not run concurrently on its session
+        user = await award
+        await record
+
+    if not user:
+        if session is None:
+            await asyncio.gather(
+                db.tasks.update_one(
+                    {"taskId": task_id, "completedBy": user_id},
+                    {"$set": {"completed": False}, "$unset": {"completedAt": "", "completedBy": ""}}
+                ),
+                db.task_completions.delete_one({"completionId": completion_record["completionId"]})
+            )
+        raise CompletionRejected(404, "User not found")
+
+    new_points = user.get("points", 0)
+    new_level = level_for(new_points)
+    if new_level != user.get("level"):
+        # Only on level-ups; $max keeps racing completions from lowering the level
+        await db.users.update_one({"userId": user_id}, {"$max": {"level": new_level}}, session=session)
+
+    return {
+        "task": task,
+        "user": user,
+        "oldPoints": new_points - xp_earned,
+        "newPoints": new_points,
+        "basePoints": base_points,
+        "bonusPoints": bonus_points,
+        "xpEarned": xp_earned,
+        "completion": completion_record
+    }
+
+
+async def complete_task_atomically(db, task_id: str, user_id: str, level_for: Callable[[int], int],
+                                   bonus_points: int = 0, notes: Optional[str] = None,
+                                   photo: Optional[str] = None, client=None) -> dict:
+    """Claim the task and award its XP exactly once; pass `client` to run inside a transaction"""
+    if client is None:
+        return await _complete(db, task_id, user_id, bonus_points, notes, photo, level_for, None)
+
+    for attempt in range(1, TRANSACTION_ATTEMPTS + 1):
+        try:
+            async with await client.start_session() as session:
+                async with session.start_transaction():
+                    return await _complete(db, task_id, user_id, bonus_points, notes, photo, level_for, session)
+        except PyMongoError as e:
+            # A concurrent completion of the same task aborts one side with a write
+            # conflict; the retry then sees the task completed and is rejected cleanly.
+            if attempt == TRANSACTION_ATTEMPTS or not e.has_error_label("TransientTransactionError"):
+                raise
@@ -0,0 +1,50 @@
+"""
+Tenant-scoped task queries.
+
+Every query here is pinned to one household (couple ids are household ids on
+the legacy /couples routes), so its cost depends on that household's size
+rather than on the whole deployment.
+"""
+from typing import Dict, Iterable, List
+
+from repository import projection
+
+
+class TenantTaskQueries:
+    """Task reads for a single household"""
+
+    def __init__(self, db, tenant_id: str):
+        self.tasks = db.tasks
+        self.tenant_id = tenant_id
+
+    def _scope(self, **filters) -> dict:
+        return {"householdId": self.tenant_id, **filters}
+
+    async def grouped_by_room(self) -> Dict[str, List[dict]]:
+        """All of the tenant's tasks grouped by room, with the grouping done server-side"""
+        pipeline = [
+            {"$match": self._scope()},
+            {"$project": projection("task_card")},
+            {"$group": {"_id": "$room", "tasks": {"$push": "$$ROOT"}}},
+            {"$sort": {"_id": 1}},
+        ]
+        groups = await self.tasks.aggregate(pipeline).to_list(length=None)
+        return {group["_id"]: group["tasks"] for group in groups}
+
+    async def by_ids(self, task_ids: Iterable[str]) -> Dict[str, dict]:
+        """Only the requested tasks, keyed by taskId"""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return {}
+        tasks = await self.tasks.find(
+            self._scope(taskId={"$in": task_ids}), projection("task_card")
+        ).to_list(length=None)
+        return {task["taskId"]: task for task in tasks}
+
+
+def group_by_room(tasks: Iterable[dict]) -> Dict[str, List[dict]]:
+    """Group an in-memory task list by room (used for the shared default catalog)"""
+    organized = {}
+    for task in tasks:
+        organized.setdefault(task["room"], []).append(task)
+    return organized
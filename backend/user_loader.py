@@ -0,0 +1,89 @@
+"""
+Request-scoped batching loader for user documents.
+
+Every `load(user_id)` issued during the same event-loop tick is merged into a
+single `find({"userId": {"$in": [...]}})` round trip, and results are cached
+for the rest of the request. server.py installs a fresh loader per request via
+`current_user_loader`.
+"""
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from repository import projection as named_projection
+
+
+class UserLoader:
+    """DataLoader-style batcher for `users` lookups by userId"""
+
+    def __init__(self, collection, projection: Optional[Dict[str, Any]] = None):
+        self._collection = collection
+        self._projection = projection if projection is not None else named_projection("user_summary")
+        self._cache: Dict[str, asyncio.Future] = {}
+        self._queue: List[Tuple[str, asyncio.Future]] = []
+        self._dispatch_scheduled = False
+        self.round_trips = 0
+
+    def _enqueue(self, user_id: str) -> asyncio.Future:
+        future = self._cache.get(user_id)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[user_id] = future
+        self._queue.append((user_id, future))
+        if not self._dispatch_scheduled:
+            self._dispatch_scheduled = True
+            # Runs after every task that is already ready this tick has had a chance to enqueue
+            loop.call_soon(self._dispatch)
+        return future
+
+    def _dispatch(self):
+        queued, self._queue = self._queue, []
+        self._dispatch_scheduled = False
+        if queued:
+            asyncio.ensure_future(self._fetch(dict(queued)))
+
+    async def _fetch(self, batch: Dict[str, asyncio.Future]):
+        self.round_trips += 1
+        try:
+            docs = await self._collection.find(
+                {"userId": {"$in": list(batch)}}, self._projection
+            ).to_list(length=None)
+        except Exception as e:
+            for key, future in batch.items():
+                if self._cache.get(key) is future:
+                    del self._cache[key]
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_id = {doc["userId"]: doc for doc in docs}
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(by_id.get(key))
+
+    async def load(self, user_id: str) -> Optional[dict]:
+        """Load one user (None if missing); callers get their own top-level copy"""
+        doc = await self._enqueue(user_id)
+        return dict(doc) if doc is not None else None
+
+    async def load_many(self, user_ids: Iterable[str]) -> List[Optional[dict]]:
+        """Load several users in one round trip, preserving input order"""
+        return list(await asyncio.gather(*(self.load(user_id) for user_id in user_ids)))
+
+    def prime(self, doc: dict):
+        """Seed the cache with a document the caller already has"""
+        if doc.get("userId") and doc["userId"] not in self._cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(doc)
+            self._cache[doc["userId"]] = future
+
+    def clear(self, user_id: str):
+        """Forget a cached user, e.g. after writing to it"""
+        self._cache.pop(user_id, None)
+
+
+# Set per request by the middleware in server.py
+current_user_loader: ContextVar[Optional[UserLoader]] = ContextVar("current_user_loader", default=None)
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# Backend modules are imported the way uvicorn runs them (from inside backend/)
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "domestic_dominion_test")
@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+from pymongo.errors import PyMongoError
+
+from assignment_export import export_lines
+
+
+def matches(doc, query):
+    for key, cond in query.items():
+        if isinstance(cond, dict) and "$in" in cond:
+            if doc.get(key) not in cond["$in"]:
+                return False
+        elif doc.get(key) != cond:
+            return False
+    return True
+
+
+class CountingCursor:
+    """Yields documents one at a time and records how many it has produced"""
+
+    def __init__(self, docs, collection):
+        self.docs = docs
+        self.collection = collection
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            self.collection.read += 1
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.read = 0
+        self.queries = []
+
+    def find(self, query, projection=None, **kwargs):
+        self.queries.append(query)
+        return CountingCursor((doc for doc in self.docs if matches(doc, query)), self)
+
+
+class FakeDb:
+    def __init__(self, households, assignments=()):
+        self.households = FakeCollection(households)
+        self.couples = FakeCollection([])
+        self.daily_assignments = FakeCollection(list(assignments))
+
+
+def households(count):
+    return [{"householdId": f"h{i}", "isActive": True} for i in range(count)]
+
+
+async def collect(lines):
+    return [json.loads(line) for chunk in [chunk async for chunk in lines] for line in chunk.splitlines()]
+
+
+def test_stored_and_generated_assignments():
+    stored = {"coupleId": "h1", "date": "2025-01-01", "assignments": {"t1": "user1"}, "created_at": "then"}
+    db = FakeDb(households(3) + [{"householdId": "idle", "isActive": False}], [stored])
+    computed = []
+
+    async def compute(scope_id, date):
+        computed.append(scope_id)
+        return {"coupleId": scope_id, "date": date, "assignments": {"t1": "user2"}}
+
+    records = asyncio.run(collect(export_lines(db, "2025-01-01", compute, scope_chunk=2)))
+    assert [record["householdId"] for record in records] == ["h0", "h1", "h2"]
+    assert [record["generated"] for record in records] == [True, False, True]
+    assert records[1]["assignments"] == {"t1": "user1"}
+    assert computed == ["h0", "h2"]
+    # One assignments query per chunk, not per household
+    assert len(db.daily_assignments.queries) == 2
+
+
+def test_failures_become_error_lines():
+    db = FakeDb(households(2))
+
+    async def compute(scope_id, date):
+        if scope_id == "h0":
+            raise PyMongoError("timed out")
+        return {"assignments": {}}
+
+    records = asyncio.run(collect(export_lines(db, "2025-01-01", compute)))
+    assert records[0] == {"householdId": "h0", "date": "2025-01-01", "error": "timed out"}
+    assert records[1]["generated"] is True
+
+
+def test_reads_only_as_far_as_the_consumer():
+    db = FakeDb(households(10_000))
+
+    async def compute(scope_id, date):
+        return {"assignments": {}}
+
+    async def first_chunks():
+        lines = export_lines(db, "2025-01-01", compute, scope_chunk=100)
+        first = await lines.__anext__()
+        read_after_first = db.households.read
+        await lines.__anext__()
+        await lines.aclose()
+        return first, read_after_first, db.households.read
+
+    first, read_after_first, read_after_second = asyncio.run(first_chunks())
+    assert len(first.splitlines()) == 100
+    assert read_after_first <= 101
+    assert read_after_second <= 201
+
+
+def test_malformed_documents_become_error_lines():
+    db = FakeDb(households(3), [{"coupleId": "h1", "date": "2025-01-01"}])
+
+    async def compute(scope_id, date):
+        if scope_id == "h0":
+            raise ValueError("no chores")
+        return {"assignments": {}}
+
+    records = asyncio.run(collect(export_lines(db, "2025-01-01", compute)))
+    assert records[0] == {"householdId": "h0", "date": "2025-01-01", "error": "no chores"}
+    assert records[1] == {"householdId": "h1", "date": "2025-01-01", "error": "'assignments'"}
+    assert records[2]["generated"] is True
+
+
+def test_a_failing_household_cursor_ends_with_an_error_line():
+    db = FakeDb(households(3))
+
+    def fail(query, projection=None, **kwargs):
+        raise PyMongoError("cursor killed")
+    db.households.find = fail
+
+    async def compute(scope_id, date):
+        return {"assignments": {}}
+
+    records = asyncio.run(collect(export_lines(db, "2025-01-01", compute)))
+    assert records == [{"date": "2025-01-01", "error": "cursor killed"}]
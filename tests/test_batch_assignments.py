@@ -0,0 +1,156 @@
+import asyncio
+from datetime import date
+
+from pymongo.errors import BulkWriteError
+
+import odds_engine
+from batch_assignments import build_upserts, catalog_fields, load_builds, run_batch, upcoming_dates, write_chunked
+
+TASKS = [
+    {"taskId": "kit_dishes", "room": "Kitchen", "title": "Wash dishes", "difficulty": "MEDIUM"},
+    {"taskId": "kit_trash", "room": "Kitchen", "title": "Take out trash", "difficulty": "EASY"},
+    {"taskId": "bed_laundry", "room": "Bedroom", "title": "Fold laundry", "difficulty": "HARD"},
+]
+KITCHEN = {"kitchen_specialist": True}
+CUSTOM = [
+    {"taskId": "task_1", "room": "General", "title": "Walk the dog", "difficulty": "MEDIUM"},
+    {"taskId": "task_2", "room": "General", "title": "Take out trash", "difficulty": "EASY"},
+]
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            await asyncio.sleep(0)
+            yield doc
+
+
+def matches(doc, query):
+    for key, cond in query.items():
+        if isinstance(cond, dict) and "$in" in cond:
+            if doc.get(key) not in cond["$in"]:
+                return False
+        elif doc.get(key) != cond:
+            return False
+    return True
+
+
+class FakeResult:
+    def __init__(self, upserted, matched):
+        self.upserted_count = upserted
+        self.matched_count = matched
+
+
+class FakeCollection:
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+        self.bulk_sizes = []
+
+    def find(self, query, projection=None, **kwargs):
+        return FakeCursor([
+            {key: value for key, value in doc.items() if not projection or key in projection}
+            for doc in self.docs if matches(doc, query)
+        ])
+
+    async def bulk_write(self, operations, ordered=True):
+        assert not ordered
+        self.bulk_sizes.append(len(operations))
+        upserted = matched = 0
+        for op in operations:
+            if any(matches(doc, op._filter) for doc in self.docs):
+                matched += 1
+            else:
+                self.docs.append(dict(op._doc["$setOnInsert"]))
+                upserted += 1
+        return FakeResult(upserted, matched)
+
+
+class FakeDb:
+    def __init__(self, households=(), couples=(), users=(), daily_odds=()):
+        self.households = FakeCollection(households)
+        self.couples = FakeCollection(couples)
+        self.users = FakeCollection(users)
+        self.daily_odds = FakeCollection(daily_odds)
+        self.daily_assignments = FakeCollection()
+
+
+def test_upcoming_dates_cross_month_ends():
+    assert upcoming_dates(date(2025, 1, 30), 3) == ["2025-01-30", "2025-01-31", "2025-02-01"]
+
+
+def test_upserts_never_overwrite():
+    op = build_upserts([{"coupleId": "c1", "date": "2025-01-01", "assignments": {}}])[0]
+    assert op._filter == {"coupleId": "c1", "date": "2025-01-01"}
+    assert list(op._doc) == ["$setOnInsert"]
+    assert op._upsert
+
+
+def test_catalog_fields_are_plain_values():
+    class Difficulty:
+        value = "EASY"
+
+    assert catalog_fields([dict(TASKS[0], difficulty=Difficulty(), basePoints=5)]) == [
+        {"taskId": "kit_dishes", "room": "Kitchen", "title": "Wash dishes", "difficulty": "EASY"}
+    ]
+
+
+def test_builds_are_padded_and_capped_at_two_players():
+    db = FakeDb(users=[
+        {"userId": "u1", "coupleId": "c1", "talentBuild": KITCHEN},
+        {"userId": "u2", "coupleId": "c1"},
+        {"userId": "u3", "coupleId": "c1", "talentBuild": {"trash_master": True}},
+    ])
+    assert asyncio.run(load_builds(db, ["c1", "c2"])) == {"c1": [KITCHEN, {}], "c2": [{}, {}]}
+
+
+def test_duplicate_keys_count_as_existing():
+    class RacingCollection:
+        async def bulk_write(self, operations, ordered=True):
+            raise BulkWriteError({
+                "writeErrors": [{"index": 0, "code": 11000}, {"index": 1, "code": 2}],
+                "nUpserted": len(operations) - 2,
+                "nMatched": 0,
+            })
+
+    docs = [{"coupleId": f"c{i}", "date": "2025-01-01"} for i in range(5)]
+    assert asyncio.run(write_chunked(RacingCollection(), docs, 10)) == {"inserted": 3, "existing": 1, "failed": 1}
+
+
+def test_batch_matches_the_lazy_endpoints():
+    existing = {"coupleId": "h1", "date": "2025-03-01", "taskOdds": {"already": {"user1": 1.0}}}
+    db = FakeDb(
+        households=[{"householdId": f"h{i}", "isActive": i != 4, **({"customizedChores": CUSTOM} if i == 3 else {})}
+                    for i in range(6)],
+        couples=[{"coupleId": "c1", "isActive": True}, {"coupleId": "c2", "isActive": False}],
+        users=[{"userId": "u1", "coupleId": "c1", "talentBuild": KITCHEN}, {"userId": "u2", "coupleId": "c1"}],
+        daily_odds=[existing],
+    )
+    report = asyncio.run(run_batch(db, TASKS, date(2025, 3, 1), days=2, workers=2, scope_chunk=2, write_chunk=3))
+
+    scopes = ["h0", "h1", "h2", "h3", "h5", "c1"]
+    assert report["households"] == len(scopes)
+    assert report["oddsWritten"] == 2 * len(scopes) - 1
+    assert report["assignmentsWritten"] == 2 * len(scopes)
+    assert report["alreadyPresent"] == 1
+    assert report["failed"] == 0
+    assert report["householdsPerSecond"] > 0
+    assert max(db.daily_odds.bulk_sizes + db.daily_assignments.bulk_sizes) <= 3
+    assert existing in db.daily_odds.docs
+
+    catalogs = {"default": odds_engine.TaskArrays(TASKS), "h3": odds_engine.TaskArrays(CUSTOM)}
+    odds = {(doc["coupleId"], doc["date"]): doc["taskOdds"] for doc in db.daily_odds.docs}
+    for doc in db.daily_assignments.docs:
+        scope, day = doc["coupleId"], doc["date"]
+        builds = [KITCHEN, {}] if scope == "c1" else [{}, {}]
+        arrays = catalogs.get(scope, catalogs["default"])
+        expected = odds_engine.compute_daily_odds(arrays, scope, day, *builds)
+        if (scope, day) != ("h1", "2025-03-01"):
+            assert odds[(scope, day)] == expected
+        assert doc["assignments"] == odds_engine.pair_assignments(scope, day, expected)
+    assert {doc["coupleId"] for doc in db.daily_assignments.docs} == set(scopes)
@@ -0,0 +1,206 @@
+import asyncio
+import random
+from datetime import datetime, timezone
+
+from batch_scoring import CompletionBatch, month_range, replay, score_batch, scoring_version
+from talent_effects import TalentScorer
+
+POINTS = {"EASY": 5, "MEDIUM": 10, "HARD": 20}
+NODES = {
+    "laundry_bonus": {"name": "Fold Master", "effect": {"type": "category_bonus", "category": "laundry", "points": 3}},
+    "first": {"name": "Starter", "effect": {"type": "first_task_bonus", "value": 4}},
+    "streak": {"name": "Routine", "effect": {"type": "streak_bonus", "streak_count": 2, "bonus": 5}},
+    "kitchen_x": {"name": "Chef", "effect": {"type": "category_multiplier", "category": "cooking",
+                                             "room": "Kitchen", "multiplier": 1.5}},
+    "hard_x": {"name": "Grinder", "effect": {"type": "category_multiplier", "difficulty": "HARD",
+                                             "multiplier": 1.15}},
+    "joint_x": {"name": "Together", "effect": {"type": "joint_task_multiplier", "multiplier": 1.2}},
+    "early": {"name": "Dish Duty", "effect": {"type": "time_bonus", "bonus": 5}},
+}
+
+
+def test_batch_totals_match_single_task_scoring():
+    scorer = TalentScorer(NODES, POINTS)
+    seeded = random.Random(11)
+    rows = []
+    for i in range(2000):
+        rows.append({
+            "completionId": f"c{i}",
+            "difficulty": seeded.choice(["EASY", "MEDIUM", "HARD"]),
+            "category": seeded.choice([None, "laundry", "cooking"]),
+            "room": seeded.choice([None, "Kitchen", "Bedroom"]),
+            "hour": seeded.randrange(24),
+            "streak": seeded.randrange(5),
+            "first": seeded.random() < 0.2,
+            "joint": seeded.random() < 0.3,
+            "nodeIds": seeded.sample(list(NODES), seeded.randrange(len(NODES) + 1)),
+        })
+    totals = score_batch(CompletionBatch(rows), scorer)
+    for row, total in zip(rows, totals.tolist()):
+        task = {"difficulty": row["difficulty"], "category": row["category"], "room": row["room"],
+                "can_be_joint": row["joint"]}
+        expected = scorer.score(task, {"nodeIds": row["nodeIds"]}, datetime(2025, 3, 1, row["hour"]),
+                                row["first"], row["streak"])
+        assert total == expected["total_points"]
+
+
+def test_empty_batch():
+    assert score_batch(CompletionBatch([]), TalentScorer(NODES, POINTS)).tolist() == []
+
+
+def test_month_range_rolls_over_the_year():
+    assert month_range("2025-12") == (datetime(2025, 12, 1, tzinfo=timezone.utc),
+                                      datetime(2026, 1, 1, tzinfo=timezone.utc))
+
+
+def matches(doc, query):
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict):
+            if "$in" in cond and value not in cond["$in"]:
+                return False
+            if "$gte" in cond and not value >= cond["$gte"]:
+                return False
+            if "$lt" in cond and not value < cond["$lt"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeResult:
+    def __init__(self, modified):
+        self.modified_count = modified
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.bulk_sizes = []
+
+    def find(self, query, projection=None, sort=None, **kwargs):
+        found = [dict(doc) for doc in self.docs if matches(doc, query)]
+        for key, _ in reversed(sort or []):
+            found.sort(key=lambda doc: doc[key])
+        return FakeCursor(found)
+
+    async def bulk_write(self, operations, ordered=True):
+        assert not ordered
+        self.bulk_sizes.append(len(operations))
+        for op in operations:
+            found = [doc for doc in self.docs if matches(doc, op._filter)]
+            for doc in found:
+                doc.update(op._doc.get("$set", {}))
+            if not found and op._upsert:
+                self.docs.append({**op._filter, **op._doc["$setOnInsert"]})
+        return FakeResult(len(operations))
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        doc = next((doc for doc in self.docs if matches(doc, query)), None)
+        if doc is None:
+            return None
+        for field, amount in update["$inc"].items():
+            doc[field] = doc.get(field, 0) + amount
+        return dict(doc)
+
+    async def insert_many(self, docs, ordered=True):
+        self.docs.extend(dict(doc) for doc in docs)
+
+
+class FakeDb:
+    def __init__(self, completions, tasks=(), users=()):
+        self.task_completions = FakeCollection(completions)
+        self.tasks = FakeCollection(tasks)
+        self.users = FakeCollection(users)
+        self.points_ledger = FakeCollection()
+        self.points_snapshots = FakeCollection()
+
+
+def completion(completion_id, user_id, timestamp, **fields):
+    return {"completionId": completion_id, "userId": user_id, "taskId": "t1", "householdId": "h1",
+            "timestamp": timestamp, **fields}
+
+
+def test_replay_scores_a_month_and_skips_unchanged():
+    scorer = TalentScorer(NODES, POINTS)
+    version = scoring_version(NODES, POINTS)
+    db = FakeDb(
+        completions=[
+            completion("c3", "u1", "2025-03-01T15:00:00+00:00", difficulty="EASY"),
+            completion("c1", "u1", "2025-03-01T08:00:00+00:00", difficulty="EASY"),
+            completion("c2", "u1", "2025-03-01T09:30:00.250000+00:00"),
+            completion("c4", "u2", "2025-03-02T20:00:00+00:00", difficulty="HARD", scoredPoints=23,
+                       scoringVersion=version),
+            completion("c5", "u2", "2025-03-03T20:00:00+00:00", taskId="gone", householdId=None),
+            completion("c6", "u1", "2025-04-01T00:00:00+00:00", difficulty="EASY"),
+        ],
+        tasks=[{"taskId": "t1", "householdId": "h1", "difficulty": "MEDIUM", "category": "laundry"}],
+        users=[{"userId": "u1", "talentBuild": {"nodeIds": ["first", "streak", "early", "laundry_bonus"]}},
+               {"userId": "u2", "talentBuild": {"nodeIds": ["hard_x"]}}],
+    )
+    report = asyncio.run(replay(db, scorer, version, *month_range("2025-03"), chunk=2, write_chunk=2))
+    scored = {doc["completionId"]: doc.get("scoredPoints") for doc in db.task_completions.docs}
+    # c1: first task of the day before 2 PM; c2: second, laundry from the task; c3: streak of 2, afternoon
+    assert scored == {"c1": 5 + 4 + 0, "c2": 10 + 3 + 1, "c3": 5 + 5, "c4": 23, "c5": None, "c6": None}
+    assert report["completions"] == 5
+    assert report["scored"] == 4
+    assert report["unscorable"] == 1
+    assert report["changed"] == report["updated"] == 3
+    assert report["pointsDelta"] == 0
+    assert max(db.task_completions.bulk_sizes) <= 2
+
+
+def test_dry_run_writes_nothing():
+    scorer = TalentScorer(NODES, POINTS)
+    db = FakeDb([completion("c1", "u1", "2025-03-01T08:00:00+00:00", difficulty="HARD", scoredPoints=15)])
+    report = asyncio.run(replay(db, scorer, "v1", *month_range("2025-03"), dry_run=True))
+    assert report["changed"] == 1 and report["updated"] == 0
+    assert report["pointsDelta"] == 5
+    assert db.task_completions.docs[0]["scoredPoints"] == 15
+
+
+def test_replay_corrects_player_totals_through_the_ledger():
+    db = FakeDb(
+        completions=[
+            completion("c1", "u1", "2025-03-01T20:00:00+00:00", difficulty="HARD", pointsEarned=15),
+            completion("c2", "u1", "2025-03-02T20:00:00+00:00", difficulty="EASY", pointsEarned=5),
+            completion("c3", "u2", "2025-03-02T20:00:00+00:00", difficulty="MEDIUM", pointsEarned=25),
+            completion("c4", "u2", "2025-03-03T20:00:00+00:00", difficulty="LEGENDARY", pointsEarned=50),
+            completion("c5", "gone", "2025-03-03T20:00:00+00:00", difficulty="EASY", scoredPoints=4,
+                       scoringVersion="v1"),
+        ],
+        users=[{"userId": "u1", "points": 100}, {"userId": "u2", "points": 40, "ledgerSeq": 7}],
+    )
+    # The first replay records each score as a baseline; live awards (pointsEarned) are left alone
+    first = asyncio.run(replay(db, TalentScorer(NODES, POINTS), "v1", *month_range("2025-03")))
+    assert first["unscorable"] == 1 and first["unknownDifficulties"] == ["LEGENDARY"]
+    assert first["changed"] == 4
+    assert first["pointsDelta"] == 5 - 4
+    assert first["usersCorrected"] == 0
+    assert {user["userId"]: user["points"] for user in db.users.docs} == {"u1": 100, "u2": 40}
+    assert db.points_ledger.docs == []
+
+    raised = TalentScorer(NODES, {**POINTS, "HARD": 30, "MEDIUM": 12})
+    second = asyncio.run(replay(db, raised, "v2", *month_range("2025-03")))
+    assert second["pointsDelta"] == (30 - 20) + (12 - 10)
+    assert second["usersCorrected"] == 2
+    assert {user["userId"]: user["points"] for user in db.users.docs} == {"u1": 110, "u2": 42}
+    events = [(e["userId"], e["seq"], e["delta"], e["reason"], e["refId"]) for e in db.points_ledger.docs]
+    assert sorted(events) == [("u1", 1, 10, "rescore", "v2"), ("u2", 8, 2, "rescore", "v2")]
+    assert [(s["userId"], s["seq"], s["balance"]) for s in db.points_snapshots.docs] == [("u1", 0, 100)]
+
+    again = asyncio.run(replay(db, raised, "v2", *month_range("2025-03")))
+    assert again["changed"] == again["pointsDelta"] == again["usersCorrected"] == 0
+    assert len(db.points_ledger.docs) == 2
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from db_client import DatabaseManager, MongoSettings, PoolMetrics, available_compressors, build_read_preference
+
+# Point at a local three-node replica set to run the integration test, e.g.
+#   for port in 27017 27018 27019; do mongod --replSet rs0 --port $port --dbpath /tmp/rs$port --fork --logpath /tmp/rs$port.log; done
+#   mongosh --eval 'rs.initiate({_id: "rs0", members: [{_id: 0, host: "localhost:27017"},
+#       {_id: 1, host: "localhost:27018"}, {_id: 2, host: "localhost:27019"}]})'
+#   MONGO_REPLICA_SET_URL="mongodb://localhost:27017,localhost:27018,localhost:27019/?replicaSet=rs0" pytest
+REPLICA_SET_URL = os.environ.get("MONGO_REPLICA_SET_URL")
+
+
+def test_settings_from_env(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "25")
+    monkeypatch.setenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "2000")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zstd, zlib")
+    monkeypatch.setenv("MONGO_SECONDARY_READ_PREFERENCE", "nearest")
+    monkeypatch.delenv("MONGO_MIN_POOL_SIZE", raising=False)
+    settings = MongoSettings.from_env()
+    assert settings.max_pool_size == 25
+    assert settings.min_pool_size is None
+    assert settings.compressors == ["zstd", "zlib"]
+    options = settings.client_options()
+    assert options["maxPoolSize"] == 25
+    assert options["serverSelectionTimeoutMS"] == 2000
+    assert "minPoolSize" not in options
+    assert options["compressors"].endswith("zlib")
+
+
+def test_compressors_without_their_package_are_skipped():
+    assert available_compressors(["bogus", "zlib"]) == ["zlib"]
+    assert available_compressors([]) == []
+
+
+def test_read_preferences():
+    assert build_read_preference("primary").mongos_mode == "primary"
+    secondary = build_read_preference("secondaryPreferred", 120)
+    assert secondary.mongos_mode == "secondaryPreferred"
+    assert secondary.max_staleness == 120
+    with pytest.raises(ValueError):
+        build_read_preference("anywhere")
+
+
+def test_pool_metrics_track_checkouts():
+    metrics = PoolMetrics()
+    event = SimpleNamespace(address=("db1", 27017))
+    metrics.connection_created(event)
+    metrics.connection_created(event)
+    metrics.connection_checked_out(event)
+    metrics.connection_checked_out(event)
+    metrics.connection_checked_in(event)
+    metrics.connection_check_out_failed(event)
+    metrics.connection_closed(event)
+    assert metrics.snapshot() == {"db1:27017": {
+        "open": 1, "checkedOut": 1, "peakCheckedOut": 2,
+        "created": 2, "closed": 1, "checkoutFailures": 1, "cleared": 0,
+    }}
+
+
+def test_managers_route_reads_separately():
+    manager = DatabaseManager(MongoSettings(url="mongodb://localhost:27017", db_name="t", max_pool_size=5))
+    try:
+        assert manager.db.read_preference.mongos_mode == "primary"
+        assert manager.secondary_db.read_preference.mongos_mode == "secondaryPreferred"
+        assert manager.options["maxPoolSize"] == 5
+    finally:
+        manager.close()
+
+
+@pytest.mark.skipif(not REPLICA_SET_URL, reason="MONGO_REPLICA_SET_URL not set")
+def test_secondary_reads_against_replica_set():
+    async def run():
+        manager = DatabaseManager(MongoSettings(url=REPLICA_SET_URL, db_name=f"rs_test_{uuid.uuid4().hex[:8]}",
+                                                secondary_read_preference="secondary"))
+        try:
+            health = await manager.health()
+            assert health["status"] == "ok"
+            assert health["replicaSet"]
+            assert len(health["hosts"]) == 3
+
+            await manager.db.messages.insert_one({"id": "m1", "couple_id": "c1"})
+            found = None
+            for _ in range(50):
+                found = await manager.secondary_db.messages.find_one({"id": "m1"}, {"_id": 0})
+                if found:
+                    break
+                await asyncio.sleep(0.1)
+            assert found == {"id": "m1", "couple_id": "c1"}
+            assert any(pool["created"] for pool in (await manager.health())["pools"].values())
+        finally:
+            await manager.client.drop_database(manager.settings.db_name)
+            manager.close()
+
+    asyncio.run(run())
@@ -0,0 +1,42 @@
+from db_indexes import INDEX_SPECS, QUERY_SHAPES, _plan_stages, index_models, uncovered_query_shapes
+
+
+def test_every_query_shape_has_an_index():
+    assert uncovered_query_shapes() == []
+
+
+def test_every_queried_collection_is_declared():
+    assert {collection for _, collection, _, _ in QUERY_SHAPES} <= set(INDEX_SPECS)
+
+
+def test_unique_indexes_on_id_fields():
+    unique = {
+        (collection, tuple(name for name, _ in keys))
+        for collection, specs in INDEX_SPECS.items()
+        for keys, options in specs
+        if options.get("unique")
+    }
+    for expected in [
+        ("users", ("userId",)),
+        ("households", ("householdId",)),
+        ("households", ("inviteCode",)),
+        ("chore_swaps", ("swapId",)),
+        ("mini_game_challenges", ("challengeId",)),
+        ("couple_questions", ("questionId",)),
+        ("verification_requests", ("verificationId",)),
+        ("daily_odds", ("coupleId", "date")),
+    ]:
+        assert expected in unique
+
+
+def test_index_models_build():
+    assert len(index_models("tasks")) == len(INDEX_SPECS["tasks"])
+    assert index_models("unknown") == []
+
+
+def test_plan_stages_finds_nested_collscan():
+    plan = {"stage": "SUBPLAN", "inputStage": {"stage": "OR", "inputStages": [
+        {"stage": "IXSCAN"}, {"stage": "FETCH", "inputStage": {"stage": "COLLSCAN"}},
+    ]}}
+    assert "COLLSCAN" in _plan_stages(plan)
+    assert "COLLSCAN" not in _plan_stages({"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}})
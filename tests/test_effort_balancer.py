@@ -0,0 +1,69 @@
+import random
+
+import numpy as np
+
+from effort_balancer import balance_effort, task_effort
+
+
+def chore(task_id, difficulty, points=None):
+    task = {"taskId": task_id, "title": task_id, "difficulty": difficulty}
+    if points is not None:
+        task["basePoints"] = points
+    return task
+
+
+def test_effort_prefers_base_points_then_difficulty():
+    assert task_effort(chore("a", "EASY", 20)) == 20
+    assert task_effort(chore("b", "HARD")) == 15
+    assert task_effort(chore("c", "UNKNOWN")) == 10
+
+
+def test_hard_chores_are_spread_out():
+    tasks = [chore(f"hard_{i}", "HARD") for i in range(4)] + [chore(f"easy_{i}", "EASY") for i in range(12)]
+    assignments, loads = balance_effort(tasks, ["a", "b", "c", "d"])
+    assert len(assignments) == len(tasks)
+    assert sorted(assignments[f"hard_{i}"] for i in range(4)) == ["a", "b", "c", "d"]
+    assert set(loads.values()) == {30.0}
+
+
+def test_effort_stays_within_one_chore_on_large_catalogs():
+    shuffle = random.Random(11)
+    tasks = [chore(f"t{i}", "MEDIUM", shuffle.choice([5, 10, 15, 20])) for i in range(3000)]
+    members = [f"m{i}" for i in range(37)]
+    assignments, loads = balance_effort(tasks, members)
+    assert len(assignments) == len(tasks)
+    assert max(loads.values()) - min(loads.values()) <= 20
+    recount = {member: 0.0 for member in members}
+    for task in tasks:
+        recount[assignments[task["taskId"]]] += task["basePoints"]
+    assert recount == loads
+
+
+def test_capacity_is_respected_and_overflow_left_unassigned():
+    tasks = [chore("big", "HARD", 15), chore("mid", "MEDIUM", 10), chore("small", "EASY", 5), chore("tiny", "EASY", 5)]
+    assignments, loads = balance_effort(tasks, ["a", "b"], capacities={"a": 5, "b": 12})
+    assert "big" not in assignments
+    assert assignments["mid"] == "b"
+    assert assignments["small"] == "a"
+    assert "tiny" not in assignments
+    assert loads == {"a": 5.0, "b": 10.0}
+
+
+def test_zero_capacity_members_get_nothing():
+    tasks = [chore(f"t{i}", "EASY") for i in range(6)]
+    assignments, loads = balance_effort(tasks, ["a", "b"], capacities={"a": 0})
+    assert set(assignments.values()) == {"b"}
+    assert loads["a"] == 0
+
+
+def test_rng_only_changes_tie_breaks():
+    tasks = [chore(f"t{i}", "MEDIUM") for i in range(10)]
+    members = ["a", "b", "c", "d", "e"]
+    first, _ = balance_effort(tasks, members, rng=np.random.default_rng(1))
+    again, _ = balance_effort(tasks, members, rng=np.random.default_rng(1))
+    assert first == again
+    orders = {balance_effort(tasks, members, rng=np.random.default_rng(seed))[0]["t0"] for seed in range(20)}
+    assert len(orders) > 1
+    for seed in range(5):
+        _, loads = balance_effort(tasks, members, rng=np.random.default_rng(seed))
+        assert set(loads.values()) == {20.0}
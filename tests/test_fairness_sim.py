@@ -0,0 +1,52 @@
+import numpy as np
+
+from fairness_sim import base_odds, draw_days, simulate_pair, talent_advantage
+from odds_engine import TaskArrays
+
+TASKS = [
+    {"taskId": f"k{i}", "room": "Kitchen", "title": f"Kitchen chore {i}", "difficulty": "MEDIUM", "basePoints": 10}
+    for i in range(4)
+] + [
+    {"taskId": f"b{i}", "room": "Bathroom", "title": f"Bathroom chore {i}", "difficulty": "HARD", "basePoints": 20}
+    for i in range(3)
+] + [{"taskId": "solo", "room": "Garage", "title": "Sweep", "difficulty": "EASY", "basePoints": 5}]
+
+
+def test_draws_follow_the_daily_odds():
+    user1 = np.array([0.1, 0.5, 0.9])
+    drawn = draw_days(user1, 1.0 - user1, 200_000, np.random.default_rng(4))
+    assert drawn.shape == (200_000, 3)
+    assert np.allclose(drawn.mean(axis=0), user1, atol=0.01)
+
+
+def test_no_talents_split_evenly():
+    arrays = TaskArrays(TASKS)
+    efforts = np.array([task["basePoints"] for task in TASKS], dtype=float)
+    report = simulate_pair(arrays, efforts, days=40_000, rng=np.random.default_rng(1), chunk=7_000)
+    assert report["days"] == 40_000
+    assert abs(report["user1EffortShare"]["mean"] - 0.5) < 0.01
+    assert report["user1EffortShare"]["p5"] < 0.5 < report["user1EffortShare"]["p95"]
+    assert report["maxRoomSkew"] < 0.02
+    members = report["members"]
+    assert members["user1"]["meanTasks"] + members["user2"]["meanTasks"] == len(TASKS)
+    assert members["user1"]["effortStd"] > 0
+
+
+def test_room_caps_bound_talent_skew():
+    arrays = TaskArrays(TASKS)
+    user1, _ = base_odds(arrays, {"kitchen_specialist": True})
+    assert user1[:4].sum() <= 4 * 0.7 + 1e-12
+    results = talent_advantage(TASKS, {"kitchen": ({"kitchen_specialist": True}, {})}, days=40_000, seed=3)
+    assert results["none"]["talentAdvantage"] == 0.0
+    assert results["kitchen"]["talentAdvantage"] > 0.05
+    assert 0.6 < results["kitchen"]["roomUser1Share"]["Kitchen"] < 0.71
+    assert results["kitchen"]["roomUser1Share"]["Bathroom"] < 0.52
+
+
+def test_seeded_runs_repeat():
+    arrays = TaskArrays(TASKS)
+    efforts = np.ones(len(TASKS))
+    first = simulate_pair(arrays, efforts, days=5_000, rng=np.random.default_rng(9))
+    again = simulate_pair(arrays, efforts, days=5_000, rng=np.random.default_rng(9))
+    assert first["user1EffortShare"] == again["user1EffortShare"]
+    assert first["roomUser1Share"] == again["roomUser1Share"]
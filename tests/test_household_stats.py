@@ -0,0 +1,50 @@
+from household_stats import build_stats_pipeline, shape_household_stats
+
+
+def test_pipeline_is_one_household_with_two_lookups():
+    pipeline = build_stats_pipeline("household_1", "2025-01-01")
+    assert pipeline[0] == {"$match": {"householdId": "household_1"}}
+    lookups = [stage["$lookup"] for stage in pipeline if "$lookup" in stage]
+    assert [lookup["from"] for lookup in lookups] == ["users", "tasks"]
+    assert lookups[1]["pipeline"][0] == {"$match": {"date": "2025-01-01"}}
+    assert "$facet" in lookups[1]["pipeline"][1]
+
+
+def test_shapes_aggregation_result_like_the_endpoint():
+    doc = {
+        "householdId": "household_1",
+        "householdType": "roommates",
+        "creatorName": "Ana",
+        "adventureTheme": "Champions of the Domestic Kingdom",
+        "isActive": True,
+        "choresAssigned": True,
+        "lastAssignedDate": "2025-01-01",
+        "memberIds": ["user_a", "user_b", "user_gone"],
+        "memberLimit": 12,
+        "memberDocs": [
+            {"userId": "user_b", "displayName": "Bo", "role": "member", "level": 2, "points": 120},
+            {"userId": "user_a", "displayName": "Ana", "role": "admin"},
+        ],
+        "todayTasks": [{
+            "totals": [{"_id": None, "total": 4, "completed": 1}],
+            "perMember": [{"_id": "user_a", "count": 3}, {"_id": "user_b", "count": 1}],
+        }],
+    }
+    stats = shape_household_stats("household_1", doc)
+    assert [m["userId"] for m in stats["members"]] == ["user_a", "user_b"]
+    assert stats["members"][0] == {"userId": "user_a", "displayName": "Ana", "role": "admin", "level": 1, "points": 0}
+    assert stats["memberCount"] == 2
+    assert stats["todayStats"] == {
+        "totalTasks": 4,
+        "completedTasks": 1,
+        "completionRate": 25.0,
+        "tasksPerMember": {"user_a": 3, "user_b": 1},
+    }
+
+
+def test_household_without_tasks_today():
+    doc = {"memberIds": [], "memberDocs": [], "todayTasks": [{"totals": [], "perMember": []}]}
+    stats = shape_household_stats("household_1", doc)
+    assert stats["todayStats"]["totalTasks"] == 0
+    assert stats["todayStats"]["completionRate"] == 0
+    assert stats["maxMembers"] == 12
@@ -0,0 +1,113 @@
+import asyncio
+import random
+import time
+
+from leaderboard import HouseholdBoard, LeaderboardService, RankIndex
+
+
+def brute_rank(points, user_id):
+    return 1 + sum(value > points[user_id] for value in points.values())
+
+
+def brute_top(points, n):
+    ordered = sorted(points.items(), key=lambda item: (-item[1], item[0]))
+    return [(user_id, value, brute_rank(points, user_id)) for user_id, value in ordered[:n]]
+
+
+def test_rank_index_matches_brute_force_through_updates(monkeypatch):
+    # Small blocks so splits and emptied blocks happen
+    monkeypatch.setattr(RankIndex, "LOAD", 4)
+    rng = random.Random(7)
+    points = {f"u{i}": rng.randrange(0, 50) for i in range(200)}
+    index = RankIndex(points)
+    for step in range(2000):
+        user_id = f"u{rng.randrange(260)}"
+        if rng.random() < 0.2 and user_id in points:
+            del points[user_id]
+            index.remove(user_id)
+        else:
+            points[user_id] = rng.choice((rng.randrange(-5, 60), rng.randrange(0, 5000)))
+            index.set(user_id, points[user_id])
+        if step % 100 == 0:
+            assert all(index.rank(u) == brute_rank(points, u) for u in points)
+            assert index.top(15) == brute_top(points, 15)
+    assert len(index) == len(points) == sum(map(len, index.blocks))
+    assert all(0 < len(block) <= 8 for block in index.blocks)
+    assert index.rank("nobody") is None
+    assert index.top(1000) == brute_top(points, 1000)
+
+
+def test_huge_totals_cost_no_more_than_small_ones():
+    index = RankIndex({f"u{i}": i for i in range(5000)})
+    started = time.perf_counter()
+    index.set("whale", 10 ** 18)
+    index.set("u3", 10 ** 30)
+    assert time.perf_counter() - started < 0.1
+    assert index.top(2) == [("u3", 10 ** 30, 1), ("whale", 10 ** 18, 2)]
+    assert index.rank("u4999") == 3
+    assert sum(map(len, index.blocks)) == 5001
+
+
+def test_ties_share_a_rank_and_list_by_user_id():
+    index = RankIndex({"b": 10, "a": 10, "c": 30, "d": 5})
+    assert index.top(3) == [("c", 30, 1), ("a", 10, 2), ("b", 10, 2)]
+    assert index.rank("d") == 4
+    assert index.rank_of_points(10) == 2 and index.rank_of_points(31) == 1
+    assert RankIndex().top(5) == []
+
+
+def test_household_board_moves_players():
+    board = HouseholdBoard([("a", 5), ("b", 9), ("c", 5)])
+    assert board.top(5) == [("b", 9, 1), ("a", 5, 2), ("c", 5, 2)]
+    board.set("c", 12)
+    assert board.top(2) == [("c", 12, 1), ("b", 9, 2)]
+    assert board.rank("a") == 3 and board.rank("zed") is None
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeUsers:
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = []
+
+    def find(self, query, projection=None, sort=None, **kwargs):
+        self.finds.append(query)
+        return FakeCursor([dict(doc) for doc in self.docs if all(doc.get(k) == v for k, v in query.items())])
+
+
+class FakeDb:
+    def __init__(self, users):
+        self.users = FakeUsers(users)
+
+
+def test_service_keeps_loaded_boards_current():
+    db = FakeDb([
+        {"userId": "u1", "householdId": "h1", "points": 40},
+        {"userId": "u2", "householdId": "h1", "points": 10},
+        {"userId": "u3", "householdId": "h2", "points": 25},
+    ])
+    service = LeaderboardService(db)
+
+    async def scenario():
+        assert await service.global_top(2) == [("u1", 40, 1), ("u3", 25, 2)]
+        household = await service.household("h1")
+        service.record({"userId": "u2", "householdId": "h1", "points": 50})
+        assert household.top(2) == [("u2", 50, 1), ("u1", 40, 2)]
+        assert await service.global_rank({"userId": "u3", "points": 25}) == 3
+        assert await service.global_rank({"userId": "new", "points": 30}) == 3
+        assert await service.household("h1") is household
+        service.record(None)
+
+    asyncio.run(scenario())
+    assert db.users.finds == [{}, {"householdId": "h1"}]
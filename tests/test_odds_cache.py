@@ -0,0 +1,110 @@
+import asyncio
+
+from pymongo.errors import PyMongoError
+
+from odds_cache import OddsCache, build_fingerprint
+
+
+class FakeStore:
+    def __init__(self, values=None, fail=False):
+        self.values = dict(values or {})
+        self.fail = fail
+        self.writes = []
+
+    async def get(self, key):
+        if self.fail:
+            raise PyMongoError("store down")
+        return self.values.get(key)
+
+    async def set(self, key, value):
+        if self.fail:
+            raise PyMongoError("store down")
+        self.writes.append(key)
+        self.values[key] = value
+
+
+def counting_compute(calls, value):
+    async def compute():
+        calls.append(1)
+        return value
+    return compute
+
+
+def test_fingerprint_is_stable_and_member_ordered():
+    a, b = {"kitchen_specialist": True, "laundry_hand": True}, {"trash_master": True}
+    assert build_fingerprint([a, b]) == build_fingerprint([dict(reversed(list(a.items()))), b])
+    assert build_fingerprint([a, b]) != build_fingerprint([b, a])
+    assert build_fingerprint([None, {}]) == build_fingerprint([{}, {}])
+
+
+def test_hits_and_misses():
+    cache = OddsCache(maxsize=4)
+    key = cache.key("c1", "2025-01-01", cache.remember_builds("c1", [{}, {}]), "v1")
+    calls = []
+
+    async def run():
+        first = await cache.get_or_compute(key, counting_compute(calls, {"t1": 0.5}))
+        second = await cache.get_or_compute(key, counting_compute(calls, {"t1": 0.9}))
+        return first, second
+
+    assert asyncio.run(run()) == ({"t1": 0.5}, {"t1": 0.5})
+    assert len(calls) == 1
+    metrics = cache.metrics()
+    assert (metrics["hits"], metrics["misses"], metrics["hitRate"]) == (1, 1, 0.5)
+
+
+def test_evictions_are_counted():
+    cache = OddsCache(maxsize=2)
+
+    async def run():
+        for day in range(5):
+            await cache.get_or_compute(cache.key("c1", f"2025-01-0{day + 1}", "f", "v"), counting_compute([], day))
+
+    asyncio.run(run())
+    assert cache.metrics()["size"] == 2
+    assert cache.metrics()["evictions"] == 3
+
+
+def test_invalidate_drops_only_that_scope():
+    cache = OddsCache()
+    cache.remember_builds("c1", [{}, {}])
+    cache.remember_builds("c2", [{}, {}])
+    keys = [cache.key(scope, "2025-01-01", "f", "v") for scope in ("c1", "c2")]
+
+    async def run():
+        for key in keys:
+            await cache.get_or_compute(key, counting_compute([], key[0]))
+
+    asyncio.run(run())
+    cache.invalidate("c1")
+    cache.invalidate(None)
+    assert cache.fingerprint_for("c1") is None
+    assert cache.fingerprint_for("c2") is not None
+    assert keys[0] not in cache.entries and keys[1] in cache.entries
+    assert cache.metrics()["invalidations"] == 1
+
+
+def test_shared_store_hits_fill_the_lru_and_misses_write_through():
+    key = OddsCache.key("c1", "2025-01-01", "f", "v")
+    other = OddsCache.key("c2", "2025-01-01", "f", "v")
+    store = FakeStore({"|".join(key): {"t1": 0.7}})
+    cache = OddsCache(store=store)
+    calls = []
+
+    async def run():
+        shared = await cache.get_or_compute(key, counting_compute(calls, {"t1": 0.1}))
+        computed = await cache.get_or_compute(other, counting_compute(calls, {"t1": 0.2}))
+        return shared, computed
+
+    assert asyncio.run(run()) == ({"t1": 0.7}, {"t1": 0.2})
+    assert len(calls) == 1
+    assert key in cache.entries
+    assert store.writes == ["|".join(other)]
+    assert cache.metrics()["sharedStoreHits"] == 1
+
+
+def test_store_failures_fall_back_to_compute():
+    cache = OddsCache(store=FakeStore(fail=True))
+    key = cache.key("c1", "2025-01-01", "f", "v")
+    assert asyncio.run(cache.get_or_compute(key, counting_compute([], {"t1": 0.5}))) == {"t1": 0.5}
+    assert key in cache.entries
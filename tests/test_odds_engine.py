@@ -0,0 +1,134 @@
+import json
+import random
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from odds_engine import (
+    TALENT_SHIFTS, TaskArrays, affected_rows, assign_members, balance_rooms, cap_member_rooms, changed_flags,
+    compute_daily_odds, compute_pair_odds, draw_bonuses, member_odds_matrix, sample_assignments, update_pair_odds,
+)
+from rng import CHORE_ASSIGNMENT, CHORE_BONUS, DAILY_BONUS, numpy_stream, python_stream
+
+# Recorded from the dict-based compute_daily_odds / apply_* functions this engine replaced
+GOLDEN = json.loads((Path(__file__).parent / "data" / "odds_golden.json").read_text())
+
+
+@pytest.mark.parametrize("case", GOLDEN["cases"], ids=lambda c: f"{c['catalog']}-{c['date']}-{sorted(c['user1Talents'])}")
+def test_matches_golden_odds(case):
+    arrays = TaskArrays(GOLDEN["catalogs"][case["catalog"]])
+    odds = compute_daily_odds(arrays, "couple_1", case["date"], case["user1Talents"], case["user2Talents"])
+    assert list(odds) == list(case["odds"])
+    for task_id, (user1, user2) in case["odds"].items():
+        assert odds[task_id]["user1"] == pytest.approx(user1, abs=1e-12)
+        assert odds[task_id]["user2"] == pytest.approx(user2, abs=1e-12)
+
+
+def test_inputs_are_not_mutated():
+    arrays = TaskArrays(GOLDEN["catalogs"]["synthetic"])
+    user1 = np.full(len(arrays), 0.85)
+    user2 = 1.0 - user1
+    balanced1, _ = balance_rooms(arrays, user1, user2)
+    assert (user1 == 0.85).all()
+    assert (balanced1 < 0.85).any()
+
+
+def random_catalog(draw: random.Random) -> list:
+    words = ["trash", "laundry", "dishes", "floor", "trash and laundry", "windows"]
+    rooms = [f"Room {i}" for i in range(draw.randint(1, 8))] + ["Kitchen"]
+    return [
+        {"taskId": f"t{i}", "room": draw.choice(rooms), "title": f"{draw.choice(words)} {i}",
+         "difficulty": draw.choice(["EASY", "MEDIUM", "HARD"])}
+        for i in range(draw.randint(1, 60))
+    ]
+
+
+def random_build(draw: random.Random) -> dict:
+    return {flag: True for flag, _, _ in TALENT_SHIFTS if draw.random() < 0.4}
+
+
+def test_incremental_updates_match_full_recompute():
+    # Property check: any sequence of build changes on any catalog gives bit-identical odds
+    draw = random.Random(20250101)
+    for case in range(300):
+        arrays = TaskArrays(random_catalog(draw))
+        date = f"2025-01-{case % 28 + 1:02d}"
+        build, partner = random_build(draw), random_build(draw)
+        state = compute_pair_odds(arrays, "couple_1", date, build, partner)
+        for _ in range(4):
+            new_build, partner = random_build(draw), random_build(draw)
+            state = update_pair_odds(arrays, state, build, new_build)
+            full = compute_pair_odds(arrays, "couple_1", date, new_build, partner)
+            assert np.array_equal(state.user1, full.user1)
+            assert np.array_equal(state.user2, full.user2)
+            assert np.array_equal(state.talent_user1, full.talent_user1)
+            build = new_build
+
+
+def test_build_change_touches_only_its_rooms():
+    arrays = TaskArrays(GOLDEN["catalogs"]["default"])
+    assert changed_flags({"kitchen_specialist": True}, {"kitchen_specialist": 1, "trash_master": True}) == ["trash_master"]
+    rows = affected_rows(arrays, ["kitchen_specialist"])
+    assert {arrays.rooms[room] for room in arrays.room_index[rows]} == {"Kitchen"}
+    assert sorted(rows.tolist()) == np.flatnonzero(arrays.is_kitchen).tolist()
+    state = compute_pair_odds(arrays, "couple_1", "2025-01-01", {}, {})
+    assert update_pair_odds(arrays, state, {"nodeIds": ["a"]}, {"nodeIds": ["b"]}) is state
+
+
+def test_bonus_stream_depends_only_on_date():
+    first = draw_bonuses(python_stream("couple_1", "2025-01-01", DAILY_BONUS), 500)
+    again = draw_bonuses(python_stream("couple_2", "2025-01-01", DAILY_BONUS), 500)
+    other = draw_bonuses(python_stream("couple_1", "2025-01-02", DAILY_BONUS), 500)
+    assert all((a == b).all() for a, b in zip(first, again))
+    assert not (first[0] == other[0]).all()
+    drawn = first[0][first[0] > 0]
+    assert ((drawn >= 0.01) & (drawn <= 0.03)).all()
+
+
+def household_tasks():
+    rooms = ["Kitchen", "Kitchen", "Kitchen", "Laundry Room", "Laundry Room", "Bathroom"]
+    titles = ["Wash dishes", "Take out trash", "Wipe counters", "Fold laundry", "Start laundry", "Scrub tub"]
+    return [
+        {"taskId": f"task_{i}", "room": rooms[i % 6], "title": titles[i % 6], "difficulty": ["EASY", "HARD"][i % 2]}
+        for i in range(60)
+    ]
+
+
+@pytest.mark.parametrize("members", [2, 5, 12])
+def test_member_matrix_rows_are_distributions(members):
+    arrays = TaskArrays(household_tasks())
+    talents = [{"kitchen_specialist": True, "laundry_hand": True}] + [{}] * (members - 1)
+    odds = member_odds_matrix(arrays, talents, numpy_stream("household_1", "2025-01-01", CHORE_BONUS))
+    assert odds.shape == (60, members)
+    assert np.allclose(odds.sum(axis=1), 1.0)
+    assert (odds > 0).all()
+    kitchen = arrays.is_kitchen
+    assert (odds[kitchen, 0] > odds[kitchen, 1]).all()
+
+
+def test_single_member_gets_everything():
+    arrays = TaskArrays(household_tasks())
+    assignments = assign_members(arrays, ["solo"], [{}], numpy_stream("h", "d", CHORE_BONUS),
+                                 numpy_stream("h", "d", CHORE_ASSIGNMENT))
+    assert set(assignments.values()) == {"solo"}
+
+
+def test_room_cap_holds_for_every_member():
+    arrays = TaskArrays(household_tasks())
+    odds = np.tile([0.85, 0.1, 0.05], (len(arrays), 1))
+    capped = cap_member_rooms(arrays, odds)
+    assert np.allclose(capped.sum(axis=1), 1.0)
+    for room in range(len(arrays.rooms)):
+        in_room = arrays.room_index == room
+        assert (capped[in_room].sum(axis=0) <= 0.7 * in_room.sum() + 1e-9).all()
+    assert (capped[:, 1:] > odds[:, 1:]).all()
+
+
+def test_categorical_draw_follows_odds_and_seed():
+    odds = np.tile([0.6, 0.3, 0.1], (20000, 1))
+    chosen = sample_assignments(odds, numpy_stream("h", "d", CHORE_ASSIGNMENT))
+    assert (chosen == sample_assignments(odds, numpy_stream("h", "d", CHORE_ASSIGNMENT))).all()
+    assert np.allclose(np.bincount(chosen, minlength=3) / len(chosen), [0.6, 0.3, 0.1], atol=0.02)
+    certain = np.array([[0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+    assert sample_assignments(certain, numpy_stream("h", "d", CHORE_ASSIGNMENT)).tolist() == [1, 2]
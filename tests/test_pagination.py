@@ -0,0 +1,121 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from pagination import decode_cursor, encode_cursor, fetch_page
+
+
+def matches(doc, query):
+    for key, cond in query.items():
+        if key == "$and":
+            if not all(matches(doc, sub) for sub in cond):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, sub) for sub in cond):
+                return False
+        elif isinstance(cond, dict):
+            value = doc.get(key)
+            # Like Mongo, comparisons only match values of the same type
+            for op, compare in (("$lt", lambda a, b: a < b), ("$gt", lambda a, b: a > b)):
+                if op in cond and (type(value) is not type(cond[op]) or not compare(value, cond[op])):
+                    return False
+            if "$ne" in cond and value == cond["$ne"]:
+                return False
+        elif doc.get(key) != cond:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            # Null and missing values sort before everything else
+            self.docs.sort(key=lambda d: (d.get(field) is not None, d.get(field) or ""), reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeMessages:
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        return FakeCursor([dict(d) for d in self.docs if matches(d, query)])
+
+
+def make_messages(count):
+    start = datetime(2024, 1, 1)
+    # Pairs of messages share a timestamp so the id tie-breaker matters
+    return [
+        {"id": f"m{i:03d}", "couple_id": "c1", "content": "hi", "timestamp": start + timedelta(minutes=i // 2)}
+        for i in range(count)
+    ]
+
+
+def test_pages_walk_every_message_once_newest_first():
+    messages = FakeMessages(make_messages(25) + [{"id": "x", "couple_id": "c2", "timestamp": datetime(2030, 1, 1)}])
+    seen, cursor = [], None
+    while True:
+        page, cursor = asyncio.run(fetch_page(
+            messages, {"couple_id": "c1"}, "message", "timestamp", "id", 10, cursor, descending=True
+        ))
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert [m["id"] for m in seen] == [f"m{i:03d}" for i in reversed(range(25))]
+
+
+def test_cursor_keeps_existing_or_filter():
+    messages = FakeMessages(make_messages(4))
+    first, cursor = asyncio.run(fetch_page(
+        messages, {"$or": [{"couple_id": "c1"}]}, "message", "timestamp", "id", 2, None
+    ))
+    second, last = asyncio.run(fetch_page(
+        messages, {"$or": [{"couple_id": "c1"}]}, "message", "timestamp", "id", 2, cursor
+    ))
+    assert [m["id"] for m in first + second] == ["m000", "m001", "m002", "m003"]
+    assert last is None
+    assert messages.queries[-1]["$and"][0] == {"$or": [{"couple_id": "c1"}]}
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_undated_tasks_do_not_hide_dated_ones(descending):
+    tasks = [{"taskId": f"t{i}", "householdId": "h1", "date": None if i % 3 == 0 else f"2025-01-0{i % 4 + 1}"}
+             for i in range(10)]
+    del tasks[3]["date"]
+    collection = FakeMessages(tasks)
+    seen, cursor = [], None
+    while True:
+        page, cursor = asyncio.run(fetch_page(
+            collection, {"householdId": "h1"}, "task_card", "date", "taskId", 2, cursor, descending=descending
+        ))
+        seen.extend(task["taskId"] for task in page)
+        if cursor is None:
+            break
+    expected = sorted(tasks, key=lambda t: (t.get("date") is not None, t.get("date") or "", t["taskId"]),
+                      reverse=descending)
+    assert seen == [task["taskId"] for task in expected]
+
+
+def test_cursor_round_trip_and_validation():
+    when = datetime(2024, 5, 1, 12, 30)
+    token = encode_cursor("timestamp", when, "m1")
+    assert decode_cursor(token, "timestamp") == (when, "m1")
+    assert decode_cursor(encode_cursor("date", "2024-05-01", "task_3"), "date") == ("2024-05-01", "task_3")
+    assert decode_cursor(encode_cursor("date", None, "task_4"), "date") == (None, "task_4")
+    with pytest.raises(ValueError):
+        decode_cursor(token, "created_at")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", "timestamp")
@@ -0,0 +1,188 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+import points_ledger
+from points_ledger import award, balance, balance_as_of, replay
+
+
+def matches(doc, query):
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict):
+            if "$gt" in cond and not value > cond["$gt"]:
+                return False
+            if "$lt" in cond and not value < cond["$lt"]:
+                return False
+            if "$lte" in cond and not value <= cond["$lte"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs, collection):
+        self.docs = docs
+        self.collection = collection
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            self.collection.read += 1
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, unique=None):
+        self.docs = []
+        self.unique = unique
+        self.read = 0
+
+    def _sorted(self, query, sort):
+        found = [dict(doc) for doc in self.docs if matches(doc, query)]
+        for key, direction in reversed(sort or []):
+            found.sort(key=lambda doc: doc[key], reverse=direction < 0)
+        return found
+
+    def find(self, query, projection=None, sort=None, **kwargs):
+        return FakeCursor(self._sorted(query, sort), self)
+
+    async def find_one(self, query, projection=None, sort=None, **kwargs):
+        found = self._sorted(query, sort)
+        self.read += bool(found)
+        return found[0] if found else None
+
+    async def insert_one(self, doc, session=None):
+        if self.unique and any(all(existing[k] == doc[k] for k in self.unique) for existing in self.docs):
+            raise DuplicateKeyError("duplicate")
+        self.docs.append(dict(doc))
+
+    async def update_one(self, query, update, upsert=False, session=None):
+        doc = next((doc for doc in self.docs if matches(doc, query)), None)
+        if doc is None and upsert:
+            await self.insert_one({**query, **update.get("$setOnInsert", {}), **update.get("$set", {})})
+        elif doc is not None:
+            doc.update(update.get("$set", {}))
+
+    async def delete_one(self, query, session=None):
+        self.docs = [doc for doc in self.docs if not matches(doc, query)]
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None, session=None):
+        doc = next((doc for doc in self.docs if matches(doc, query)), None)
+        if doc is None:
+            return None
+        for field, amount in update["$inc"].items():
+            doc[field] = doc.get(field, 0) + amount
+        return dict(doc)
+
+
+class FakeDb:
+    def __init__(self, users):
+        self.users = FakeCollection()
+        self.users.docs = users
+        self.points_ledger = FakeCollection(unique=("userId", "seq"))
+        self.points_snapshots = FakeCollection(unique=("userId", "seq"))
+
+
+class Clock:
+    """Stands in for datetime in points_ledger, one minute per award"""
+
+    def __init__(self, start):
+        self.now = start
+
+    def utcnow(self):
+        self.now += timedelta(minutes=1)
+        return self.now
+
+
+START = datetime(2025, 3, 1)
+
+
+def run_awards(db, deltas, monkeypatch, user_id="u1"):
+    clock = Clock(START)
+    monkeypatch.setattr(points_ledger, "datetime", clock)
+
+    async def awards():
+        for i, delta in enumerate(deltas):
+            await award(db, user_id, delta, "test", f"ref{i}")
+        await points_ledger.flush()
+
+    asyncio.run(awards())
+
+
+def test_award_opens_the_ledger_with_prior_points(monkeypatch):
+    db = FakeDb([{"userId": "u1", "points": 40}])
+    run_awards(db, [10, 5], monkeypatch)
+    assert db.users.docs[0] == {"userId": "u1", "points": 55, "ledgerSeq": 2}
+    assert [(e["seq"], e["delta"], e["refId"]) for e in db.points_ledger.docs] == [(1, 10, "ref0"), (2, 5, "ref1")]
+    assert [(s["seq"], s["balance"]) for s in db.points_snapshots.docs] == [(0, 40)]
+    assert asyncio.run(award(db, "ghost", 5, "test")) is None
+    assert len(db.points_ledger.docs) == 2
+
+
+def test_events_are_hidden_until_their_seq_is_assigned(monkeypatch):
+    db = FakeDb([{"userId": "u1", "points": 0}])
+    run_awards(db, [4], monkeypatch)
+
+    async def award_without_flushing():
+        await award(db, "u1", 6, "test")
+        pending = await balance(db, "u1")
+        await points_ledger.flush()
+        return pending, await balance(db, "u1")
+
+    pending, settled = asyncio.run(award_without_flushing())
+    assert pending == {"balance": 4, "seq": 1, "tailEvents": 1}
+    assert settled == {"balance": 10, "seq": 2, "tailEvents": 2}
+    assert [event["seq"] for event in db.points_ledger.docs] == [1, 2]
+
+
+def test_snapshots_in_a_transaction_are_upserts(monkeypatch):
+    db = FakeDb([{"userId": "u1", "points": 0}])
+    run_awards(db, [1], monkeypatch)
+    asyncio.run(points_ledger._snapshot(db, "u1", 0, 999, START, session=object()))
+    assert [(s["seq"], s["balance"]) for s in db.points_snapshots.docs] == [(0, 0)]
+
+
+def test_balance_reads_snapshot_plus_tail(monkeypatch):
+    monkeypatch.setattr(points_ledger, "SNAPSHOT_EVERY", 10)
+    db = FakeDb([{"userId": "u1", "points": 0}])
+    run_awards(db, [1] * 25, monkeypatch)
+    assert [s["seq"] for s in db.points_snapshots.docs] == [0, 10, 20]
+    db.points_ledger.read = 0
+    assert asyncio.run(balance(db, "u1")) == {"balance": 25, "seq": 25, "tailEvents": 5}
+    assert db.points_ledger.read == 5
+    assert asyncio.run(balance(db, "nobody")) is None
+
+
+def test_balance_as_of_reads_at_most_one_interval(monkeypatch):
+    monkeypatch.setattr(points_ledger, "SNAPSHOT_EVERY", 10)
+    db = FakeDb([{"userId": "u1", "points": 7}])
+    deltas = list(range(1, 36))
+    run_awards(db, deltas, monkeypatch)
+    for minute in (1, 9, 10, 17, 30, 35, 90):
+        db.points_ledger.read = 0
+        result = asyncio.run(balance_as_of(db, "u1", START + timedelta(minutes=minute)))
+        assert result["balance"] == 7 + sum(deltas[:minute])
+        assert db.points_ledger.read < 10
+    assert asyncio.run(balance_as_of(db, "u1", START)) is None
+
+
+def test_replay_runs_the_balance_and_flags_gaps(monkeypatch, caplog):
+    db = FakeDb([{"userId": "u1", "points": 3}])
+    run_awards(db, [2, 4, 6], monkeypatch)
+    assert [event["balance"] for event in asyncio.run(collect(replay(db, "u1")))] == [5, 9, 15]
+    until = asyncio.run(collect(replay(db, "u1", until=START + timedelta(minutes=2))))
+    assert [event["seq"] for event in until] == [1, 2]
+
+    db.points_ledger.docs = [event for event in db.points_ledger.docs if event["seq"] != 2]
+    with caplog.at_level("WARNING"):
+        assert [event["balance"] for event in asyncio.run(collect(replay(db, "u1")))] == [5, 11]
+    assert "missing seq 2..2" in caplog.text
+
+
+async def collect(events):
+    return [event async for event in events]
@@ -0,0 +1,48 @@
+import ast
+from pathlib import Path
+
+import pytest
+
+from repository import PROJECTIONS, projection
+
+BACKEND = Path(__file__).parent.parent / "backend"
+HOT_PATH_MODULES = ["server.py", "tenant_queries.py", "user_loader.py"]
+READ_METHODS = {"find", "find_one", "find_one_and_update", "find_one_and_replace"}
+
+
+def unprojected_reads(path: Path):
+    tree = ast.parse(path.read_text())
+    offenders = []
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)):
+            continue
+        if node.func.attr not in READ_METHODS:
+            continue
+        has_projection = len(node.args) >= 2 or any(kw.arg == "projection" for kw in node.keywords)
+        if not has_projection:
+            offenders.append(f"{path.name}:{node.lineno} {node.func.attr}")
+    return offenders
+
+
+@pytest.mark.parametrize("module", HOT_PATH_MODULES)
+def test_no_hot_path_fetches_whole_documents(module):
+    assert unprojected_reads(BACKEND / module) == []
+
+
+@pytest.mark.parametrize("use_case", sorted(PROJECTIONS))
+def test_projections_are_inclusion_lists(use_case):
+    fields = {name: value for name, value in PROJECTIONS[use_case].items() if name != "_id"}
+    # Either named fields are included, or the use case only needs the document id
+    assert fields or PROJECTIONS[use_case] == {"_id": 1}
+    assert all(value == 1 for value in fields.values())
+
+
+def test_household_projections_skip_large_fields():
+    for use_case in ["household_membership", "household_preview", "household_summary"]:
+        assert "customizedChores" not in PROJECTIONS[use_case]
+        assert "householdSetup" not in PROJECTIONS[use_case]
+
+
+def test_unknown_use_case_is_an_error():
+    with pytest.raises(KeyError):
+        projection("everything")
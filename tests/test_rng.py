@@ -0,0 +1,67 @@
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import odds_engine
+from rng import (
+    CHORE_ASSIGNMENT, CHORE_BONUS, DAILY_ASSIGNMENT, DAILY_BONUS, numpy_stream, numpy_substreams, python_stream,
+)
+
+TASKS = [
+    {"taskId": f"task_{i}", "room": ["Kitchen", "Bathroom", "Laundry Room"][i % 3],
+     "title": ["Take out trash", "Fold laundry", "Wipe sink"][i % 3], "difficulty": ["EASY", "HARD"][i % 2]}
+    for i in range(40)
+]
+MEMBERS = ["user_a", "user_b", "user_c"]
+
+
+def assign(household_id, date="2025-01-01"):
+    return odds_engine.assign_members(
+        odds_engine.TaskArrays(TASKS), MEMBERS, [{"kitchen_specialist": True}, {}, {}],
+        numpy_stream(household_id, date, CHORE_BONUS), numpy_stream(household_id, date, CHORE_ASSIGNMENT)
+    )
+
+
+def first_draws(household_id):
+    return numpy_stream(household_id, "2025-01-01", CHORE_ASSIGNMENT).random(3).tolist()
+
+
+def test_legacy_purposes_replay_the_old_global_seeds():
+    random.seed("couple_1_2025-01-01")
+    expected = [random.random() for _ in range(5)]
+    stream = python_stream("couple_1", "2025-01-01", DAILY_ASSIGNMENT)
+    assert [stream.random() for _ in range(5)] == expected
+    assert python_stream("any", "2025-01-01", DAILY_BONUS).random() == random.Random("2025-01-01").random()
+
+
+def test_streams_are_keyed_by_scope_date_and_purpose():
+    base = numpy_stream("h1", "2025-01-01", CHORE_ASSIGNMENT).random(4)
+    assert (base == numpy_stream("h1", "2025-01-01", CHORE_ASSIGNMENT).random(4)).all()
+    for other in [("h2", "2025-01-01", CHORE_ASSIGNMENT), ("h1", "2025-01-02", CHORE_ASSIGNMENT),
+                  ("h1", "2025-01-01", CHORE_BONUS)]:
+        assert not (base == numpy_stream(*other).random(4)).any()
+
+
+def test_pipeline_leaves_global_random_alone():
+    random.seed(1234)
+    state = random.getstate()
+    odds_engine.compute_daily_odds(odds_engine.TaskArrays(TASKS), "couple_1", "2025-01-01", {"trash_master": True})
+    assign("household_1")
+    assert random.getstate() == state
+
+
+def test_parallel_workers_reproduce_serial_results():
+    households = [f"household_{i}" for i in range(32)]
+    serial = [assign(h) for h in households]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(assign, households)) == serial
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        assert list(pool.map(first_draws, households[:4])) == [first_draws(h) for h in households[:4]]
+
+
+def test_substreams_are_reproducible_and_distinct():
+    first = [g.random(3) for g in numpy_substreams("h1", "2025-01-01", CHORE_ASSIGNMENT, 3)]
+    again = [g.random(3) for g in numpy_substreams("h1", "2025-01-01", CHORE_ASSIGNMENT, 3)]
+    assert all((a == b).all() for a, b in zip(first, again))
+    assert len({tuple(values) for values in np.array(first).tolist()}) == 3
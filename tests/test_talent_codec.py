@@ -0,0 +1,124 @@
+import asyncio
+
+import bson
+import pytest
+
+import talent_codec
+from talent_codec import (
+    build_key, build_node_ids, decode_nodes, encode_build, encode_nodes, has_node, migrate_builds, public_build,
+)
+
+NODES = talent_codec.NODE_BITS[talent_codec.BUILD_VERSION]
+
+
+def test_round_trip_in_bit_order():
+    build = encode_build({"nodeIds": ["cq_quality_quest", "hh_dish_duty"], "kitchen_specialist": True})
+    assert build == {"kitchen_specialist": True, "v": 1, "nodeBits": (1 << 0) | (1 << 10)}
+    assert build_node_ids(build) == ["hh_dish_duty", "cq_quality_quest"]
+    assert encode_build(build) is build
+    assert public_build(build) == {"kitchen_specialist": True, "nodeIds": ["hh_dish_duty", "cq_quality_quest"]}
+
+
+def test_legacy_builds_still_decode():
+    legacy = {"nodeIds": ["hh_dish_duty"]}
+    assert build_node_ids(legacy) == ["hh_dish_duty"]
+    assert has_node(legacy, "hh_dish_duty") and not has_node(legacy, "cq_soul_sync")
+    assert public_build(legacy) is legacy
+    assert build_node_ids(None) == [] and public_build(None) == {}
+
+
+def test_membership_without_decoding():
+    build = encode_build({"nodeIds": ["pg_enlightened_partner"]})
+    assert has_node(build, "pg_enlightened_partner")
+    assert not has_node(build, "hh_dish_duty")
+    assert not has_node(build, "not_a_node")
+    assert build_key(build) == (1, 1 << (len(NODES) - 1))
+
+
+def test_masks_past_int64_are_stored_as_bytes(monkeypatch):
+    wide = tuple(f"n{i}" for i in range(70))
+    monkeypatch.setitem(talent_codec.NODE_BITS, 2, wide)
+    monkeypatch.setitem(talent_codec._POSITIONS, 2, {node_id: i for i, node_id in enumerate(wide)})
+    assert isinstance(encode_nodes(["n0", "n62"], version=2), int)
+    bits = encode_nodes(["n0", "n63", "n69"], version=2)
+    assert isinstance(bits, bytes) and len(bits) == 9
+    assert decode_nodes(bits, version=2) == ["n0", "n63", "n69"]
+
+
+def test_unknown_nodes_and_versions_are_errors():
+    with pytest.raises(ValueError, match="no bit"):
+        encode_nodes(["ghost"])
+    with pytest.raises(ValueError, match="Unknown talent build version 9"):
+        build_node_ids({"v": 9, "nodeBits": 1})
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeResult:
+    def __init__(self, matched):
+        self.matched_count = self.modified_count = matched
+
+
+class FakeUsers:
+    def __init__(self, docs):
+        self.docs = docs
+        self.bulk_sizes = []
+
+    def find(self, query, projection=None, **kwargs):
+        return FakeCursor([dict(doc) for doc in self.docs if "nodeIds" in (doc.get("talentBuild") or {})])
+
+    async def bulk_write(self, operations, ordered=True):
+        assert not ordered
+        self.bulk_sizes.append(len(operations))
+        matched = 0
+        for op in operations:
+            for doc in self.docs:
+                if doc["userId"] == op._filter["userId"] and doc.get("talentBuild") == op._filter["talentBuild"]:
+                    doc["talentBuild"] = op._doc["$set"]["talentBuild"]
+                    matched += 1
+        return FakeResult(matched)
+
+
+class FakeDb:
+    def __init__(self, users):
+        self.users = FakeUsers(users)
+
+
+def test_migration_converts_in_batches_and_skips_raced_builds():
+    users = [{"userId": f"u{i}", "talentBuild": {"nodeIds": list(NODES[:i % 5]), "trash_master": True}}
+             for i in range(7)]
+    users.append({"userId": "old", "talentBuild": {"nodeIds": ["hh_dish_duty", "retired_node", "hh_dish_duty"]}})
+    users.append({"userId": "done", "talentBuild": encode_build({"nodeIds": ["hh_dish_duty"]})})
+    db = FakeDb(users)
+    original = db.users.bulk_write
+
+    async def racing_bulk_write(operations, ordered=True):
+        if len(db.users.bulk_sizes) == 0:
+            db.users.docs[0]["talentBuild"] = {"nodeIds": ["cq_soul_sync"]}
+        return await original(operations, ordered)
+
+    db.users.bulk_write = racing_bulk_write
+    before = sum(len(bson.encode(user)) for user in users)
+    report = asyncio.run(migrate_builds(db, batch_size=3))
+
+    assert db.users.bulk_sizes == [3, 3, 2]
+    assert report["scanned"] == 8
+    assert report["converted"] == 7
+    assert report["changedMeanwhile"] == 1
+    assert report["droppedNodes"] == 1
+    assert report["bytesSaved"] > 0
+    assert sum(len(bson.encode(user)) for user in db.users.docs) < before
+    by_id = {user["userId"]: user["talentBuild"] for user in db.users.docs}
+    assert by_id["u0"] == {"nodeIds": ["cq_soul_sync"]}
+    assert build_node_ids(by_id["old"]) == ["hh_dish_duty"]
+    assert by_id["u4"] == {"trash_master": True, "v": 1, "nodeBits": 0b1111}
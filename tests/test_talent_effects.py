@@ -0,0 +1,74 @@
+from datetime import datetime
+
+from talent_effects import TalentScorer
+
+POINTS = {"EASY": 5, "MEDIUM": 10, "HARD": 20}
+NODES = {
+    "laundry_bonus": {"name": "Fold Master", "effect": {"type": "category_bonus", "category": "laundry", "points": 3}},
+    "open_bonus": {"name": "Anything Goes", "effect": {"type": "category_bonus", "points": 7}},
+    "first": {"name": "Starter", "effect": {"type": "first_task_bonus", "value": 4}},
+    "streak": {"name": "Routine", "effect": {"type": "streak_bonus", "streak_count": 3, "bonus": 5}},
+    "kitchen_x": {"name": "Chef", "effect": {"type": "category_multiplier", "category": "cooking",
+                                             "room": "Kitchen", "multiplier": 1.5}},
+    "joint_x": {"name": "Together", "effect": {"type": "joint_task_multiplier", "multiplier": 1.2}},
+    "early": {"name": "Dish Duty", "effect": {"type": "time_bonus", "category": "dishwashing", "bonus": 5}},
+    "unlock": {"name": "Pets", "effect": {"type": "unlock_category", "category": "pet_tasks"}},
+}
+MORNING = datetime(2025, 3, 1, 9)
+EVENING = datetime(2025, 3, 1, 20)
+
+
+def build(*node_ids):
+    return {"nodeIds": list(node_ids)}
+
+
+def test_no_talents_scores_base_points():
+    scorer = TalentScorer(NODES, POINTS)
+    for talents in (None, {}, build()):
+        result = scorer.score({"difficulty": "HARD"}, talents, MORNING)
+        assert result["total_points"] == 20
+        assert result["breakdown"] == ["Base HARD: 20 pts"]
+
+
+def test_bonuses_multipliers_and_breakdown_follow_node_order():
+    scorer = TalentScorer(NODES, POINTS)
+    task = {"difficulty": "MEDIUM", "category": "cooking", "room": "Kitchen", "can_be_joint": True}
+    result = scorer.score(task, build("joint_x", "streak", "kitchen_x", "first", "early", "missing"), MORNING,
+                          is_first_task=True, consecutive_tasks=3)
+    assert result["talent_bonuses"] == 9
+    assert result["talent_multipliers"] == 1.2 * 1.5
+    assert result["early_bird_bonus"] == 1
+    assert result["total_points"] == int(19 * 1.2 * 1.5 + 1)
+    assert result["breakdown"] == [
+        "Base MEDIUM: 10 pts", "Routine (Streak): +5 pts", "Starter (First Task): +4 pts",
+        "Together (Joint): x1.2", "Chef: x1.5", "Early Bird: +1 pts",
+    ]
+
+
+def test_conditions_that_depend_on_the_completion():
+    scorer = TalentScorer(NODES, POINTS)
+    talents = build("first", "streak", "joint_x", "early")
+    result = scorer.score({"difficulty": "EASY"}, talents, EVENING, is_first_task=False, consecutive_tasks=2)
+    assert result["total_points"] == 5
+    assert result["breakdown"] == ["Base EASY: 5 pts"]
+
+
+def test_category_effects_need_an_exact_category():
+    scorer = TalentScorer(NODES, POINTS)
+    talents = build("laundry_bonus", "open_bonus", "kitchen_x")
+    assert scorer.score({"difficulty": "EASY", "category": "laundry"}, talents, EVENING)["talent_bonuses"] == 3
+    # An effect without a category only matches tasks without one
+    assert scorer.score({"difficulty": "EASY"}, talents, EVENING)["talent_bonuses"] == 7
+    wrong_room = {"difficulty": "EASY", "category": "cooking", "room": "Garage"}
+    assert scorer.score(wrong_room, talents, EVENING)["talent_multipliers"] == 1.0
+
+
+def test_builds_compile_once_and_fill_tables_per_task_shape():
+    scorer = TalentScorer(NODES, POINTS)
+    talents = build("laundry_bonus", "streak")
+    compiled = scorer.compile(talents)
+    assert scorer.compile({"nodeIds": ["laundry_bonus", "streak"], "other": 1}) is compiled
+    assert scorer.compile(build("streak", "laundry_bonus")) is not compiled
+    for room in ("Bedroom", "Bedroom", "Kitchen"):
+        scorer.score({"difficulty": "EASY", "category": "laundry", "room": room}, talents, EVENING)
+    assert len(compiled.tables) == 2
@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+from talent_tree import BuildRejected, TalentTree, TalentTreeError
+
+
+def node(tier, cost, prerequisites=(), premium=False):
+    return {"tier": tier, "cost": cost, "prerequisites": list(prerequisites), "premium": premium}
+
+
+# Declared out of order on purpose: "combo" needs both branches
+NODES = {
+    "combo": node(3, 3, ["a2", "b1"]),
+    "a2": node(2, 2, ["a1"]),
+    "a1": node(1, 1),
+    "b1": node(1, 1),
+    "a3": node(3, 2, ["a2"], premium=True),
+}
+
+
+def test_order_puts_prerequisites_first():
+    tree = TalentTree(NODES)
+    assert tree.order == ["a1", "b1", "a2", "combo", "a3"]
+    assert tree.node_ids(tree.ancestors[tree.bit["combo"]]) == ["a1", "b1", "a2"]
+    assert tree.node_ids(tree.parents[tree.bit["combo"]]) == ["b1", "a2"]
+    assert tree.node_ids(tree.premium_mask) == ["a3"]
+
+
+def test_validate_checks_prerequisites_premium_and_cost():
+    tree = TalentTree(NODES)
+    assert tree.validate(["a2", "a1"], 3, has_premium=False) == tree.mask(["a1", "a2"])
+    with pytest.raises(BuildRejected, match="Missing prerequisites: a1, b1"):
+        tree.validate(["combo", "a2"], 10, has_premium=True)
+    with pytest.raises(BuildRejected, match="premium access: a3"):
+        tree.validate(["a1", "a2", "a3"], 10, has_premium=False)
+    assert tree.validate(["a1", "a2", "a3"], 5, has_premium=True)
+    with pytest.raises(BuildRejected, match="Not enough talent points"):
+        tree.validate(["a1", "a2", "a3"], 4.5, has_premium=True)
+    with pytest.raises(BuildRejected, match="Unknown talent nodes: zz"):
+        tree.validate(["a1", "zz"], 10, has_premium=True)
+    with pytest.raises(BuildRejected, match="more than once: a1"):
+        tree.validate(["a1", "a1"], 10, has_premium=True)
+
+
+def test_frontier_is_cached_per_build():
+    tree = TalentTree(NODES)
+    assert tree.frontier(0, has_premium=False) == ("a1", "b1")
+    built = tree.mask(["a1", "a2"])
+    assert tree.frontier(built, has_premium=False) == ("b1",)
+    assert tree.frontier(built, has_premium=True) == ("b1", "a3")
+    assert tree.frontier(built, has_premium=False) is tree.frontier(built, has_premium=False)
+    summary = tree.summary(tree.mask(["a1", "b1", "a2"]), has_premium=False, talent_points=6)
+    assert summary == {"unlocked": ["a1", "b1", "a2"], "frontier": ["combo"], "pointsSpent": 4, "pointsAvailable": 2}
+
+
+def test_malformed_trees_are_rejected():
+    with pytest.raises(TalentTreeError, match="unknown nodes: ghost"):
+        TalentTree({"a": node(1, 1, ["ghost"])})
+    with pytest.raises(TalentTreeError, match="cycle among: a, b"):
+        TalentTree({"a": node(1, 1, ["b"]), "b": node(1, 1, ["a"]), "c": node(1, 1)})
+
+
+def test_masks_agree_with_walking_the_tree():
+    seeded = random.Random(5)
+    nodes = {}
+    for i in range(60):
+        earlier = list(nodes)
+        prerequisites = seeded.sample(earlier, min(len(earlier), seeded.randrange(3)))
+        nodes[f"n{i}"] = node(i // 6 + 1, seeded.randrange(1, 4), prerequisites, premium=seeded.random() < 0.2)
+    tree = TalentTree(nodes)
+
+    def allowed(build, premium):
+        return all(
+            set(nodes[node_id]["prerequisites"]) <= build and (premium or not nodes[node_id]["premium"])
+            for node_id in build
+        )
+
+    for _ in range(300):
+        build = set(seeded.sample(list(nodes), seeded.randrange(15)))
+        premium = seeded.random() < 0.5
+        try:
+            tree.validate(build, 1000, premium)
+            accepted = True
+        except BuildRejected:
+            accepted = False
+        assert accepted == allowed(build, premium)
+        mask = tree.mask(build)
+        expected_frontier = {
+            node_id for node_id in nodes
+            if node_id not in build and set(nodes[node_id]["prerequisites"]) <= build
+            and (premium or not nodes[node_id]["premium"])
+        }
+        assert set(tree.frontier(mask, premium)) == expected_frontier
@@ -0,0 +1,76 @@
+import asyncio
+
+from pymongo.errors import BulkWriteError
+
+from task_assignments import build_task_upserts, write_task_assignments
+
+
+class FakeResult:
+    def __init__(self, upserted, matched):
+        self.upserted_count = upserted
+        self.matched_count = matched
+
+
+class FakeTasks:
+    def __init__(self, fail_indexes=()):
+        self.fail_indexes = set(fail_indexes)
+        self.calls = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.calls.append((len(operations), ordered))
+        if self.fail_indexes:
+            raise BulkWriteError({
+                "writeErrors": [{"index": i, "code": 11000, "errmsg": "E11000 duplicate key"}
+                                for i in sorted(self.fail_indexes)],
+                "nUpserted": len(operations) - len(self.fail_indexes),
+                "nMatched": 0,
+            })
+        return FakeResult(len(operations), 0)
+
+
+def task_docs(n):
+    return [{"taskId": f"task_{i}", "title": f"Chore {i}", "assignedTo": "user_a"} for i in range(n)]
+
+
+def test_builds_one_upsert_per_task():
+    ops = build_task_upserts("household_1", task_docs(3))
+    assert len(ops) == 3
+    assert ops[0]._filter == {"taskId": "task_0", "householdId": "household_1"}
+    assert ops[0]._upsert
+
+
+def test_single_unordered_round_trip():
+    tasks = FakeTasks()
+    result = asyncio.run(write_task_assignments(tasks, "household_1", task_docs(45)))
+    assert tasks.calls == [(45, False)]
+    assert result == {"written": 45, "failed": []}
+
+
+def test_reports_per_task_failures():
+    tasks = FakeTasks(fail_indexes=[2, 7])
+    result = asyncio.run(write_task_assignments(tasks, "household_1", task_docs(10)))
+    assert result["written"] == 8
+    assert [f["taskId"] for f in result["failed"]] == ["task_2", "task_7"]
+    assert result["failed"][0]["title"] == "Chore 2"
+
+
+def test_no_tasks_skips_the_write():
+    tasks = FakeTasks()
+    assert asyncio.run(write_task_assignments(tasks, "household_1", [])) == {"written": 0, "failed": []}
+    assert tasks.calls == []
+
+
+def test_unassigned_tasks_lose_their_assignee_in_the_same_write():
+    unassigned = [{"taskId": "task_9", "title": "Chore 9", "assignedTo": "user_old", "date": "2025-03-01"}]
+    ops = build_task_upserts("household_1", task_docs(2), unassigned)
+    assert ops[0]._doc["$set"]["status"] == "assigned"
+    assert ops[2]._filter == {"taskId": "task_9", "householdId": "household_1"}
+    assert ops[2]._doc == {"$set": {"taskId": "task_9", "title": "Chore 9", "date": "2025-03-01",
+                                    "status": "unassigned"},
+                           "$unset": {"assignedTo": ""}}
+
+    tasks = FakeTasks(fail_indexes=[2])
+    result = asyncio.run(write_task_assignments(tasks, "household_1", task_docs(2), unassigned))
+    assert tasks.calls == [(3, False)]
+    assert [f["taskId"] for f in result["failed"]] == ["task_9"]
+    assert asyncio.run(write_task_assignments(FakeTasks(), "household_1", [], unassigned))["written"] == 1
@@ -0,0 +1,79 @@
+from enum import Enum
+
+import numpy as np
+
+from task_catalog import CatalogCache, catalog_version
+
+TASKS = [
+    {"taskId": "t1", "room": "Kitchen", "title": "Dishes", "difficulty": "EASY"},
+    {"taskId": "t2", "room": "Bedroom", "title": "Laundry", "difficulty": "HARD"},
+]
+
+
+class Difficulty(str, Enum):
+    EASY = "EASY"
+    HARD = "HARD"
+
+
+def catalog(count, prefix="t"):
+    return [
+        {"taskId": f"{prefix}{i}", "room": f"Room {i % 7}", "title": f"Chore {i}", "difficulty": "MEDIUM"}
+        for i in range(count)
+    ]
+
+
+def test_catalog_version_tracks_odds_inputs():
+    renamed = [dict(TASKS[0], title="Dishes and trash"), TASKS[1]]
+    assert catalog_version(TASKS) == catalog_version([dict(task) for task in TASKS])
+    assert catalog_version(TASKS) != catalog_version(renamed)
+    as_enums = [dict(TASKS[0], difficulty=Difficulty.EASY), dict(TASKS[1], difficulty=Difficulty.HARD)]
+    assert catalog_version(as_enums) == catalog_version(TASKS)
+
+
+def test_identical_catalogs_compile_once():
+    cache = CatalogCache()
+    version, arrays = cache.compile(TASKS)
+    again_version, again = cache.compile([dict(task, basePoints=5) for task in TASKS])
+    assert again is arrays and again_version == version
+    assert arrays.difficulty_code.tolist() == [0, 2]
+    assert arrays.is_easy.tolist() == [True, False]
+    metrics = cache.metrics()
+    assert (metrics["catalogs"], metrics["hits"], metrics["misses"]) == (1, 1, 1)
+    assert metrics["bytes"] == arrays.nbytes > 0
+
+
+def test_memory_budget_evicts_least_recent():
+    probe = CatalogCache().compile(catalog(500))[1]
+    cache = CatalogCache(max_bytes=int(probe.nbytes * 2.5))
+    first = cache.compile(catalog(500, "a"))[0]
+    cache.compile(catalog(500, "b"))
+    cache.compile(catalog(500, "a"))
+    cache.compile(catalog(500, "c"))
+    metrics = cache.metrics()
+    assert metrics["catalogs"] == 2
+    assert metrics["evictions"] == 1
+    assert metrics["bytes"] <= metrics["maxBytes"]
+    assert first in cache.catalogs
+
+
+def test_oversized_catalogs_are_compiled_but_not_kept():
+    cache = CatalogCache(max_bytes=1024)
+    _, arrays = cache.compile(catalog(2000))
+    assert len(arrays) == 2000
+    assert cache.metrics()["catalogs"] == 0
+    assert cache.metrics()["oversized"] == 1
+
+
+def test_scopes_remember_their_catalog():
+    cache = CatalogCache()
+    assert cache.for_scope("h1") is None
+    version, arrays = cache.remember_scope("h1", TASKS)
+    assert cache.for_scope("h1") == (version, arrays)
+    cache.invalidate("h1")
+    assert cache.for_scope("h1") is None
+
+
+def test_nbytes_counts_every_array():
+    _, arrays = CatalogCache().compile(catalog(100))
+    array_bytes = sum(value.nbytes for value in vars(arrays).values() if isinstance(value, np.ndarray))
+    assert arrays.nbytes > array_bytes
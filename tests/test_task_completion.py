@@ -0,0 +1,189 @@
+import asyncio
+
+import pytest
+
+import points_ledger
+from task_completion import CompletionRejected, complete_task_atomically
+
+
+def matches(doc, query):
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict):
+            if "$ne" in cond and value == cond["$ne"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class RoundTrips:
+    """Depth of each call: one more than the deepest call that had finished when it was sent"""
+
+    def __init__(self):
+        self.finished = 0
+        self.deepest = 0
+
+    async def trip(self):
+        depth = self.finished + 1
+        self.deepest = max(self.deepest, depth)
+        await asyncio.sleep(0)
+        self.finished = max(self.finished, depth)
+
+
+class FakeCollection:
+    """Applies each update atomically, but yields first so concurrent callers interleave"""
+
+    def __init__(self, trips, docs=None):
+        self.trips = trips
+        self.docs = docs or []
+        self.calls = 0
+
+    def _find(self, query):
+        return next((doc for doc in self.docs if matches(doc, query)), None)
+
+    async def find_one(self, query, projection=None, **kwargs):
+        self.calls += 1
+        await self.trips.trip()
+        doc = self._find(query)
+        return dict(doc) if doc else None
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=False, **kwargs):
+        self.calls += 1
+        await self.trips.trip()
+        doc = self._find(query)
+        if doc is None:
+            return None
+        before = dict(doc)
+        self._apply(doc, update)
+        return dict(doc) if return_document else before
+
+    async def update_one(self, query, update, upsert=False, **kwargs):
+        self.calls += 1
+        await self.trips.trip()
+        doc = self._find(query)
+        if doc is None and upsert:
+            doc = dict(query)
+            doc.update(update.get("$setOnInsert", {}))
+            self.docs.append(doc)
+        if doc:
+            self._apply(doc, update)
+
+    async def insert_one(self, doc, **kwargs):
+        self.calls += 1
+        await self.trips.trip()
+        self.docs.append(dict(doc))
+
+    async def delete_one(self, query, **kwargs):
+        self.calls += 1
+        await self.trips.trip()
+        self.docs = [doc for doc in self.docs if not matches(doc, query)]
+
+    @staticmethod
+    def _apply(doc, update):
+        doc.update(update.get("$set", {}))
+        for field, amount in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + amount
+        for field, value in update.get("$max", {}).items():
+            doc[field] = max(doc.get(field, value), value)
+        for field in update.get("$unset", {}):
+            doc.pop(field, None)
+
+
+class FakeDb:
+    def __init__(self):
+        self.trips = RoundTrips()
+        self.tasks = FakeCollection(self.trips, [
+            {"taskId": "task_1", "householdId": "h1", "title": "Dishes", "basePoints": 10,
+             "assignedTo": "u1", "completed": False},
+            {"taskId": "task_2", "householdId": "h1", "title": "Trash", "basePoints": 5,
+             "assignedTo": "u2", "completed": False},
+        ])
+        self.users = FakeCollection(self.trips, [{"userId": "u1", "points": 95, "level": 1}])
+        self.task_completions = FakeCollection(self.trips)
+        self.points_ledger = FakeCollection(self.trips)
+        self.points_snapshots = FakeCollection(self.trips)
+
+    def calls(self):
+        return {name: collection.calls for name, collection in vars(self).items()
+                if isinstance(collection, FakeCollection)}
+
+
+def level_for(points):
+    return points // 100 + 1
+
+
+def test_hundred_parallel_completions_award_once():
+    db = FakeDb()
+
+    async def run():
+        results = await asyncio.gather(
+            *(complete_task_atomically(db, "task_1", "u1", level_for) for _ in range(100)),
+            return_exceptions=True
+        )
+        await points_ledger.flush()
+        return results
+
+    results = asyncio.run(run())
+    successes = [r for r in results if isinstance(r, dict)]
+    rejections = [r for r in results if isinstance(r, CompletionRejected)]
+    assert len(successes) == 1
+    assert len(rejections) == 99
+    assert {r.status_code for r in rejections} == {400}
+    assert db.users.docs[0]["points"] == 105
+    assert db.users.docs[0]["level"] == 2
+    assert len(db.task_completions.docs) == 1
+    assert [(event["seq"], event["delta"]) for event in db.points_ledger.docs] == [(1, 10)]
+    assert [(snap["seq"], snap["balance"]) for snap in db.points_snapshots.docs] == [(0, 95)]
+
+
+def test_completion_without_level_up_is_two_round_trips(monkeypatch):
+    db = FakeDb()
+    db.users.docs[0]["points"] = 0
+    settle = points_ledger._settle
+
+    async def run():
+        # Hold the background ledger writes until the completion has returned
+        returned = asyncio.Event()
+
+        async def gated_settle(*args):
+            await returned.wait()
+            await settle(*args)
+
+        monkeypatch.setattr(points_ledger, "_settle", gated_settle)
+        result = await complete_task_atomically(db, "task_1", "u1", level_for, bonus_points=3, notes="done")
+        critical = (db.trips.deepest, db.calls())
+        returned.set()
+        await points_ledger.flush()
+        return result, critical
+
+    result, (round_trips, calls) = asyncio.run(run())
+    assert result["xpEarned"] == 13
+    assert (result["oldPoints"], result["newPoints"]) == (0, 13)
+    assert result["completion"]["householdId"] == "h1"
+    # claim, then the XP award, its ledger event and the history insert sent together
+    assert round_trips == 2
+    assert calls == {"tasks": 1, "users": 1, "task_completions": 1, "points_ledger": 1, "points_snapshots": 0}
+    # The event's seq and the opening snapshot are written after the response
+    assert [(event["seq"], event["delta"]) for event in db.points_ledger.docs] == [(1, 13)]
+    assert [(snap["seq"], snap["balance"]) for snap in db.points_snapshots.docs] == [(0, 0)]
+
+
+@pytest.mark.parametrize("task_id, user_id, status", [
+    ("missing", "u1", 404),
+    ("task_2", "u1", 403),
+])
+def test_rejections(task_id, user_id, status):
+    with pytest.raises(CompletionRejected) as excinfo:
+        asyncio.run(complete_task_atomically(FakeDb(), task_id, user_id, level_for))
+    assert excinfo.value.status_code == status
+
+
+def test_unknown_user_releases_the_task():
+    db = FakeDb()
+    with pytest.raises(CompletionRejected) as excinfo:
+        asyncio.run(complete_task_atomically(db, "task_2", "u2", level_for))
+    assert excinfo.value.status_code == 404
+    assert db.tasks.docs[1]["completed"] is False
+    assert db.task_completions.docs == []
+    assert db.points_ledger.docs == []
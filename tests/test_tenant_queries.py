@@ -0,0 +1,53 @@
+import asyncio
+
+from tenant_queries import TenantTaskQueries, group_by_room
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeTasks:
+    def __init__(self):
+        self.pipelines = []
+        self.finds = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor([{"_id": "Kitchen", "tasks": [{"taskId": "t1", "room": "Kitchen"}]}])
+
+    def find(self, query, projection=None):
+        self.finds.append(query)
+        return FakeCursor([{"taskId": "t1", "room": "Kitchen"}])
+
+
+class FakeDb:
+    def __init__(self):
+        self.tasks = FakeTasks()
+
+
+def test_room_grouping_is_scoped_and_server_side():
+    db = FakeDb()
+    grouped = asyncio.run(TenantTaskQueries(db, "household_1").grouped_by_room())
+    assert grouped == {"Kitchen": [{"taskId": "t1", "room": "Kitchen"}]}
+    pipeline = db.tasks.pipelines[0]
+    assert pipeline[0] == {"$match": {"householdId": "household_1"}}
+    assert any("$group" in stage for stage in pipeline)
+
+
+def test_by_ids_fetches_only_requested_tasks():
+    db = FakeDb()
+    queries = TenantTaskQueries(db, "household_1")
+    assert asyncio.run(queries.by_ids([])) == {}
+    assert db.tasks.finds == []
+    assert asyncio.run(queries.by_ids(["t1", "t2"])) == {"t1": {"taskId": "t1", "room": "Kitchen"}}
+    assert db.tasks.finds == [{"householdId": "household_1", "taskId": {"$in": ["t1", "t2"]}}]
+
+
+def test_group_by_room_keeps_order():
+    tasks = [{"taskId": "a", "room": "Kitchen"}, {"taskId": "b", "room": "Bathroom"}, {"taskId": "c", "room": "Kitchen"}]
+    assert group_by_room(tasks) == {"Kitchen": [tasks[0], tasks[2]], "Bathroom": [tasks[1]]}
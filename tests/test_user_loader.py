@@ -0,0 +1,71 @@
+import asyncio
+
+from user_loader import UserLoader
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(0)
+        return self._docs
+
+
+class FakeUsers:
+    def __init__(self, docs):
+        self.docs = {doc["userId"]: doc for doc in docs}
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        ids = query["userId"]["$in"]
+        return FakeCursor([dict(self.docs[i]) for i in ids if i in self.docs])
+
+
+def make_users(n):
+    return FakeUsers([{"userId": f"user_{i}", "displayName": f"Hero {i}"} for i in range(n)])
+
+
+def test_same_tick_loads_share_one_query():
+    users = make_users(12)
+    loader = UserLoader(users)
+
+    async def run():
+        return await loader.load_many([f"user_{i}" for i in range(12)] + ["missing"])
+
+    docs = asyncio.run(run())
+    assert [d["displayName"] for d in docs[:12]] == [f"Hero {i}" for i in range(12)]
+    assert docs[12] is None
+    assert len(users.queries) == 1
+    assert loader.round_trips == 1
+
+
+def test_results_are_cached_for_the_request():
+    users = make_users(3)
+    loader = UserLoader(users)
+
+    async def run():
+        first = await loader.load("user_1")
+        first["displayName"] = "mutated"
+        second = await loader.load("user_1")
+        await loader.load_many(["user_0", "user_1"])
+        return second
+
+    second = asyncio.run(run())
+    assert second["displayName"] == "Hero 1"
+    assert len(users.queries) == 2
+    assert users.queries[1] == {"userId": {"$in": ["user_0"]}}
+
+
+def test_clear_forces_reload():
+    users = make_users(2)
+    loader = UserLoader(users)
+
+    async def run():
+        await loader.load("user_0")
+        loader.clear("user_0")
+        await loader.load("user_0")
+
+    asyncio.run(run())
+    assert len(users.queries) == 2